@@ -20,6 +20,85 @@ public class BenchmarkCLI
         public double std_dev_ms;
     }
 
+    // --------------------------------------------------
+    // BATCH SWEEP ENTRY
+    // --------------------------------------------------
+
+    [Serializable]
+    public class BatchTiming
+    {
+        public string backend;
+        public int batch_size;
+        public TimingStats timing;
+        public string error;
+    }
+
+    // --------------------------------------------------
+    // PER-LAYER TIMING
+    // --------------------------------------------------
+
+    [Serializable]
+    public class LayerTiming
+    {
+        public string backend;
+        public string name;
+        public string type;
+        public double avg_ms;
+    }
+
+    // --------------------------------------------------
+    // COLD-START TRIAL
+    // --------------------------------------------------
+
+    [Serializable]
+    public class ColdStartTrial
+    {
+        public string backend;
+        public int trial;
+        // ModelLoader.Load from the imported asset
+        public double file_load_ms;
+        // WorkerFactory.CreateWorker
+        public double session_create_ms;
+        public double first_inference_ms;
+        public double warm_ms;
+        public string error;
+    }
+
+    // --------------------------------------------------
+    // FRAME-CADENCE RUN (raw per-frame latencies)
+    // --------------------------------------------------
+
+    [Serializable]
+    public class CadenceRun
+    {
+        public string backend;
+        public double rate_hz;
+        public double duration_s;
+        // Frame start to result read back, one per issued frame
+        public float[] latencies_ms;
+        public int dropped_frames;
+        public string error;
+    }
+
+    // --------------------------------------------------
+    // PHASE TIMINGS (wall time inside the Editor)
+    // --------------------------------------------------
+
+    [Serializable]
+    public class PhaseTimings
+    {
+        // Editor start until RunBenchmark (includes the initial asset import)
+        public double startup_ms;
+        public double asset_import_ms;
+        public double model_load_ms;
+        public double cold_start_ms;
+        public double cpu_ms;
+        public double gpu_ms;
+        public double batch_sweep_ms;
+        public double layer_profile_ms;
+        public double cadence_ms;
+    }
+
     // --------------------------------------------------
     // BENCHMARK RESULT
     // --------------------------------------------------
@@ -43,6 +122,21 @@ public class BenchmarkCLI
         // GPU timings
         public TimingStats gpu;
 
+        // Optional batch-size throughput sweep (-nnvrBatchSizes)
+        public BatchTiming[] batch_sweep;
+
+        // Optional per-layer timings (-nnvrLayerProfile <iterations>)
+        public LayerTiming[] layer_profile;
+
+        // Optional cold-start trials (-nnvrColdStart <trials>)
+        public ColdStartTrial[] cold_start;
+
+        // Optional fixed frame-rate runs (-nnvrCadence <hz,...> -nnvrCadenceSeconds <s>)
+        public CadenceRun[] cadence;
+
+        // Where the Editor's time went
+        public PhaseTimings phases;
+
         // NPU unsupported on desktop Barracuda
         public object npu = null;
 
@@ -70,6 +164,13 @@ public class BenchmarkCLI
     {
         BenchmarkResult result = new BenchmarkResult();
 
+        result.phases = new PhaseTimings
+        {
+            startup_ms = Time.realtimeSinceStartup * 1000.0
+        };
+
+        var phaseClock = System.Diagnostics.Stopwatch.StartNew();
+
         try
         {
             AssetDatabase.Refresh();
@@ -100,8 +201,12 @@ public class BenchmarkCLI
                 );
             }
 
+            result.phases.asset_import_ms = Lap(phaseClock);
+
             Model model = ModelLoader.Load(nnModel);
 
+            result.phases.model_load_ms = Lap(phaseClock);
+
             result.model_name = Path.GetFileNameWithoutExtension(
                 assetPath
             );
@@ -148,6 +253,19 @@ public class BenchmarkCLI
                 result.output_shape = new int[] { 0, 0, 0, 0 };
             }
 
+            // --------------------------------------------------
+            // COLD START (OPTIONAL, before anything warms up)
+            // --------------------------------------------------
+
+            string coldStartArg = GetArg("-nnvrColdStart");
+
+            if (!string.IsNullOrEmpty(coldStartArg))
+            {
+                result.cold_start = MeasureColdStart(nnModel, int.Parse(coldStartArg));
+
+                result.phases.cold_start_ms = Lap(phaseClock);
+            }
+
             // --------------------------------------------------
             // BENCHMARK CPU
             // --------------------------------------------------
@@ -157,6 +275,8 @@ public class BenchmarkCLI
                 WorkerFactory.Type.CSharpBurst
             );
 
+            result.phases.cpu_ms = Lap(phaseClock);
+
             // --------------------------------------------------
             // BENCHMARK GPU
             // --------------------------------------------------
@@ -166,6 +286,57 @@ public class BenchmarkCLI
                 WorkerFactory.Type.ComputePrecompiled
             );
 
+            result.phases.gpu_ms = Lap(phaseClock);
+
+            // --------------------------------------------------
+            // BATCH SWEEP (OPTIONAL)
+            // --------------------------------------------------
+
+            int[] batchSizes = ParseIntList(GetArg("-nnvrBatchSizes"));
+
+            if (batchSizes.Length > 0)
+            {
+                result.batch_sweep = RunBatchSweep(model, batchSizes);
+
+                result.phases.batch_sweep_ms = Lap(phaseClock);
+            }
+
+            // --------------------------------------------------
+            // PER-LAYER PROFILE (OPTIONAL)
+            // --------------------------------------------------
+
+            string layerProfileArg = GetArg("-nnvrLayerProfile");
+
+            if (!string.IsNullOrEmpty(layerProfileArg))
+            {
+                int iterations = int.Parse(layerProfileArg);
+
+                result.layer_profile = ProfileLayers(model, "cpu", WorkerFactory.Type.CSharpBurst, iterations)
+                    .Concat(ProfileLayers(model, "gpu", WorkerFactory.Type.ComputePrecompiled, iterations))
+                    .ToArray();
+
+                result.phases.layer_profile_ms = Lap(phaseClock);
+            }
+
+            // --------------------------------------------------
+            // FRAME CADENCE (OPTIONAL)
+            // --------------------------------------------------
+
+            double[] cadenceRates = ParseDoubleList(GetArg("-nnvrCadence"));
+
+            if (cadenceRates.Length > 0)
+            {
+                string secondsArg = GetArg("-nnvrCadenceSeconds");
+
+                double seconds = string.IsNullOrEmpty(secondsArg)
+                    ? 10.0
+                    : double.Parse(secondsArg, System.Globalization.CultureInfo.InvariantCulture);
+
+                result.cadence = RunCadence(model, cadenceRates, seconds);
+
+                result.phases.cadence_ms = Lap(phaseClock);
+            }
+
             // --------------------------------------------------
             // BACKEND INFO
             // --------------------------------------------------
@@ -243,6 +414,449 @@ public class BenchmarkCLI
         EditorApplication.Exit(0);
     }
 
+    // --------------------------------------------------
+    // COMMAND LINE HELPERS
+    // --------------------------------------------------
+
+    private static string GetArg(string name)
+    {
+        string[] args = Environment.GetCommandLineArgs();
+
+        for (int i = 0; i < args.Length - 1; i++)
+        {
+            if (args[i] == name)
+            {
+                return args[i + 1];
+            }
+        }
+
+        return null;
+    }
+
+    private static double Lap(System.Diagnostics.Stopwatch clock)
+    {
+        double ms = clock.Elapsed.TotalMilliseconds;
+
+        clock.Restart();
+
+        return ms;
+    }
+
+    private static int[] ParseIntList(string value)
+    {
+        if (string.IsNullOrEmpty(value))
+        {
+            return new int[0];
+        }
+
+        return value
+            .Split(',')
+            .Where(s => s.Trim().Length > 0)
+            .Select(s => int.Parse(s.Trim()))
+            .ToArray();
+    }
+
+    private static double[] ParseDoubleList(string value)
+    {
+        if (string.IsNullOrEmpty(value))
+        {
+            return new double[0];
+        }
+
+        return value
+            .Split(',')
+            .Where(s => s.Trim().Length > 0)
+            .Select(s => double.Parse(s.Trim(), System.Globalization.CultureInfo.InvariantCulture))
+            .ToArray();
+    }
+
+    // --------------------------------------------------
+    // BATCH SWEEP
+    // --------------------------------------------------
+
+    private static BatchTiming[] RunBatchSweep(
+        Model model,
+        int[] batchSizes
+    )
+    {
+        var backends = new[]
+        {
+            new { name = "cpu", type = WorkerFactory.Type.CSharpBurst },
+            new { name = "gpu", type = WorkerFactory.Type.ComputePrecompiled }
+        };
+
+        var entries = new System.Collections.Generic.List<BatchTiming>();
+
+        foreach (var backend in backends)
+        {
+            foreach (int batchSize in batchSizes)
+            {
+                BatchTiming entry = new BatchTiming
+                {
+                    backend = backend.name,
+                    batch_size = batchSize,
+                    error = ""
+                };
+
+                try
+                {
+                    entry.timing = BenchmarkBackend(
+                        model,
+                        backend.type,
+                        batchSize: batchSize
+                    );
+                }
+                catch (Exception e)
+                {
+                    entry.error = e.Message;
+                }
+
+                entries.Add(entry);
+
+                // Larger batches will fail the same way (OOM / fixed reshape)
+                if (entry.error.Length > 0)
+                {
+                    break;
+                }
+            }
+        }
+
+        return entries.ToArray();
+    }
+
+    // --------------------------------------------------
+    // PER-LAYER PROFILE
+    // --------------------------------------------------
+
+    private static LayerTiming[] ProfileLayers(
+        Model model,
+        string backendName,
+        WorkerFactory.Type backend,
+        int iterations,
+        int warmupIterations = 2
+    )
+    {
+        var totals = new System.Collections.Generic.List<double>();
+
+        using (var worker = WorkerFactory.CreateWorker(
+            backend,
+            model
+        ))
+        {
+            Tensor input = CreateInput(model, 0);
+
+            for (int i = 0; i < warmupIterations; i++)
+            {
+                worker.Execute(input);
+
+                Tensor warmupOutput =
+                    worker.PeekOutput();
+
+                warmupOutput.Dispose();
+            }
+
+            var stopwatch = new System.Diagnostics.Stopwatch();
+
+            for (int i = 0; i < iterations; i++)
+            {
+                // One MoveNext schedules one layer; a blocking flush waits for it
+                var schedule = worker.StartManualSchedule(input);
+
+                int layer = 0;
+
+                while (true)
+                {
+                    stopwatch.Restart();
+
+                    if (!schedule.MoveNext())
+                    {
+                        break;
+                    }
+
+                    worker.FlushSchedule(true);
+
+                    stopwatch.Stop();
+
+                    if (totals.Count <= layer)
+                    {
+                        totals.Add(0.0);
+                    }
+
+                    totals[layer] += stopwatch.Elapsed.TotalMilliseconds;
+
+                    layer++;
+                }
+
+                Tensor output =
+                    worker.PeekOutput();
+
+                output.Dispose();
+            }
+
+            input.Dispose();
+        }
+
+        var entries = new LayerTiming[totals.Count];
+
+        for (int i = 0; i < totals.Count; i++)
+        {
+            // Workers run model.layers in order; fall back to an index if the counts differ
+            Layer layer = i < model.layers.Count && totals.Count == model.layers.Count
+                ? model.layers[i]
+                : null;
+
+            entries[i] = new LayerTiming
+            {
+                backend = backendName,
+                name = layer != null ? layer.name : "layer_" + i,
+                type = layer == null
+                    ? ""
+                    : layer.type == Layer.Type.Activation
+                        ? "Activation." + layer.activation
+                        : layer.type.ToString(),
+                avg_ms = totals[i] / iterations
+            };
+        }
+
+        return entries;
+    }
+
+    // --------------------------------------------------
+    // COLD START
+    // --------------------------------------------------
+
+    private static ColdStartTrial[] MeasureColdStart(
+        NNModel nnModel,
+        int trials,
+        int warmIterations = 10
+    )
+    {
+        var backends = new[]
+        {
+            new { name = "cpu", type = WorkerFactory.Type.CSharpBurst },
+            new { name = "gpu", type = WorkerFactory.Type.ComputePrecompiled }
+        };
+
+        var entries = new System.Collections.Generic.List<ColdStartTrial>();
+
+        var stopwatch = new System.Diagnostics.Stopwatch();
+
+        // Only trial 0 is cold for the process (Burst / shader compilation);
+        // later trials repeat load + worker creation with those caches warm
+        for (int t = 0; t < trials; t++)
+        {
+            foreach (var backend in backends)
+            {
+                ColdStartTrial entry = new ColdStartTrial
+                {
+                    backend = backend.name,
+                    trial = t,
+                    error = ""
+                };
+
+                try
+                {
+                    stopwatch.Restart();
+
+                    Model model = ModelLoader.Load(nnModel);
+
+                    entry.file_load_ms = stopwatch.Elapsed.TotalMilliseconds;
+
+                    stopwatch.Restart();
+
+                    using (var worker = WorkerFactory.CreateWorker(
+                        backend.type,
+                        model
+                    ))
+                    {
+                        entry.session_create_ms = stopwatch.Elapsed.TotalMilliseconds;
+
+                        Tensor input = CreateInput(model, 0);
+
+                        entry.first_inference_ms = TimeSyncedRun(worker, input, stopwatch);
+
+                        double warmTotal = 0.0;
+
+                        for (int i = 0; i < warmIterations; i++)
+                        {
+                            warmTotal += TimeSyncedRun(worker, input, stopwatch);
+                        }
+
+                        entry.warm_ms = warmTotal / warmIterations;
+
+                        input.Dispose();
+                    }
+                }
+                catch (Exception e)
+                {
+                    entry.error = e.Message;
+                }
+
+                entries.Add(entry);
+            }
+        }
+
+        return entries.ToArray();
+    }
+
+    private static double TimeSyncedRun(
+        IWorker worker,
+        Tensor input,
+        System.Diagnostics.Stopwatch stopwatch
+    )
+    {
+        stopwatch.Restart();
+
+        worker.Execute(input);
+
+        Tensor output =
+            worker.PeekOutput();
+
+        // Reading the values waits for the GPU to finish
+        output.ToReadOnlyArray();
+
+        double ms = stopwatch.Elapsed.TotalMilliseconds;
+
+        output.Dispose();
+
+        return ms;
+    }
+
+    // --------------------------------------------------
+    // FRAME CADENCE
+    // --------------------------------------------------
+
+    private static CadenceRun[] RunCadence(
+        Model model,
+        double[] rates,
+        double seconds,
+        int warmupIterations = 5
+    )
+    {
+        var backends = new[]
+        {
+            new { name = "cpu", type = WorkerFactory.Type.CSharpBurst },
+            new { name = "gpu", type = WorkerFactory.Type.ComputePrecompiled }
+        };
+
+        var entries = new System.Collections.Generic.List<CadenceRun>();
+
+        var stopwatch = new System.Diagnostics.Stopwatch();
+
+        foreach (var backend in backends)
+        {
+            using (var worker = WorkerFactory.CreateWorker(
+                backend.type,
+                model
+            ))
+            {
+                Tensor input = CreateInput(model, 0);
+
+                for (int i = 0; i < warmupIterations; i++)
+                {
+                    TimeSyncedRun(worker, input, stopwatch);
+                }
+
+                foreach (double rate in rates)
+                {
+                    CadenceRun entry = new CadenceRun
+                    {
+                        backend = backend.name,
+                        rate_hz = rate,
+                        duration_s = seconds,
+                        error = ""
+                    };
+
+                    try
+                    {
+                        double period = 1000.0 / rate;
+
+                        int totalFrames = (int)(seconds * rate);
+
+                        var latencies = new System.Collections.Generic.List<float>(totalFrames);
+
+                        var clock = System.Diagnostics.Stopwatch.StartNew();
+
+                        int frame = 0;
+
+                        while (frame < totalFrames)
+                        {
+                            double tick = frame * period;
+
+                            // Sleep until close to the tick, then spin
+                            double remaining = tick - clock.Elapsed.TotalMilliseconds;
+
+                            if (remaining > 2.0)
+                            {
+                                System.Threading.Thread.Sleep((int)(remaining - 2.0));
+                            }
+
+                            while (clock.Elapsed.TotalMilliseconds < tick)
+                            {
+                            }
+
+                            worker.Execute(input);
+
+                            Tensor output =
+                                worker.PeekOutput();
+
+                            output.ToReadOnlyArray();
+
+                            double done = clock.Elapsed.TotalMilliseconds;
+
+                            output.Dispose();
+
+                            latencies.Add((float)(done - tick));
+
+                            // Ticks that passed while the frame overran are dropped
+                            int next = Math.Max(frame + 1, (int)Math.Ceiling(done / period));
+
+                            entry.dropped_frames += next - frame - 1;
+
+                            frame = next;
+                        }
+
+                        entry.latencies_ms = latencies.ToArray();
+                    }
+                    catch (Exception e)
+                    {
+                        entry.error = e.Message;
+                    }
+
+                    entries.Add(entry);
+                }
+
+                input.Dispose();
+            }
+        }
+
+        return entries.ToArray();
+    }
+
+    private static Tensor CreateInput(
+        Model model,
+        int batchSize
+    )
+    {
+        int[] shape = model.inputs[0].shape;
+
+        int len = shape.Length;
+
+        int batch = batchSize > 0
+            ? batchSize
+            : Math.Max(shape[len - 4], 1);
+        int height = shape[len - 3];
+        int width = shape[len - 2];
+        int channels = shape[len - 1];
+
+        return new Tensor(
+            batch,
+            height,
+            width,
+            channels
+        );
+    }
+
     // --------------------------------------------------
     // BACKEND BENCHMARK
     // --------------------------------------------------
@@ -251,7 +865,8 @@ public class BenchmarkCLI
         Model model,
         WorkerFactory.Type backend,
         int warmupIterations = 5,
-        int measuredIterations = 20
+        int measuredIterations = 20,
+        int batchSize = 0
     )
     {
         float[] times = new float[measuredIterations];
@@ -261,21 +876,7 @@ public class BenchmarkCLI
             model
         ))
         {
-            int[] shape = model.inputs[0].shape;
-
-            int len = shape.Length;
-
-            int batch = shape[len - 4];
-            int height = shape[len - 3];
-            int width = shape[len - 2];
-            int channels = shape[len - 1];
-
-            Tensor input = new Tensor(
-                batch,
-                height,
-                width,
-                channels
-            );
+            Tensor input = CreateInput(model, batchSize);
 
             // --------------------------------------------------
             // WARMUP RUNS
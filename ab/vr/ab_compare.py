@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Interleaved A/B latency comparison of two artifacts (raw vs optimized, fp32 vs
+fp16, two checkpoints) in one session on the same backend.
+
+Runs alternate between A and B in pairs, each pair in random order, so thermal
+state, background load and clock changes hit both artifacts alike. The paired
+differences d = B - A give the mean difference with a normal confidence
+interval, the same difference relative to A, a two-sided p-value and a verdict:
+    b_faster / b_slower   the interval excludes 0
+    equivalent            the interval lies within +-`min_effect_pct` of A
+    inconclusive          otherwise
+Pairs are added in blocks until the relative interval is at most
+`target_ci_pct` wide or `max_pairs` is reached (as accuracy estimation does,
+see onnx_validator.py).
+
+Runs on host ONNX Runtime; the Unity project stages one model per Editor run.
+
+Usage:
+    python -m ab.vr.ab_compare _work/onnx_temp/AirNet.onnx _work/variants/AirNet/AirNet_op11_bdyn.onnx
+    python -m ab.vr.ab_compare A.onnx B.onnx --target-ci-pct 0.5 --max-pairs 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from statistics import NormalDist, mean, median, stdev
+
+
+DEFAULT_CONFIDENCE = 0.95
+# Stop once the CI on (B - A) / A is at most this wide, in percent
+TARGET_CI_PCT = 1.0
+MIN_PAIRS = 100
+MAX_PAIRS = 2000
+CHECK_EVERY = 50
+MIN_EFFECT_PCT = 1.0
+WARMUP_ITERATIONS = 10
+
+
+def paired_stats(
+    a_ms: list[float],
+    b_ms: list[float],
+    confidence: float = DEFAULT_CONFIDENCE,
+    min_effect_pct: float = MIN_EFFECT_PCT,
+) -> dict:
+    """Mean paired difference B - A with its confidence interval, p-value and verdict."""
+    diffs = [b - a for a, b in zip(a_ms, b_ms)]
+    n = len(diffs)
+    if n < 2:
+        raise ValueError("Need at least two pairs")
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    d_mean = mean(diffs)
+    se = stdev(diffs) / n ** 0.5
+    lo, hi = d_mean - z * se, d_mean + z * se
+    a_mean = mean(a_ms)
+    p_value = 2 * (1 - NormalDist().cdf(abs(d_mean) / se)) if se > 0 else (0.0 if d_mean else 1.0)
+
+    rel_lo, rel_hi = 100.0 * lo / a_mean, 100.0 * hi / a_mean
+    if hi < 0:
+        verdict = "b_faster"
+    elif lo > 0:
+        verdict = "b_slower"
+    elif -min_effect_pct <= rel_lo and rel_hi <= min_effect_pct:
+        verdict = "equivalent"
+    else:
+        verdict = "inconclusive"
+
+    return {
+        "pairs": n,
+        "confidence": confidence,
+        "a_mean_ms": round(a_mean, 4),
+        "b_mean_ms": round(mean(b_ms), 4),
+        "a_median_ms": round(median(a_ms), 4),
+        "b_median_ms": round(median(b_ms), 4),
+        "diff_mean_ms": round(d_mean, 4),
+        "diff_median_ms": round(median(diffs), 4),
+        "diff_ci_ms": [round(lo, 4), round(hi, 4)],
+        "diff_pct": round(100.0 * d_mean / a_mean, 3),
+        "diff_ci_pct": [round(rel_lo, 3), round(rel_hi, 3)],
+        "b_faster_share": round(sum(1 for d in diffs if d < 0) / n, 3),
+        "p_value": round(p_value, 6),
+        "min_effect_pct": min_effect_pct,
+        "verdict": verdict,
+    }
+
+
+def run_ab(
+    a_path: Path,
+    b_path: Path,
+    *,
+    confidence: float = DEFAULT_CONFIDENCE,
+    target_ci_pct: float = TARGET_CI_PCT,
+    min_pairs: int = MIN_PAIRS,
+    max_pairs: int = MAX_PAIRS,
+    min_effect_pct: float = MIN_EFFECT_PCT,
+    providers: list[str] | None = None,
+    seed: int = 0,
+) -> dict:
+    """Interleave A and B on host ONNX Runtime until the relative CI is narrow enough."""
+    from ab.vr.ort_runner import create_session, make_input, resolve_input_shape
+
+    sessions, feeds = [], []
+    for path in (a_path, b_path):
+        session = create_session(path, providers)
+        inp = session.get_inputs()[0]
+        sessions.append(session)
+        feeds.append({inp.name: make_input(resolve_input_shape(inp.shape))})
+    if sessions[0].get_inputs()[0].shape != sessions[1].get_inputs()[0].shape:
+        print("WARNING: A and B take different input shapes; comparing them anyway")
+
+    def timed(i: int) -> float:
+        start = time.perf_counter()
+        sessions[i].run(None, feeds[i])
+        return (time.perf_counter() - start) * 1000.0
+
+    for _ in range(WARMUP_ITERATIONS):
+        timed(0)
+        timed(1)
+
+    rng = random.Random(seed)
+    a_ms, b_ms = [], []
+    stats = None
+    start = time.time()
+    while len(a_ms) < max_pairs:
+        for _ in range(CHECK_EVERY):
+            # Random order within each pair cancels first-runner effects
+            if rng.random() < 0.5:
+                a, b = timed(0), timed(1)
+            else:
+                b, a = timed(1), timed(0)
+            a_ms.append(a)
+            b_ms.append(b)
+        if len(a_ms) < min_pairs:
+            continue
+        stats = paired_stats(a_ms, b_ms, confidence, min_effect_pct)
+        lo, hi = stats["diff_ci_pct"]
+        if hi - lo <= target_ci_pct:
+            break
+    if stats is None or stats["pairs"] != len(a_ms):
+        stats = paired_stats(a_ms, b_ms, confidence, min_effect_pct)
+
+    return {
+        "a": str(a_path),
+        "b": str(b_path),
+        "backend": sessions[0].get_providers()[0],
+        "duration_sec": round(time.time() - start, 2),
+        "target_ci_pct": target_ci_pct,
+        **stats,
+    }
+
+
+def format_report(r: dict) -> list[str]:
+    lo, hi = r["diff_ci_pct"]
+    return [
+        f"A: {Path(r['a']).name}  mean {r['a_mean_ms']:.3f} ms  median {r['a_median_ms']:.3f} ms",
+        f"B: {Path(r['b']).name}  mean {r['b_mean_ms']:.3f} ms  median {r['b_median_ms']:.3f} ms",
+        f"B - A: {r['diff_mean_ms']:+.4f} ms ({r['diff_pct']:+.2f}%), "
+        f"{r['confidence']:.0%} CI [{lo:+.2f}%, {hi:+.2f}%], p = {r['p_value']:.4g}, "
+        f"{r['pairs']} pairs in {r['duration_sec']}s",
+        f"VERDICT: {r['verdict'].upper()}",
+    ]
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Interleaved A/B latency comparison on host ONNX Runtime")
+    ap.add_argument("a", type=Path)
+    ap.add_argument("b", type=Path)
+    ap.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    ap.add_argument("--target-ci-pct", type=float, default=TARGET_CI_PCT,
+                    help="Stop once the CI on (B - A) / A is this narrow, in percent")
+    ap.add_argument("--min-pairs", type=int, default=MIN_PAIRS)
+    ap.add_argument("--max-pairs", type=int, default=MAX_PAIRS)
+    ap.add_argument("--min-effect-pct", type=float, default=MIN_EFFECT_PCT,
+                    help="Differences within +-this percent count as equivalent")
+    ap.add_argument("--json", type=Path, default=None, help="Also write the result here")
+    args = ap.parse_args()
+
+    for p in (args.a, args.b):
+        if not p.exists():
+            raise SystemExit(f"No ONNX file at {p}")
+    result = run_ab(
+        args.a, args.b,
+        confidence=args.confidence,
+        target_ci_pct=args.target_ci_pct,
+        min_pairs=args.min_pairs,
+        max_pairs=args.max_pairs,
+        min_effect_pct=args.min_effect_pct,
+    )
+    print("\n".join(format_report(result)))
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"SAVED: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
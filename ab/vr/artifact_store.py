@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Compressed archive of exported ONNX artifacts under a disk quota.
+
+Instead of deleting an ONNX after benchmarking (`--low-storage`), the pipeline
+archives it: graph and external weights are zstd-compressed into
+_work/archive/objects/, and the least recently used models are evicted once
+the archive exceeds its quota. `restore()` stream-decompresses a model back
+into the staging area (_work/onnx_temp) when a later pass needs it.
+
+Small graphs are mostly protobuf structure (op types, attribute and tensor
+names), which zstd compresses far better with a dictionary. Once enough
+models are archived, a dictionary is trained on the heads of their graph
+files (nodes are serialized before initializers); later entries use it.
+Dictionaries are kept by id, so older entries stay restorable.
+
+Several processes (work queue workers) may share the archive: every update of
+index.json reloads it under an exclusive lock (index.lock).
+
+Usage:
+    python -m ab.vr.artifact_store list
+    python -m ab.vr.artifact_store put _work/onnx_temp/AirNet.onnx
+    python -m ab.vr.artifact_store restore AirNet ResNet
+    python -m ab.vr.artifact_store train
+    python -m ab.vr.artifact_store evict --quota-gb 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+ARCHIVE_DIR = ROOT_DIR / "_work" / "archive"
+ONNX_DIR = ROOT_DIR / "_work" / "onnx_temp"
+
+DEFAULT_QUOTA_GB = 20.0
+LEVEL = 9
+DICT_SIZE = 112 * 1024
+DICT_MIN_SAMPLES = 16
+HEAD_BYTES = 64 * 1024
+SUFFIXES = (".onnx", ".onnx.data")
+LOCK_TIMEOUT_SEC = 600.0
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("The artifact archive needs `pip install zstandard`") from e
+    return zstandard
+
+
+def artifact_files(onnx_path: Path) -> list[Path]:
+    """The graph file and, if present, its external weights file."""
+    onnx_path = Path(onnx_path)
+    return [p for p in (onnx_path, onnx_path.with_suffix(".onnx.data")) if p.exists()]
+
+
+class ArtifactStore:
+    def __init__(self, root: Path = ARCHIVE_DIR, quota_gb: float = DEFAULT_QUOTA_GB):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.dicts = self.root / "dicts"
+        self.index_path = self.root / "index.json"
+        self.quota_bytes = int(quota_gb * 1024 ** 3)
+        self.index = self._load()
+        self._lock_depth = 0
+
+    # ── Index ───────────────────────────────────────────────────────────────
+    def _load(self) -> dict:
+        if not self.index_path.exists():
+            return {"dict_id": None, "entries": {}}
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"dict_id": None, "entries": {}}
+
+    @contextmanager
+    def locked(self):
+        """
+        Exclusive lock across processes (queue workers share the archive) for a
+        read-modify-write of the index, which is reloaded on entry. An SQLite
+        EXCLUSIVE transaction, as WorkQueue.mutex; reentrant within a store.
+        """
+        if self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.root / "index.lock", timeout=LOCK_TIMEOUT_SEC, isolation_level=None)
+        try:
+            conn.execute("BEGIN EXCLUSIVE")
+            self.index = self._load()
+            self._lock_depth = 1
+            try:
+                yield
+            finally:
+                self._lock_depth = 0
+                conn.execute("ROLLBACK")
+        finally:
+            conn.close()
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    @property
+    def entries(self) -> dict:
+        return self.index["entries"]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def names(self) -> list[str]:
+        return sorted(self.entries)
+
+    def used_bytes(self) -> int:
+        return sum(e["stored_bytes"] for e in self.entries.values())
+
+    def size_mb(self, name: str) -> float:
+        """Uncompressed size of a model, as `onnx_size_mb` would report it."""
+        return round(self.entries[name]["size_bytes"] / (1024 * 1024), 2)
+
+    # ── Dictionary ──────────────────────────────────────────────────────────
+    def _dictionary(self, dict_id):
+        if dict_id is None:
+            return None
+        zstd = _zstd()
+        return zstd.ZstdCompressionDict((self.dicts / f"{dict_id}.dict").read_bytes())
+
+    def train(self, extra: list[Path] = ()) -> int | None:
+        """Train a dictionary on graph heads of archived + `extra` models; returns its id."""
+        zstd = _zstd()
+        with self.locked():
+            samples = [Path(p).read_bytes()[:HEAD_BYTES] for p in extra]
+            for name, entry in self.entries.items():
+                dctx = zstd.ZstdDecompressor(dict_data=self._dictionary(entry.get("dict_id")))
+                with open(self.objects / f"{name}.onnx.zst", "rb") as f, dctx.stream_reader(f) as reader:
+                    samples.append(reader.read(HEAD_BYTES))
+            if len(samples) < DICT_MIN_SAMPLES:
+                return None
+            dictionary = zstd.train_dictionary(DICT_SIZE, samples, level=LEVEL)
+            dict_id = dictionary.dict_id()
+            self.dicts.mkdir(parents=True, exist_ok=True)
+            (self.dicts / f"{dict_id}.dict").write_bytes(dictionary.as_bytes())
+            self.index["dict_id"] = dict_id
+            self.save()
+            return dict_id
+
+    # ── Put / restore / evict ───────────────────────────────────────────────
+    def put(self, onnx_path: Path, remove_source: bool = True) -> dict:
+        """Compress a model (graph + weights) into the archive, then enforce the quota."""
+        zstd = _zstd()
+        onnx_path = Path(onnx_path)
+        name = onnx_path.stem
+        files = artifact_files(onnx_path)
+        if not files:
+            raise FileNotFoundError(onnx_path)
+
+        with self.locked():
+            if self.index["dict_id"] is None and len(self.entries) + 1 >= DICT_MIN_SAMPLES:
+                try:
+                    self.train(extra=[onnx_path])
+                except Exception as e:
+                    print(f"WARNING: Could not train archive dictionary: {e}")
+            dict_id = self.index["dict_id"]
+        dictionary = self._dictionary(dict_id)
+
+        # Compression runs unlocked: object files are per model, the index is not touched
+
+        self.objects.mkdir(parents=True, exist_ok=True)
+        size = stored = 0
+        for src in files:
+            # The weights file is raw tensors; the dictionary only helps the graph
+            cctx = zstd.ZstdCompressor(
+                level=LEVEL, write_checksum=True, threads=-1,
+                dict_data=dictionary if src.suffix == ".onnx" else None,
+            )
+            dest = self.objects / f"{src.name}.zst"
+            tmp = dest.with_suffix(".tmp")
+            with open(src, "rb") as fin, open(tmp, "wb") as fout:
+                cctx.copy_stream(fin, fout)
+            os.replace(tmp, dest)
+            size += src.stat().st_size
+            stored += dest.stat().st_size
+
+        entry = {
+            "files": [f.name for f in files],
+            "size_bytes": size,
+            "stored_bytes": stored,
+            "dict_id": dict_id,
+            "archived_at": time.time(),
+            "last_used": time.time(),
+        }
+        with self.locked():
+            self.entries[name] = entry
+            self.evict(keep=name)
+            self.save()
+        if remove_source:
+            for f in files:
+                f.unlink()
+        return entry
+
+    def restore(self, name: str, dest_dir: Path = ONNX_DIR) -> Path:
+        """Stream-decompress `name` into `dest_dir`; returns the .onnx path."""
+        zstd = _zstd()
+        # Mark it used first, so a concurrent eviction picks other entries
+        with self.locked():
+            entry = self.entries[name]
+            entry["last_used"] = time.time()
+            self.save()
+        dest_dir = Path(dest_dir)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        for file_name in entry["files"]:
+            dictionary = self._dictionary(entry["dict_id"]) if file_name.endswith(".onnx") else None
+            dctx = zstd.ZstdDecompressor(dict_data=dictionary)
+            dest = dest_dir / file_name
+            tmp = dest.with_name(dest.name + ".tmp")
+            with open(self.objects / f"{file_name}.zst", "rb") as fin, open(tmp, "wb") as fout:
+                dctx.copy_stream(fin, fout)
+            os.replace(tmp, dest)
+        return dest_dir / f"{name}.onnx"
+
+    def remove(self, name: str) -> None:
+        """Drop an entry and its objects; call under `locked()` and save afterwards."""
+        entry = self.entries.pop(name)
+        for file_name in entry["files"]:
+            (self.objects / f"{file_name}.zst").unlink(missing_ok=True)
+
+    def evict(self, keep: str | None = None) -> list[str]:
+        """Drop least recently used entries until the archive fits its quota."""
+        evicted = []
+        with self.locked():
+            by_age = sorted((e["last_used"], n) for n, e in self.entries.items() if n != keep)
+            for _, name in by_age:
+                if self.used_bytes() <= self.quota_bytes:
+                    break
+                self.remove(name)
+                evicted.append(name)
+            if evicted:
+                print(f"ARCHIVE: evicted {len(evicted)} model(s) over the {self.quota_bytes / 1024 ** 3:.1f} GB quota")
+                self.save()
+        return evicted
+
+
+def archive_or_delete(onnx_path: Path, quota_gb: float | None) -> str:
+    """
+    Low-storage cleanup: archive the model when `quota_gb` is set, else (or if
+    archiving fails) delete it as before. Returns "archived" or "deleted".
+    """
+    if quota_gb is not None:
+        try:
+            ArtifactStore(quota_gb=quota_gb).put(onnx_path)
+            return "archived"
+        except Exception as e:
+            print(f"WARNING: Could not archive {Path(onnx_path).name}, deleting it: {e}")
+    for f in artifact_files(onnx_path):
+        f.unlink(missing_ok=True)
+    return "deleted"
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Compressed ONNX artifact archive")
+    ap.add_argument("cmd", choices=["list", "put", "restore", "train", "evict"])
+    ap.add_argument("items", nargs="*", help="ONNX paths (put) or model names (restore)")
+    ap.add_argument("--quota-gb", type=float, default=DEFAULT_QUOTA_GB)
+    ap.add_argument("--dest", type=Path, default=ONNX_DIR, help="restore target directory")
+    ap.add_argument("--keep", action="store_true", help="put: keep the source files")
+    args = ap.parse_args()
+
+    store = ArtifactStore(quota_gb=args.quota_gb)
+    if args.cmd == "list":
+        print(f"{'model':<40}{'size MB':>10}{'stored MB':>11}{'ratio':>7}  last used")
+        for name in store.names():
+            e = store.entries[name]
+            print(
+                f"{name:<40}{e['size_bytes'] / 2 ** 20:>10.1f}{e['stored_bytes'] / 2 ** 20:>11.1f}"
+                f"{e['size_bytes'] / max(e['stored_bytes'], 1):>7.2f}  "
+                f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(e['last_used']))}"
+            )
+        print(f"\n{len(store.entries)} model(s), {store.used_bytes() / 2 ** 30:.2f} / "
+              f"{args.quota_gb:.1f} GB, dictionary {store.index['dict_id']}")
+    elif args.cmd == "put":
+        for path in args.items:
+            e = store.put(Path(path), remove_source=not args.keep)
+            print(f"ARCHIVED: {Path(path).stem} {e['size_bytes'] / 2 ** 20:.1f} -> {e['stored_bytes'] / 2 ** 20:.1f} MB")
+    elif args.cmd == "restore":
+        for name in args.items or store.names():
+            if name not in store:
+                print(f"NOT ARCHIVED: {name}")
+                continue
+            print(f"RESTORED: {store.restore(name, args.dest)}")
+    elif args.cmd == "train":
+        dict_id = store.train()
+        print(f"DICTIONARY: {dict_id}" if dict_id else f"Need at least {DICT_MIN_SAMPLES} archived models")
+    else:
+        store.evict()
+
+
+if __name__ == "__main__":
+    main()
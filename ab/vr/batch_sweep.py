@@ -0,0 +1,94 @@
+"""Batch-size throughput sweep over the exported dynamic batch axis."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from ab.vr.ort_runner import run_ort_benchmark
+
+
+DEFAULT_BATCH_SIZES = (1, 2, 4, 8, 16)
+
+
+def parse_batch_sizes(spec: str | None) -> list[int]:
+    """'1,2,4' -> [1, 2, 4]; empty/None -> DEFAULT_BATCH_SIZES."""
+    if not spec:
+        return list(DEFAULT_BATCH_SIZES)
+    sizes = sorted({int(s) for s in spec.split(",") if s.strip()})
+    if any(b <= 0 for b in sizes):
+        raise ValueError(f"Batch sizes must be positive: {spec!r}")
+    return sizes
+
+
+def fixed_batch_size(onnx_path: Path) -> int | None:
+    """
+    Return the batch size baked into the graph input, or None if the batch
+    axis is dynamic (dim_param, or an unset dim).
+    """
+    import onnx
+
+    model = onnx.load(str(onnx_path), load_external_data=False)
+    dims = model.graph.input[0].type.tensor_type.shape.dim
+    if not dims:
+        return None
+    d0 = dims[0]
+    if d0.HasField("dim_value") and d0.dim_value > 0:
+        return int(d0.dim_value)
+    return None
+
+
+def throughput_point(batch_size: int, timing: dict) -> dict:
+    avg_ms = timing.get("avg_ms", 0) or 0
+    return {
+        "batch_size": batch_size,
+        "avg_ms": avg_ms,
+        "min_ms": timing.get("min_ms", 0),
+        "max_ms": timing.get("max_ms", 0),
+        "std_dev_ms": timing.get("std_dev_ms", 0),
+        "images_per_sec": round(batch_size * 1000.0 / avg_ms, 3) if avg_ms > 0 else 0.0,
+    }
+
+
+def sweep_batch_sizes(onnx_path: Path, batch_sizes) -> tuple[bool, list[int]]:
+    """
+    Decide which batch sizes a graph can actually be run at.
+    Returns (batch_dynamic, sizes).
+    """
+    fixed = fixed_batch_size(onnx_path)
+    if fixed is not None:
+        return False, [fixed]
+    return True, sorted(set(int(b) for b in batch_sizes))
+
+
+def run_ort_batch_sweep(onnx_path: Path, batch_sizes) -> list[dict]:
+    """
+    Measure ONNX Runtime latency + images/second at each batch size.
+    Stops at the first failing size (typically OOM or a reshape with a
+    hardcoded batch) and records the error on that point.
+    """
+    curve = []
+    for b in batch_sizes:
+        try:
+            res = run_ort_benchmark(onnx_path, batch_size=b)
+            curve.append(throughput_point(b, res["timing"]))
+        except Exception as e:
+            curve.append({"batch_size": b, "error": str(e)[:300]})
+            break
+    return curve
+
+
+def unity_throughput_curves(unity_result: dict) -> dict:
+    """Convert Unity's flat `batch_sweep` list into per-backend curves."""
+    curves: dict = {}
+    for entry in unity_result.get("batch_sweep", []) or []:
+        backend = (entry.get("backend") or "unknown").lower()
+        key = f"unity_{backend}"
+        if entry.get("error"):
+            curves.setdefault(key, []).append(
+                {"batch_size": entry.get("batch_size", 0), "error": entry["error"]}
+            )
+            continue
+        curves.setdefault(key, []).append(
+            throughput_point(entry.get("batch_size", 0), entry.get("timing", {}) or {})
+        )
+    return curves
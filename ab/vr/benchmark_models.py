@@ -2,14 +2,41 @@ import time
 import platform
 from pathlib import Path
 import json
-
-import psutil
-
+from functools import lru_cache
+
+from ab.vr import metrics, tracing
+from ab.vr.artifact_store import ArtifactStore, artifact_files
+from ab.vr.batch_sweep import (
+    run_ort_batch_sweep,
+    sweep_batch_sizes,
+    unity_throughput_curves,
+)
+from ab.vr.cadence import CADENCE_SEC, run_ort_cadence, unity_cadence, unity_cadence_seconds
+from ab.vr.cold_start import ort_cold_start, unity_cold_start
+from ab.vr.cost_model import (
+    SKIP_FAILURE_TYPE,
+    CostModel,
+    defer_likely_failures,
+    exceeds_frame_budget,
+    load_device_records,
+)
+from ab.vr.graph_profiler import achieved_gflops, profile_graph, profile_summary
+from ab.vr.graph_fingerprint import cached_fingerprint, load_index, save_index
+from ab.vr.op_profiler import PROFILE_ITERATIONS, ort_op_profile, unity_op_profiles
+from ab.vr.retry_policy import RetryPolicy, classify_failure, policy_path
+from ab.vr.scheduler import CostEstimator, TimeBudget, order_models
+from ab.vr.timeouts import TimeoutPolicy
 from ab.vr.unity_runner import (
+    CONFIG_PREFIX,
+    OUTPUT_ROOT,
+    STUDY_FIELDS,
+    device_result_filename,
     get_device_type,
     is_model_benchmarked,
+    load_model_record,
     run_unity_benchmark,
     save_model_record,
+    update_model_record,
 )
 
 
@@ -19,61 +46,161 @@ from ab.vr.unity_runner import (
 
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 ONNX_DIR = ROOT_DIR / "_work" / "onnx_temp"
+FINGERPRINT_INDEX = ROOT_DIR / "_work" / "fingerprints.json"
 
 
 # --------------------------------------------------
 # SYSTEM INFO
 # --------------------------------------------------
 
-DEVICE_TYPE = get_device_type()
-
-OS_VERSION = platform.platform()
-
-PYTHON_VERSION = platform.python_version()
-
-TOTAL_RAM_KB = int(
-    psutil.virtual_memory().total / 1024
-)
-
-FREE_RAM_KB = int(
-    psutil.virtual_memory().free / 1024
-)
-
-AVAILABLE_RAM_KB = int(
-    psutil.virtual_memory().available / 1024
-)
+@lru_cache(maxsize=None)
+def host_info() -> dict:
+    """
+    Host description stored in every record, queried once on first use
+    (not at import: get_device_type() may shell out to PowerShell).
+    """
+    import psutil
 
-CPU_CORES = psutil.cpu_count(logical=True)
+    memory = psutil.virtual_memory()
+    return {
+        "device_type": get_device_type(),
+        "os_version": platform.platform(),
+        "python_version": platform.python_version(),
+        "total_ram_kb": int(memory.total / 1024),
+        "free_ram_kb": int(memory.free / 1024),
+        "available_ram_kb": int(memory.available / 1024),
+        "cpu_cores": psutil.cpu_count(logical=True),
+        "cpu_name": platform.processor(),
+    }
 
-CPU_NAME = platform.processor()
 
 UNITY_VERSION = "2022.3.62f3"
 
 ITERATIONS = 20
 
-def classify_failure(error: str):
+def load_accuracies() -> dict:
+    """model -> ONNX accuracy from all_models.json (written by process_models)."""
+    path = OUTPUT_ROOT / "all_models.json"
+    if not path.exists():
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {k: (v or {}).get("accuracy", 0.0) for k, v in json.load(f).items()}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def onnx_size_mb(onnx_path: Path) -> float:
+    """Size of the graph file plus its external weights file, if any."""
+    size = onnx_path.stat().st_size
+    data_file = onnx_path.with_suffix(".onnx.data")
+    if data_file.exists():
+        size += data_file.stat().st_size
+    return round(size / (1024 * 1024), 2)
+
+# --------------------------------------------------
+# STRUCTURAL TWINS
+# --------------------------------------------------
+
+DEDUP_POLICIES = ("off", "reuse", "defer")
+# Per-model measurements that are not copied to a structural twin, besides STUDY_FIELDS
+TWIN_EXCLUDED_FIELDS = ("cold_start", "cadence")
 
-    error = error.lower()
 
-    if "3221225477" in error:
-        return "unity_native_crash"
+def measured_twins(fingerprints: dict, device_type: str) -> dict:
+    """
+    fingerprint -> model_name for every model with a valid, actually
+    measured (not twin-copied) record on this device.
+    """
+    twins = {}
+    pattern = f"{CONFIG_PREFIX}_*/{device_result_filename(device_type)}"
+    for path in sorted(OUTPUT_ROOT.glob(pattern)):
+        try:
+            with open(path, encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if record.get("valid") is not True:
+            continue
+        if record.get("timing_source") == "structural_twin":
+            continue
+        name = record.get("model_name")
+        fp = record.get("graph_fingerprint") or fingerprints.get(name)
+        if fp:
+            twins.setdefault(fp, name)
+    return twins
+
+
+def twin_record(model_name: str, onnx_path: Path, twin_name: str, fingerprint: str) -> dict | None:
+    """Copy timings from an already-benchmarked structural twin."""
+    source = load_model_record(twin_name, get_device_type())
+    if not source or source.get("valid") is not True:
+        return None
+    # Per-model studies (bundles, curves, cold starts, cadence) were not run on the twin
+    skip = {*STUDY_FIELDS, *TWIN_EXCLUDED_FIELDS}
+    record = {k: v for k, v in source.items() if k not in skip}
+    record.update({
+        "model_name": model_name,
+        "model_size_mb": onnx_size_mb(onnx_path),
+        "graph_fingerprint": fingerprint,
+        "timing_source": "structural_twin",
+        "timing_twin": twin_name,
+    })
+    return record
+
+
+def drop_restored(onnx_path: Path) -> None:
+    """Remove a model restored from the archive; the archive still holds it."""
+    for f in artifact_files(onnx_path):
+        f.unlink(missing_ok=True)
 
-    if "timeout" in error:
-        return "timeout"
 
-    if "no unity results json found" in error:
-        return "missing_results"
+# --------------------------------------------------
+# THROUGHPUT STUDY
+# --------------------------------------------------
 
-    if "unsupported" in error:
-        return "unsupported_operator"
+def run_throughput_study(onnx_path: Path, batch_sizes, timeout_sec: float) -> dict:
+    """
+    Batch sweep alone for a model that already has a record (Unity CPU/GPU
+    and host ONNX Runtime); the curves are merged into that record.
+    """
+    model_name = onnx_path.stem
+    batch_dynamic, sizes = sweep_batch_sizes(onnx_path, batch_sizes)
+    if not batch_dynamic:
+        print(f"BATCH AXIS IS FIXED ({sizes[0]}); SWEEP LIMITED TO IT")
+    result = run_unity_benchmark(onnx_path, batch_sizes=sizes, timeout_sec=timeout_sec)
+    if not result.get("success", False):
+        raise RuntimeError(result.get("error", "Unity benchmark failed"))
+    curve = unity_throughput_curves(result)
+    try:
+        with tracing.span("ort_batch_sweep", model=model_name):
+            curve["ort_cpu"] = run_ort_batch_sweep(onnx_path, sizes)
+    except Exception as e:
+        print(f"WARNING: ONNX Runtime sweep failed: {e}")
+    update_model_record(model_name, {"batch_dynamic": batch_dynamic, "throughput_curve": curve})
+    return curve
 
-    return "unknown"
 
 # --------------------------------------------------
 # CORE FUNCTION
 # --------------------------------------------------
 
-def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
+def run_benchmarks(
+    onnx_dir: Path = ONNX_DIR,
+    models: list[str] = None,
+    batch_sizes: list[int] = None,
+    dedup: str = "off",
+    frame_budget_hz: float = None,
+    schedule: str = "alphabetical",
+    time_budget_sec: float = None,
+    timeout_overrides: dict = None,
+    op_profile: bool = False,
+    archive_quota_gb: float = None,
+    cold_start_trials: int = 0,
+    cadence_rates: list[float] = None,
+    cadence_sec: float = CADENCE_SEC,
+    plan_metrics: bool = True,
+):
     """
     Iterate over all ONNX files in onnx_dir, run each through Unity
     Barracuda batchmode, and persist one JSON per model under
@@ -81,11 +208,73 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
 
     Already-benchmarked models (valid=True) are skipped automatically,
     so this function is safe to call repeatedly for resume behaviour.
+
+    If `batch_sizes` is given, a throughput sweep is also run (Unity CPU/GPU
+    and host ONNX Runtime) and stored under "throughput_curve".
+    Already-benchmarked models without a "throughput_curve" then get the
+    sweep alone, merged into their record (run_throughput_study).
+
+    `dedup` controls structural twins (graphs identical up to weight values):
+        off    benchmark every model (default)
+        reuse  copy timings from an already-measured twin instead of running Unity
+        defer  benchmark every model, but structural duplicates go last
+    Every record stores its "graph_fingerprint" and "timing_source"
+    ("measured" or "structural_twin" + "timing_twin").
+
+    If `frame_budget_hz` is set and a cost model has been fitted for this
+    device (see cost_model.py), models whose optimistic predicted latency
+    already misses a frame at that rate are skipped; their record is invalid
+    with failure_type "predicted_over_budget", the prediction and the budget,
+    and they are predicted again on every run. Models predicted likely to fail
+    are benchmarked last.
+
+    `schedule` orders the work (see scheduler.POLICIES) by estimated cost:
+    historical benchmark_duration_sec on this device, else a size-based fit.
+    With `time_budget_sec`, models whose estimate no longer fits in the
+    remaining time are deferred to a later run.
+
+    The Unity timeout is computed per model (timeouts.TimeoutPolicy) from
+    its own / its peers' benchmark_duration_sec and ONNX size;
+    `timeout_overrides` may set default/multiplier/floor/ceiling. A run that
+    times out is retried once with a larger budget.
+
+    With `op_profile`, per-operator times (ONNX Runtime profiler and Unity
+    per-layer timings) are stored under "op_profile"; see op_profiler.py.
+
+    With `cold_start_trials`, model load, session / worker creation, first
+    and warm inference are measured per backend (Unity CPU/GPU in the Editor,
+    ONNX Runtime in fresh processes) and stored under "cold_start"; see
+    cold_start.py.
+
+    With `cadence_rates`, the model also runs once per frame at each rate for
+    `cadence_sec` (Unity CPU/GPU and ONNX Runtime); deadline misses, jitter
+    and p99 against the frame budget are stored under "cadence"; see cadence.py.
+
+    With `archive_quota_gb`, models kept only in the compressed archive
+    (artifact_store.py) are benchmarked too: each is restored into onnx_dir
+    just before its run and removed again afterwards.
+
+    `plan_metrics=False` leaves the metrics plan of the benchmark stage to the
+    caller (process_models plans it once, then benchmarks one model per call).
     """
+    if dedup not in DEDUP_POLICIES:
+        raise ValueError(f"dedup must be one of {DEDUP_POLICIES}, got {dedup!r}")
 
     benchmark_results = {}
+    host = host_info()
+    device_type = host["device_type"]
 
     onnx_files = sorted(onnx_dir.glob("*.onnx"))
+
+    archive = None
+    if archive_quota_gb is not None:
+        archive = ArtifactStore(quota_gb=archive_quota_gb)
+        present = {f.stem for f in onnx_files}
+        archived = [onnx_dir / f"{n}.onnx" for n in archive.names() if n not in present]
+        onnx_files = sorted(onnx_files + archived)
+        if archived:
+            print(f"ARCHIVED: {len(archived)} more model(s) restored on demand")
+
     if models:
         models_set = set(models)
         onnx_files = [f for f in onnx_files if f.stem in models_set]
@@ -94,27 +283,259 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
 
     print(f"FOUND {len(onnx_files)} ONNX MODELS")
 
+    # --------------------------------------------------
+    # SCHEDULING
+    # --------------------------------------------------
+
+    retry_policy = RetryPolicy(policy_path("benchmark", device_type))
+
+    history = {
+        r.get("model_name"): r.get("benchmark_duration_sec")
+        for r in load_device_records(device_type)
+        if r.get("benchmark_duration_sec")
+    }
+    sizes = {f.stem: onnx_size_mb(f) if f.exists() else archive.size_mb(f.stem) for f in onnx_files}
+    timeout_policy = TimeoutPolicy("benchmark", history, sizes, **(timeout_overrides or {}))
+
+    budget = TimeBudget(time_budget_sec)
+    estimator = None
+    if schedule != "alphabetical" or budget.enabled:
+        estimator = CostEstimator(history, sizes)
+        costs = {f.stem: estimator.estimate(f.stem) for f in onnx_files}
+        by_name = {f.stem: f for f in onnx_files}
+        onnx_files = [
+            by_name[n] for n in order_models(list(by_name), schedule, costs, load_accuracies())
+        ]
+
+    cost_model = None
+    if frame_budget_hz:
+        cost_model = CostModel.load(device_type)
+        if cost_model is None:
+            print(f"WARNING: No cost model for {device_type}; --skip-over-budget disabled")
+
+    fingerprints = {}
+    twins = {}
+    if dedup != "off":
+        index = load_index(FINGERPRINT_INDEX)
+        for f in onnx_files:
+            try:
+                if not f.exists() and f.stem in index:
+                    # Archived: the index entry is from when it was on disk
+                    fingerprints[f.stem] = index[f.stem]["fingerprint"]
+                    continue
+                fingerprints[f.stem] = cached_fingerprint(f, index)
+            except Exception as e:
+                print(f"WARNING: Could not fingerprint {f.name}: {e}")
+        save_index(FINGERPRINT_INDEX, index)
+        twins = measured_twins(fingerprints, device_type)
+        print(f"STRUCTURES: {len(set(fingerprints.values()))} unique among {len(fingerprints)} models")
+
+        if dedup == "defer":
+            seen = set(twins)
+            first, later = [], []
+            for f in onnx_files:
+                fp = fingerprints.get(f.stem)
+                if fp is not None and fp in seen:
+                    later.append(f)
+                else:
+                    first.append(f)
+                    if fp is not None:
+                        seen.add(fp)
+            onnx_files = first + later
+
+    predictions = {}
+    if cost_model is not None:
+        for f in onnx_files:
+            if not f.exists():
+                continue  # archived: predicted once restored
+            try:
+                predictions[f.stem] = cost_model.predict_onnx(f)
+            except Exception as e:
+                print(f"WARNING: Cost prediction failed for {f.stem}: {e}")
+        by_name = {f.stem: f for f in onnx_files}
+        order, likely = defer_likely_failures(list(by_name), predictions)
+        onnx_files = [by_name[n] for n in order]
+        if likely:
+            print(f"PREDICTED FAILURES: {len(likely)} model(s) moved to the end")
+
+    if plan_metrics:
+        metrics.plan("benchmark", len(onnx_files))
+
+    restored = None
+
     for onnx_path in onnx_files:
 
         model_name = onnx_path.stem
 
+        if restored is not None:
+            drop_restored(restored)
+            restored = None
+
         # --------------------------------------------------
         # SKIP ALREADY BENCHMARKED
         # --------------------------------------------------
 
-        if is_model_benchmarked(model_name, device_type=DEVICE_TYPE):
-            print(f"SKIPPING {model_name} (already benchmarked)")
+        # A measured model without a throughput curve only gets the sweep
+        sweep_only = False
+        if is_model_benchmarked(model_name, device_type=device_type):
+            record = load_model_record(model_name, device_type) or {}
+            if not batch_sizes or "throughput_curve" in record:
+                print(f"SKIPPING {model_name} (already benchmarked)")
+                metrics.finished("benchmark", "skipped")
+                continue
+            sweep_only = True
+
+        allowed, reason = retry_policy.should_attempt(model_name)
+        if not allowed:
+            print(f"SKIPPING {model_name} ({reason})")
+            metrics.finished("benchmark", "skipped")
+            continue
+
+        if budget.enabled:
+            if budget.expired():
+                print("TIME BUDGET EXHAUSTED")
+                break
+            estimate = estimator.estimate(model_name)
+            if not budget.fits(estimate):
+                print(
+                    f"DEFERRING {model_name} (est. {estimate:.0f}s > "
+                    f"{budget.remaining():.0f}s left)"
+                )
+                metrics.finished("benchmark", "deferred")
+                continue
+
+        if not onnx_path.exists():
+            try:
+                with tracing.span("archive_restore", model=model_name):
+                    restored = archive.restore(model_name, onnx_dir)
+            except Exception as e:
+                print(f"SKIPPING {model_name} (could not restore from archive: {e})")
+                metrics.finished("benchmark", "skipped")
+                continue
+
+        # A sweep-only model already has real timings; never replace them with a prediction
+        if cost_model is not None and not sweep_only:
+            try:
+                prediction = predictions.get(model_name) or cost_model.predict_onnx(onnx_path)
+                if exceeds_frame_budget(prediction, frame_budget_hz):
+                    print(
+                        f"SKIPPING {model_name} (predicted {prediction['latency_ms']:.1f} ms "
+                        f"> {1000.0 / frame_budget_hz:.1f} ms frame budget)"
+                    )
+                    # Invalid record: the decision stays visible and is revisited on every run
+                    record = {
+                        "model_name": model_name,
+                        "device_type": device_type,
+                        "os_version": host["os_version"],
+                        "valid": False,
+                        "runtime": "Barracuda",
+                        "model_format": "onnx",
+                        "failure_type": SKIP_FAILURE_TYPE,
+                        "predicted": {k: round(v, 4) if v is not None else None for k, v in prediction.items()},
+                        "frame_budget_hz": frame_budget_hz,
+                        "frame_budget_ms": round(1000.0 / frame_budget_hz, 3),
+                        "device_analytics": {
+                            "timestamp": time.time()
+                        }
+                    }
+                    print(f"SAVED: {save_model_record(record)}")
+                    benchmark_results[model_name] = record
+                    metrics.finished("benchmark", "skipped")
+                    continue
+            except Exception as e:
+                print(f"WARNING: Cost prediction failed for {model_name}: {e}")
+
+        if sweep_only:
+            print(f"BATCH SWEEP: {model_name} (already benchmarked, no throughput curve)")
+            try:
+                with tracing.span("batch_sweep_study", model=model_name):
+                    run_throughput_study(
+                        onnx_path, batch_sizes,
+                        timeout_policy.timeout_for(model_name, scale=1 + len(batch_sizes)),
+                    )
+                retry_policy.record_success(model_name)
+                retry_policy.save()
+                print(f"SAVED: throughput_curve for {model_name}")
+                metrics.finished("benchmark", "done")
+            except Exception as e:
+                # Same backoff / quarantine as a failed benchmark, so a sweep that always
+                # fails does not relaunch Unity on every run
+                failure_type = classify_failure(str(e))
+                decision = retry_policy.record_failure(model_name, failure_type, str(e))
+                retry_policy.save()
+                print(f"WARNING: Batch sweep failed for {model_name}: {e}")
+                print(f"FAILURE CLASS: {failure_type} -> {decision}")
+                metrics.finished("benchmark", "failed", failure_type)
             continue
 
+        fingerprint = fingerprints.get(model_name)
+
+        if dedup == "reuse" and fingerprint in twins:
+            record = twin_record(model_name, onnx_path, twins[fingerprint], fingerprint)
+            if record is not None:
+                out_path = save_model_record(record)
+                benchmark_results[model_name] = record
+                retry_policy.record_success(model_name)
+                retry_policy.save()
+                print(f"REUSED: {model_name} <- structural twin {twins[fingerprint]}")
+                print(f"SAVED: {out_path}")
+                metrics.finished("benchmark", "done")
+                continue
+
         print("\n" + "=" * 60)
         print(f"BENCHMARKING: {model_name}")
         print("=" * 60)
 
+        model_start = time.time()
+
+        graph_profile = None
+        try:
+            with tracing.span("graph_profile", model=model_name):
+                graph_profile = profile_summary(profile_graph(onnx_path))
+        except Exception as e:
+            print(f"WARNING: Could not profile graph: {e}")
+
         try:
 
             benchmark_start = time.time()
 
-            result = run_unity_benchmark(onnx_path)
+            sweep_sizes = None
+            batch_dynamic = None
+            if batch_sizes:
+                batch_dynamic, sweep_sizes = sweep_batch_sizes(onnx_path, batch_sizes)
+                if not batch_dynamic:
+                    print(f"BATCH AXIS IS FIXED ({sweep_sizes[0]}); SWEEP LIMITED TO IT")
+
+            # A sweep runs the model once per batch size and backend on top of the base run;
+            # a layer profile costs about one more base run
+            layer_iterations = PROFILE_ITERATIONS if op_profile else 0
+            timeout_sec = timeout_policy.timeout_for(
+                model_name,
+                scale=1 + len(sweep_sizes or []) + (1 if op_profile else 0) + (1 if cold_start_trials else 0),
+            )
+            if cadence_rates:
+                # Fixed wall time, independent of the model
+                timeout_sec += unity_cadence_seconds(cadence_rates, cadence_sec)
+            try:
+                result = run_unity_benchmark(
+                    onnx_path, batch_sizes=sweep_sizes, timeout_sec=timeout_sec,
+                    layer_profile_iterations=layer_iterations,
+                    cold_start_trials=cold_start_trials,
+                    cadence_rates=cadence_rates,
+                    cadence_sec=cadence_sec,
+                )
+            except Exception as e:
+                if classify_failure(str(e)) != "timeout":
+                    raise
+                timeout_sec = timeout_policy.retry_timeout(timeout_sec)
+                print(f"TIMEOUT; RETRYING ONCE WITH {timeout_sec:.0f}s")
+                result = run_unity_benchmark(
+                    onnx_path, batch_sizes=sweep_sizes, timeout_sec=timeout_sec,
+                    layer_profile_iterations=layer_iterations,
+                    cold_start_trials=cold_start_trials,
+                    cadence_rates=cadence_rates,
+                    cadence_sec=cadence_sec,
+                )
             print("\nRAW UNITY RESULT:")
             print(json.dumps(result, indent=2))
 
@@ -132,10 +553,7 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
             # MODEL SIZE
             # --------------------------------------------------
 
-            model_size_mb = round(
-                onnx_path.stat().st_size / (1024 * 1024),
-                2
-            )
+            model_size_mb = onnx_size_mb(onnx_path)
 
             # --------------------------------------------------
             # TIMING CONVERSION
@@ -181,6 +599,58 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
             while len(output_shape) < 4:
                 output_shape.append(0)
 
+            # --------------------------------------------------
+            # THROUGHPUT SWEEP
+            # --------------------------------------------------
+
+            throughput_curve = None
+            if sweep_sizes:
+                throughput_curve = unity_throughput_curves(result)
+                try:
+                    with tracing.span("ort_batch_sweep", model=model_name):
+                        throughput_curve["ort_cpu"] = run_ort_batch_sweep(onnx_path, sweep_sizes)
+                except Exception as e:
+                    print(f"WARNING: ONNX Runtime sweep failed: {e}")
+
+            # --------------------------------------------------
+            # PER-OPERATOR PROFILE
+            # --------------------------------------------------
+
+            op_profiles = None
+            if op_profile:
+                op_profiles = unity_op_profiles(result)
+                try:
+                    with tracing.span("ort_op_profile", model=model_name):
+                        op_profiles["ort_cpu"] = ort_op_profile(onnx_path)
+                except Exception as e:
+                    print(f"WARNING: ONNX Runtime op profile failed: {e}")
+
+            # --------------------------------------------------
+            # COLD START
+            # --------------------------------------------------
+
+            cold_start = None
+            if cold_start_trials:
+                cold_start = unity_cold_start(result)
+                try:
+                    with tracing.span("ort_cold_start", model=model_name, trials=cold_start_trials):
+                        cold_start["ort_cpu"] = ort_cold_start(onnx_path, cold_start_trials)
+                except Exception as e:
+                    print(f"WARNING: ONNX Runtime cold start failed: {e}")
+
+            # --------------------------------------------------
+            # FRAME CADENCE
+            # --------------------------------------------------
+
+            cadence = None
+            if cadence_rates:
+                cadence = unity_cadence(result)
+                try:
+                    with tracing.span("ort_cadence", model=model_name):
+                        cadence["ort_cpu"] = run_ort_cadence(onnx_path, cadence_rates, cadence_sec)
+                except Exception as e:
+                    print(f"WARNING: ONNX Runtime cadence run failed: {e}")
+
             # --------------------------------------------------
             # SAVE SUCCESS RESULT
             # --------------------------------------------------
@@ -189,11 +659,11 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
 
                 "model_name": model_name,
 
-                "device_type": DEVICE_TYPE,
+                "device_type": device_type,
 
-                "os_version": OS_VERSION,
+                "os_version": host["os_version"],
 
-                "python_version": PYTHON_VERSION,
+                "python_version": host["python_version"],
 
                 "valid": True,
 
@@ -225,9 +695,9 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
                 "npu_backend": "unsupported",
 
                 # Memory
-                "total_ram_kb": TOTAL_RAM_KB,
-                "free_ram_kb": FREE_RAM_KB,
-                "available_ram_kb": AVAILABLE_RAM_KB,
+                "total_ram_kb": host["total_ram_kb"],
+                "free_ram_kb": host["free_ram_kb"],
+                "available_ram_kb": host["available_ram_kb"],
                 "cached_kb": 0,
 
                 # Input dimensions
@@ -249,12 +719,20 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
                 "backend": result.get("backend", "ComputePrecompiled"),
                 "unity_version": UNITY_VERSION,
                 "benchmark_duration_sec": benchmark_duration_sec,
+                # Editor-side split of the Unity run (startup, asset import, inference, ...)
+                "unity_phases_ms": result.get("phases"),
+                "timeout_sec": timeout_sec,
+
+                # Static cost (graph_profiler) and achieved throughput
+                "graph_profile": graph_profile,
+                "cpu_gflops_per_sec": achieved_gflops((graph_profile or {}).get("flops", 0), cpu_avg_ms),
+                "gpu_gflops_per_sec": achieved_gflops((graph_profile or {}).get("flops", 0), gpu_avg_ms),
 
                 "device_analytics": {
                     "timestamp": time.time(),
                     "cpu_info": {
-                        "cpu_cores": CPU_CORES,
-                        "processor": CPU_NAME
+                        "cpu_cores": host["cpu_cores"],
+                        "processor": host["cpu_name"]
                     },
                     "gpu_info": {
                         "gpu_name": result.get("gpu_name", ""),
@@ -262,34 +740,64 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
                     },
                     "memory_info": {
                         "total_ram_gb": round(
-                            TOTAL_RAM_KB / (1024 * 1024),
+                            host["total_ram_kb"] / (1024 * 1024),
                             2
                         )
                     }
                 }
             }
 
+            record["timing_source"] = "measured"
+            if fingerprint:
+                record["graph_fingerprint"] = fingerprint
+                twins.setdefault(fingerprint, model_name)
+
+            if throughput_curve is not None:
+                record["batch_dynamic"] = batch_dynamic
+                record["throughput_curve"] = throughput_curve
+
+            if op_profiles:
+                record["op_profile"] = op_profiles
+
+            if cold_start:
+                record["cold_start"] = cold_start
+
+            if cadence:
+                record["cadence"] = cadence
+
             out_path = save_model_record(record)
             benchmark_results[model_name] = record
+            retry_policy.record_success(model_name)
+            retry_policy.save()
             print(f"SUCCESS: {model_name}")
             print(f"SAVED: {out_path}")
+            metrics.finished("benchmark", "done")
 
         except Exception as e:
 
             print(f"FAILED: {model_name}")
             print(str(e))
 
+            failure_type = classify_failure(str(e))
+            decision = retry_policy.record_failure(model_name, failure_type, str(e))
+            retry_policy.save()
+            print(f"FAILURE CLASS: {failure_type} -> {decision}")
+            metrics.finished("benchmark", "failed", failure_type)
+
             record = {
 
                 "model_name": model_name,
-                "device_type": DEVICE_TYPE,
-                "os_version": OS_VERSION,
+                "device_type": device_type,
+                "os_version": host["os_version"],
                 "valid": False,
                 "emulator": False,
                 "runtime": "Barracuda",
                 "model_format": "onnx",
                 "error": str(e),
-                "failure_type": classify_failure(str(e)),
+                "failure_type": failure_type,
+                "attempts": retry_policy.entries[model_name]["attempts"],
+                "quarantined": decision == "quarantine",
+                "graph_profile": graph_profile,
                 "device_analytics": {
                     "timestamp": time.time()
                 }
@@ -299,6 +807,12 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
             benchmark_results[model_name] = record
             print(f"SAVED: {out_path}")
 
+        finally:
+            tracing.complete("benchmark_model", model_start, time.time() - model_start, model=model_name)
+
+    if restored is not None:
+        drop_restored(restored)
+
     # --------------------------------------------------
     # FINAL SUMMARY
     # --------------------------------------------------
@@ -310,7 +824,12 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
 
     failure_count = sum(
         1 for x in benchmark_results.values()
-        if x.get("valid") is False
+        if x.get("valid") is False and x.get("failure_type") != SKIP_FAILURE_TYPE
+    )
+
+    over_budget_count = sum(
+        1 for x in benchmark_results.values()
+        if x.get("failure_type") == SKIP_FAILURE_TYPE
     )
 
     print("\n" + "=" * 60)
@@ -318,6 +837,8 @@ def run_benchmarks(onnx_dir: Path = ONNX_DIR, models: list[str] = None):
     print("=" * 60)
     print(f"SUCCESS: {success_count}")
     print(f"FAILED : {failure_count}")
+    if over_budget_count:
+        print(f"OVER BUDGET (predicted): {over_budget_count}")
 
     return benchmark_results
 
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Frame-cadence benchmark: one inference per frame on a fixed clock (72 / 90 /
+120 Hz) for a sustained period, as a VR app would run a model.
+
+Frame k starts at k / rate. Latency is measured from the frame start to the
+result being available, so a late start counts against the frame. A frame
+whose latency exceeds the frame budget (1 / rate) is a deadline miss. While an
+inference overruns, the frame ticks it spans are dropped, as a real frame loop
+would skip them. Per rate the summary reports:
+    frames, deadline_misses, miss_rate, dropped_frames,
+    p50_ms, p95_ms, p99_ms, max_ms, jitter_ms (std dev), p99_over_budget
+
+Backends: host ONNX Runtime ("ort_cpu") and Unity Barracuda CPU / GPU
+(BenchmarkCLI -nnvrCadence, latencies synced with a read-back). Neither
+renders a scene; the budget is the whole frame.
+
+Usage:
+    python -m ab.vr.cadence _work/onnx_temp/AirNet.onnx --rates 72,90,120 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from pathlib import Path
+
+
+DEFAULT_RATES_HZ = (72, 90, 120)
+CADENCE_SEC = 10.0
+WARMUP_ITERATIONS = 5
+# Sleep until this close to the next tick, then spin
+SPIN_SEC = 0.002
+
+
+def parse_rates(spec: str | None) -> list[float]:
+    if not spec:
+        return list(DEFAULT_RATES_HZ)
+    rates = sorted({float(r) for r in spec.split(",") if r.strip()})
+    if any(r <= 0 for r in rates):
+        raise ValueError(f"Frame rates must be positive: {spec!r}")
+    return rates
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo, hi = math.floor(k), math.ceil(k)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def cadence_stats(latencies_ms: list[float], rate_hz: float, dropped_frames: int = 0) -> dict:
+    """Deadline misses, jitter and percentiles of per-frame latencies against the 1 / rate budget."""
+    budget_ms = 1000.0 / rate_hz
+    values = sorted(latencies_ms)
+    n = len(values)
+    mean = sum(values) / n if n else 0.0
+    misses = sum(1 for v in values if v > budget_ms)
+    p99 = _percentile(values, 0.99)
+    return {
+        "rate_hz": rate_hz,
+        "budget_ms": round(budget_ms, 3),
+        "frames": n,
+        "deadline_misses": misses,
+        "miss_rate": round(misses / n, 4) if n else 0.0,
+        "dropped_frames": dropped_frames,
+        "mean_ms": round(mean, 3),
+        "p50_ms": round(_percentile(values, 0.50), 3),
+        "p95_ms": round(_percentile(values, 0.95), 3),
+        "p99_ms": round(p99, 3),
+        "max_ms": round(values[-1], 3) if n else 0.0,
+        "jitter_ms": round((sum((v - mean) ** 2 for v in values) / n) ** 0.5, 3) if n else 0.0,
+        "p99_over_budget": round(p99 / budget_ms, 3),
+    }
+
+
+def run_frame_loop(infer, rate_hz: float, duration_sec: float) -> tuple[list[float], int]:
+    """Call `infer()` once per frame tick for `duration_sec`; returns (latencies ms, dropped frames)."""
+    period = 1.0 / rate_hz
+    total_frames = int(duration_sec * rate_hz)
+    latencies, dropped = [], 0
+    origin = time.perf_counter()
+    frame = 0
+    while frame < total_frames:
+        tick = origin + frame * period
+        remaining = tick - time.perf_counter()
+        if remaining > SPIN_SEC:
+            time.sleep(remaining - SPIN_SEC)
+        while time.perf_counter() < tick:
+            pass
+        infer()
+        done = time.perf_counter()
+        latencies.append((done - tick) * 1000.0)
+        # Next frame is the first tick after the result; ticks in between are dropped
+        next_frame = max(frame + 1, math.ceil((done - origin) / period))
+        dropped += next_frame - frame - 1
+        frame = next_frame
+    return latencies, dropped
+
+
+def run_ort_cadence(
+    onnx_path: Path,
+    rates_hz: list[float] = DEFAULT_RATES_HZ,
+    duration_sec: float = CADENCE_SEC,
+    providers: list[str] | None = None,
+) -> list[dict]:
+    """Cadence summary per rate on host ONNX Runtime (batch 1)."""
+    from ab.vr.ort_runner import create_session, make_input, resolve_input_shape
+
+    session = create_session(onnx_path, providers)
+    inp = session.get_inputs()[0]
+    feed = {inp.name: make_input(resolve_input_shape(inp.shape))}
+    for _ in range(WARMUP_ITERATIONS):
+        session.run(None, feed)
+
+    results = []
+    for rate in rates_hz:
+        latencies, dropped = run_frame_loop(lambda: session.run(None, feed), rate, duration_sec)
+        results.append(cadence_stats(latencies, rate, dropped))
+    return results
+
+
+def unity_cadence(result: dict) -> dict:
+    """Per-backend cadence summaries from BenchmarkCLI's raw "cadence" runs."""
+    out: dict = {}
+    for run in result.get("cadence") or []:
+        if run.get("error"):
+            continue
+        out.setdefault(f"unity_{run['backend']}", []).append(
+            cadence_stats(run["latencies_ms"], run["rate_hz"], run.get("dropped_frames", 0))
+        )
+    return out
+
+
+def unity_cadence_seconds(rates_hz: list[float], duration_sec: float) -> float:
+    """Extra Editor time a cadence run adds (both backends, every rate)."""
+    return 2 * len(rates_hz) * duration_sec
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Fixed frame-rate cadence benchmark on host ONNX Runtime")
+    ap.add_argument("onnx", type=Path)
+    ap.add_argument("--rates", default=None, help="Comma-separated Hz (default: 72,90,120)")
+    ap.add_argument("--seconds", type=float, default=CADENCE_SEC, help="Duration per rate")
+    args = ap.parse_args()
+
+    for s in run_ort_cadence(args.onnx, parse_rates(args.rates), args.seconds):
+        print(json.dumps(s))
+
+
+if __name__ == "__main__":
+    main()
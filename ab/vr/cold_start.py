@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Cold-start latency: model file load, session / worker creation, first
+inference and warm steady-state inference, per backend.
+
+Every backend reports trials with the same fields (milliseconds):
+    file_load_ms        read / deserialize the model
+    session_create_ms   create the inference session (ORT) or worker (Barracuda)
+    first_inference_ms  first run on the new session
+    warm_ms             mean run after the first
+and records store one summary per backend under "cold_start":
+    {"ort_cpu": {"trials": 5, "first": {...}, "median": {...}, "max": {...}}, "unity_cpu": ..., ...}
+
+Backends:
+    ort_cpu        every trial in a fresh interpreter, with the model's pages
+                   dropped from the OS page cache first (Linux), so each is a
+                   real cold start; also reports runtime_init_ms (import onnxruntime)
+    unity_cpu/gpu  BenchmarkCLI -nnvrColdStart; only trial 0 is cold for the
+                   Editor process, later trials reload the model and recreate the worker
+    android_*      onnxruntime_perf_test "Session creation time cost" (includes
+                   the file load) and "First inference time cost", one process per run
+
+Usage:
+    python -m ab.vr.cold_start _work/onnx_temp/AirNet.onnx --trials 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import re
+import time
+from pathlib import Path
+from statistics import median
+
+
+COLD_START_TRIALS = 5
+WARM_ITERATIONS = 10
+FIELDS = ("runtime_init_ms", "file_load_ms", "session_create_ms", "first_inference_ms", "warm_ms")
+
+
+def summarize_trials(trials: list[dict]) -> dict | None:
+    """First trial, and median / max over trials, of every field a trial reported."""
+    trials = [t for t in trials if not t.get("error")]
+    if not trials:
+        return None
+    summary = {"trials": len(trials), "first": {}, "median": {}, "max": {}}
+    for field in FIELDS:
+        values = [t[field] for t in trials if t.get(field) is not None]
+        if not values:
+            continue
+        if trials[0].get(field) is not None:
+            summary["first"][field] = round(trials[0][field], 3)
+        summary["median"][field] = round(median(values), 3)
+        summary["max"][field] = round(max(values), 3)
+    return summary
+
+
+# ── Host ONNX Runtime ───────────────────────────────────────────────────────
+def _drop_page_cache(path: Path) -> None:
+    if not hasattr(os, "posix_fadvise") or not path.exists():
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _ort_trial(onnx_path: str, warm_iterations: int) -> dict:
+    """One cold start; runs in a fresh spawned interpreter."""
+    try:
+        start = time.perf_counter()
+        import onnxruntime as ort
+
+        from ab.vr.ort_runner import make_input, resolve_input_shape
+
+        trial = {"runtime_init_ms": (time.perf_counter() - start) * 1000.0}
+
+        path = Path(onnx_path)
+        has_data = path.with_suffix(".onnx.data").exists()
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            model_bytes = f.read()
+        if has_data:
+            with open(path.with_suffix(".onnx.data"), "rb") as f:
+                f.read()
+        trial["file_load_ms"] = (time.perf_counter() - start) * 1000.0
+
+        # External weights are resolved relative to the file, so such graphs load by path
+        start = time.perf_counter()
+        session = ort.InferenceSession(
+            str(path) if has_data else model_bytes, providers=["CPUExecutionProvider"]
+        )
+        trial["session_create_ms"] = (time.perf_counter() - start) * 1000.0
+
+        inp = session.get_inputs()[0]
+        feed = {inp.name: make_input(resolve_input_shape(inp.shape))}
+        start = time.perf_counter()
+        session.run(None, feed)
+        trial["first_inference_ms"] = (time.perf_counter() - start) * 1000.0
+
+        start = time.perf_counter()
+        for _ in range(warm_iterations):
+            session.run(None, feed)
+        trial["warm_ms"] = (time.perf_counter() - start) * 1000.0 / warm_iterations
+        return trial
+    except Exception as e:
+        return {"error": repr(e)[:300]}
+
+
+def ort_cold_start(onnx_path: Path, trials: int = COLD_START_TRIALS,
+                   warm_iterations: int = WARM_ITERATIONS) -> dict | None:
+    """Summary over `trials` fresh-process cold starts on the host CPU."""
+    onnx_path = Path(onnx_path).resolve()
+    ctx = mp.get_context("spawn")
+    results = []
+    for _ in range(trials):
+        for f in (onnx_path, onnx_path.with_suffix(".onnx.data")):
+            _drop_page_cache(f)
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(_ort_trial, (str(onnx_path), warm_iterations)))
+    errors = [r["error"] for r in results if r.get("error")]
+    if errors and len(errors) == len(results):
+        raise RuntimeError(errors[0])
+    return summarize_trials(results)
+
+
+# ── Unity ───────────────────────────────────────────────────────────────────
+def unity_cold_start(result: dict) -> dict:
+    """Per-backend summaries of BenchmarkCLI's "cold_start" trials."""
+    by_backend: dict = {}
+    for t in result.get("cold_start") or []:
+        by_backend.setdefault(f"unity_{t['backend']}", []).append(t)
+    return {
+        backend: summary
+        for backend, trials in by_backend.items()
+        if (summary := summarize_trials(sorted(trials, key=lambda t: t["trial"]))) is not None
+    }
+
+
+# ── Android (onnxruntime_perf_test) ─────────────────────────────────────────
+_PERF_TEST_FIELDS = [
+    # Session creation covers reading the model file
+    (r"Session creation time cost:\s*([\d.]+)\s*(s|ms)", "session_create_ms"),
+    (r"First inference time cost:\s*([\d.]+)\s*(s|ms)", "first_inference_ms"),
+    (r"Average inference time cost:\s*([\d.]+)\s*(s|ms)", "warm_ms"),
+]
+
+
+def parse_perf_test_cold_start(out: str) -> dict:
+    """Cold-start fields (ms) of one onnxruntime_perf_test run; missing lines are left out."""
+    trial = {}
+    for pattern, field in _PERF_TEST_FIELDS:
+        m = re.search(pattern, out or "", re.IGNORECASE)
+        if m:
+            value = float(m.group(1))
+            trial[field] = value * 1000.0 if m.group(2).lower() == "s" else value
+    return trial
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Host ONNX Runtime cold-start trials")
+    ap.add_argument("onnx", type=Path)
+    ap.add_argument("--trials", type=int, default=COLD_START_TRIALS)
+    args = ap.parse_args()
+
+    print(json.dumps({"ort_cpu": ort_cold_start(args.onnx, args.trials)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Multi-model contention: run a bundle of models at once (hand tracking +
+segmentation + classification, ...) and measure how much each one slows down
+compared with running alone.
+
+Every model is first benchmarked in isolation with the whole thread budget.
+Then the bundle runs for a fixed period in one of two modes:
+    parallel     one session per model, all running concurrently on their own
+                 threads, each with threads / n intra-op threads
+    interleaved  one loop running the models round-robin (A, B, C, A, ...),
+                 as a frame would; each session has the whole thread budget
+Per model: concurrent timing, latency_inflation (median concurrent / median
+isolated), p95_inflation and throughput. For the bundle: aggregate_throughput_ips,
+plus for interleaved the mean round_ms against sum_isolated_ms, the naive
+additive prediction from isolated means.
+
+Runs on host ONNX Runtime. The summary is saved under
+_work/contention/<bundle>/<device>.json and merged into the record of each
+model already benchmarked on this device under "contention" (keyed
+"<bundle>|<mode>"); models without a valid record are left out.
+
+Usage:
+    python -m ab.vr.contention AirNet,ResNet,MobileNetV2 --mode both --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from statistics import median
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+ONNX_DIR = ROOT_DIR / "_work" / "onnx_temp"
+# Outside the published stat tree: bundle summaries are not per-model records
+CONTENTION_DIR = ROOT_DIR / "_work" / "contention"
+
+MODES = ("parallel", "interleaved")
+CONTENTION_SEC = 10.0
+ISOLATED_ITERATIONS = 50
+WARMUP_ITERATIONS = 5
+
+
+def _p95(values: list[float]) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))] if values else 0.0
+
+
+def latency_summary(times_ms: list[float]) -> dict:
+    from ab.vr.ort_runner import timing_stats
+
+    return {
+        **timing_stats(times_ms),
+        "median_ms": median(times_ms) if times_ms else 0.0,
+        "p95_ms": _p95(times_ms),
+        "iterations": len(times_ms),
+    }
+
+
+class _Model:
+    def __init__(self, onnx_path: Path, threads: int):
+        from ab.vr.ort_runner import create_session, make_input, resolve_input_shape
+
+        self.name = Path(onnx_path).stem
+        self.session = create_session(onnx_path, intra_op_threads=threads)
+        inp = self.session.get_inputs()[0]
+        self.feed = {inp.name: make_input(resolve_input_shape(inp.shape))}
+        for _ in range(WARMUP_ITERATIONS):
+            self.run()
+
+    def run(self) -> float:
+        start = time.perf_counter()
+        self.session.run(None, self.feed)
+        return (time.perf_counter() - start) * 1000.0
+
+
+def isolated_baseline(onnx_paths: list[Path], threads: int, iterations: int = ISOLATED_ITERATIONS) -> dict:
+    """Each model alone with the whole thread budget."""
+    out = {}
+    for path in onnx_paths:
+        model = _Model(path, threads)
+        out[model.name] = latency_summary([model.run() for _ in range(iterations)])
+        del model
+    return out
+
+
+def _run_parallel(onnx_paths, threads, duration_sec) -> tuple[dict, float]:
+    models = [_Model(p, max(1, threads // len(onnx_paths))) for p in onnx_paths]
+    times = {m.name: [] for m in models}
+    deadline = [0.0]
+    # All sessions start together; the last one to arrive sets the deadline
+    barrier = threading.Barrier(
+        len(models), action=lambda: deadline.__setitem__(0, time.perf_counter() + duration_sec)
+    )
+
+    def loop(model):
+        barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            times[model.name].append(model.run())
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=loop, args=(m,), daemon=True) for m in models]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return times, time.perf_counter() - start
+
+
+def _run_interleaved(onnx_paths, threads, duration_sec) -> tuple[dict, float, list[float]]:
+    models = [_Model(p, threads) for p in onnx_paths]
+    times = {m.name: [] for m in models}
+    rounds = []
+    start = time.perf_counter()
+    deadline = start + duration_sec
+    while time.perf_counter() < deadline:
+        round_start = time.perf_counter()
+        for m in models:
+            times[m.name].append(m.run())
+        rounds.append((time.perf_counter() - round_start) * 1000.0)
+    return times, time.perf_counter() - start, rounds
+
+
+def run_contention(
+    onnx_paths: list[Path],
+    mode: str = "parallel",
+    threads: int | None = None,
+    duration_sec: float = CONTENTION_SEC,
+    baseline: dict | None = None,
+) -> dict:
+    """Run the bundle concurrently in `mode` and compare each model with its isolated baseline."""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    if len({Path(p).stem for p in onnx_paths}) < 2 or len({Path(p).stem for p in onnx_paths}) != len(onnx_paths):
+        raise ValueError("A contention bundle needs at least two distinct models")
+    threads = threads or os.cpu_count() or 1
+    baseline = baseline or isolated_baseline(onnx_paths, threads)
+
+    rounds = None
+    if mode == "parallel":
+        times, wall = _run_parallel(onnx_paths, threads, duration_sec)
+    else:
+        times, wall, rounds = _run_interleaved(onnx_paths, threads, duration_sec)
+
+    models = {}
+    for name, t in times.items():
+        concurrent = latency_summary(t)
+        alone = baseline[name]
+        models[name] = {
+            "isolated": alone,
+            "concurrent": concurrent,
+            "latency_inflation": round(concurrent["median_ms"] / alone["median_ms"], 3) if alone["median_ms"] else None,
+            "p95_inflation": round(concurrent["p95_ms"] / alone["p95_ms"], 3) if alone["p95_ms"] else None,
+            "throughput_ips": round(len(t) / wall, 2) if wall else 0.0,
+        }
+
+    result = {
+        "bundle": sorted(times),
+        "mode": mode,
+        "backend": "ort_cpu",
+        "threads": threads,
+        "duration_sec": round(wall, 2),
+        "models": models,
+        "aggregate_throughput_ips": round(sum(len(t) for t in times.values()) / wall, 2) if wall else 0.0,
+    }
+    if rounds:
+        # Means, so the additive prediction is exact when there is no contention
+        result["round_ms"] = round(sum(rounds) / len(rounds), 3)
+        result["round_p95_ms"] = round(_p95(rounds), 3)
+        result["sum_isolated_ms"] = round(sum(b["avg_ms"] for b in baseline.values()), 3)
+    return result
+
+
+def bundle_key(names: list[str]) -> str:
+    return "+".join(sorted(names))
+
+
+def save_contention(results: list[dict]) -> Path:
+    """Write the bundle summary and merge each model's share into its valid record, if it has one."""
+    from ab.vr.unity_runner import (
+        device_result_filename,
+        get_device_type,
+        load_model_record,
+        update_model_record,
+    )
+
+    key = bundle_key(results[0]["bundle"])
+    path = CONTENTION_DIR / key / device_result_filename()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"bundle": results[0]["bundle"], "device_type": get_device_type(), "runs": results}, f, indent=2)
+        f.write("\n")
+
+    for name in results[0]["bundle"]:
+        record = load_model_record(name)
+        if not record or record.get("valid") is not True:
+            print(f"WARNING: {name} has no valid record on this device; contention kept in {path} only")
+            continue
+        previous = record.get("contention") or {}
+        for r in results:
+            previous[f"{key}|{r['mode']}"] = {
+                **r["models"][name],
+                "threads": r["threads"],
+                "aggregate_throughput_ips": r["aggregate_throughput_ips"],
+            }
+        update_model_record(name, {"contention": previous})
+    return path
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Concurrent multi-model contention benchmark (host ONNX Runtime)")
+    ap.add_argument("models", help="Comma-separated model names (in --onnx-dir) or ONNX paths")
+    ap.add_argument("--mode", choices=[*MODES, "both"], default="both")
+    ap.add_argument("--threads", type=int, default=None, help="Thread budget (default: all cores)")
+    ap.add_argument("--seconds", type=float, default=CONTENTION_SEC, help="Concurrent run length per mode")
+    ap.add_argument("--onnx-dir", type=Path, default=ONNX_DIR)
+    ap.add_argument("--no-save", action="store_true", help="Print only; do not touch the records")
+    args = ap.parse_args()
+
+    paths = []
+    for item in (m.strip() for m in args.models.split(",") if m.strip()):
+        path = Path(item) if item.endswith(".onnx") else args.onnx_dir / f"{item}.onnx"
+        if not path.exists():
+            raise SystemExit(f"No ONNX file for {item} at {path}")
+        paths.append(path)
+
+    threads = args.threads or os.cpu_count() or 1
+    baseline = isolated_baseline(paths, threads)
+    modes = MODES if args.mode == "both" else (args.mode,)
+    results = [run_contention(paths, mode, threads, args.seconds, baseline) for mode in modes]
+
+    for r in results:
+        print(f"\n{r['mode'].upper()} ({r['threads']} threads, {r['duration_sec']}s): "
+              f"{r['aggregate_throughput_ips']} inferences/s")
+        print(f"{'model':<32}{'alone ms':>10}{'shared ms':>11}{'inflation':>11}{'p95 infl.':>11}{'ips':>9}")
+        for name, m in r["models"].items():
+            print(f"{name:<32}{m['isolated']['median_ms']:>10.2f}{m['concurrent']['median_ms']:>11.2f}"
+                  f"{m['latency_inflation'] or 0:>11.2f}{m['p95_inflation'] or 0:>11.2f}{m['throughput_ips']:>9.1f}")
+        if "round_ms" in r:
+            print(f"round {r['round_ms']:.2f} ms vs {r['sum_isolated_ms']:.2f} ms predicted by isolated sum")
+
+    if not args.no_save:
+        print(f"\nSAVED: {save_contention(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Learned per-device cost model: predicts latency and failure probability of a
+model from static graph features, fitted on existing benchmark records.
+
+Usage:
+    python -m ab.vr.cost_model fit                     # fit for this host's records
+    python -m ab.vr.cost_model fit --device "HP Omen 16 i7-13700HX"
+    python -m ab.vr.cost_model predict _work/onnx_temp/AirNet.onnx
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from pathlib import Path
+
+from ab.vr.unity_runner import (
+    CONFIG_PREFIX,
+    OUTPUT_ROOT,
+    ROOT_DIR,
+    device_result_filename,
+    get_device_type,
+    sanitize_filename,
+)
+
+
+MODEL_DIR = ROOT_DIR / "_work" / "cost_models"
+
+# Op types whose counts are used as features (everything else is folded into "other")
+OP_VOCAB = (
+    "Conv", "ConvTranspose", "Gemm", "MatMul", "BatchNormalization", "Relu",
+    "Add", "Mul", "Concat", "Reshape", "Transpose", "MaxPool", "AveragePool",
+    "GlobalAveragePool", "Softmax", "Sigmoid", "Split", "Slice", "Resize", "Pad",
+)
+
+FEATURES = (
+    "log_flops", "log_params", "log_peak_act", "log_nodes", "resolution", "log_size_mb",
+    *(f"n_{op}" for op in OP_VOCAB), "n_other",
+)
+
+RIDGE_LAMBDA = 1.0
+# Records written for a pre-screen skip; they were never run, so fitting ignores them
+SKIP_FAILURE_TYPE = "predicted_over_budget"
+# Models at least this likely to fail are benchmarked last
+FAILURE_DEFER_PROB = 0.5
+
+
+# ── Features ────────────────────────────────────────────────────────────────
+def profile_features(profile: dict, model_size_mb: float = 0.0) -> dict:
+    """Feature dict from a graph_profiler profile (or a record's graph_profile)."""
+    by_op = profile.get("by_op_type", {}) or {}
+    counts = {op: v.get("count", 0) for op, v in by_op.items()}
+    input_shape = profile.get("input_shape") or [0]
+    feats = {
+        "log_flops": math.log1p(profile.get("flops", 0)),
+        "log_params": math.log1p(profile.get("params", 0)),
+        "log_peak_act": math.log1p(profile.get("peak_activation_bytes", 0)),
+        "log_nodes": math.log1p(profile.get("node_count", 0)),
+        "resolution": float(input_shape[-1]),
+        "log_size_mb": math.log1p(model_size_mb or 0.0),
+    }
+    for op in OP_VOCAB:
+        feats[f"n_{op}"] = math.log1p(counts.get(op, 0))
+    feats["n_other"] = math.log1p(sum(c for op, c in counts.items() if op not in OP_VOCAB))
+    return feats
+
+
+def record_features(record: dict) -> dict | None:
+    profile = record.get("graph_profile")
+    if not profile:
+        return None
+    return profile_features(profile, record.get("model_size_mb", 0.0) or 0.0)
+
+
+def onnx_features(onnx_path: Path) -> dict:
+    from ab.vr.graph_profiler import profile_graph
+
+    size_mb = onnx_path.stat().st_size / (1024 * 1024)
+    data_file = onnx_path.with_suffix(".onnx.data")
+    if data_file.exists():
+        size_mb += data_file.stat().st_size / (1024 * 1024)
+    return profile_features(profile_graph(onnx_path), size_mb)
+
+
+def record_latency_ms(record: dict) -> float | None:
+    """Headline latency in ms (Unity records are in ns, Android records in µs)."""
+    duration = record.get("duration")
+    if not duration:
+        return None
+    scale = 1e6 if record.get("runtime") == "Barracuda" else 1e3
+    return duration / scale
+
+
+def load_device_records(device_type: str, stat_dir: Path = OUTPUT_ROOT) -> list[dict]:
+    records = []
+    pattern = f"{CONFIG_PREFIX}_*/{device_result_filename(device_type)}"
+    for path in sorted(stat_dir.glob(pattern)):
+        try:
+            with open(path, encoding="utf-8") as f:
+                records.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return records
+
+
+# ── Model ───────────────────────────────────────────────────────────────────
+class CostModel:
+    """
+    Ridge regression on log-latency + logistic regression on failure, over
+    standardized graph features. Small enough to store as JSON per device.
+    """
+
+    def __init__(self, device_type: str):
+        self.device_type = device_type
+        self.mean: list[float] = [0.0] * len(FEATURES)
+        self.std: list[float] = [1.0] * len(FEATURES)
+        self.latency_coef: list[float] | None = None
+        self.latency_intercept = 0.0
+        self.latency_rmse_log = 0.0
+        self.failure_coef: list[float] | None = None
+        self.failure_intercept = 0.0
+        self.n_latency = 0
+        self.n_failure = 0
+
+    # -- fitting --
+    def fit(self, records: list[dict]) -> "CostModel":
+        import numpy as np
+
+        rows, lat, ok = [], [], []
+        for r in records:
+            if r.get("timing_source") == "structural_twin" or r.get("failure_type") == SKIP_FAILURE_TYPE:
+                continue
+            feats = record_features(r)
+            if feats is None:
+                continue
+            rows.append([feats[f] for f in FEATURES])
+            ms = record_latency_ms(r) if r.get("valid") is True else None
+            lat.append(ms)
+            ok.append(1.0 if r.get("valid") is True else 0.0)
+        if not rows:
+            raise RuntimeError(f"No records with graph_profile for device {self.device_type!r}")
+
+        X = np.asarray(rows, dtype=np.float64)
+        self.mean = X.mean(axis=0).tolist()
+        std = X.std(axis=0)
+        std[std == 0] = 1.0
+        self.std = std.tolist()
+        Z = (X - X.mean(axis=0)) / std
+
+        # Latency: ridge on log(ms) over successful runs
+        mask = np.array([m is not None and m > 0 for m in lat])
+        if mask.sum() >= 2:
+            Zl = Z[mask]
+            y = np.log(np.array([m for m in lat if m is not None and m > 0]))
+            A = Zl.T @ Zl + RIDGE_LAMBDA * np.eye(Zl.shape[1])
+            coef = np.linalg.solve(A, Zl.T @ (y - y.mean()))
+            self.latency_coef = coef.tolist()
+            self.latency_intercept = float(y.mean())
+            resid = y - (Zl @ coef + y.mean())
+            self.latency_rmse_log = float(np.sqrt((resid ** 2).mean()))
+            self.n_latency = int(mask.sum())
+
+        # Failure: L2-regularized logistic regression by gradient descent
+        t = 1.0 - np.array(ok)
+        if 0 < t.sum() < len(t):
+            w = np.zeros(Z.shape[1])
+            b = float(np.log(t.mean() / (1 - t.mean())))
+            for _ in range(500):
+                p = 1.0 / (1.0 + np.exp(-(Z @ w + b)))
+                w -= 0.1 * (Z.T @ (p - t) / len(t) + 0.01 * w)
+                b -= 0.1 * float((p - t).mean())
+            self.failure_coef = w.tolist()
+            self.failure_intercept = b
+        else:
+            # All succeeded (or all failed): constant, smoothed rate
+            self.failure_coef = None
+            self.failure_intercept = math.log((t.sum() + 0.5) / (len(t) - t.sum() + 0.5))
+        self.n_failure = len(t)
+        return self
+
+    # -- prediction --
+    def predict(self, features: dict) -> dict:
+        z = [
+            (features.get(f, 0.0) - m) / s
+            for f, m, s in zip(FEATURES, self.mean, self.std)
+        ]
+        out: dict = {"latency_ms": None, "latency_ms_lo": None, "latency_ms_hi": None}
+        if self.latency_coef is not None:
+            log_ms = self.latency_intercept + sum(c * v for c, v in zip(self.latency_coef, z))
+            spread = 2.0 * self.latency_rmse_log
+            out["latency_ms"] = math.exp(log_ms)
+            out["latency_ms_lo"] = math.exp(log_ms - spread)
+            out["latency_ms_hi"] = math.exp(log_ms + spread)
+        logit = self.failure_intercept
+        if self.failure_coef is not None:
+            logit += sum(c * v for c, v in zip(self.failure_coef, z))
+        out["failure_prob"] = 1.0 / (1.0 + math.exp(-max(min(logit, 50.0), -50.0)))
+        return out
+
+    def predict_onnx(self, onnx_path: Path) -> dict:
+        return self.predict(onnx_features(Path(onnx_path)))
+
+    # -- persistence --
+    def to_dict(self) -> dict:
+        return {"features": list(FEATURES), **self.__dict__}
+
+    def save(self, path: Path | None = None) -> Path:
+        path = path or model_path(self.device_type)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, device_type: str, path: Path | None = None) -> "CostModel | None":
+        path = path or model_path(device_type)
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.pop("features", None) != list(FEATURES):
+            return None  # stale feature layout; refit
+        model = cls(device_type)
+        model.__dict__.update(data)
+        return model
+
+
+def model_path(device_type: str) -> Path:
+    return MODEL_DIR / f"{sanitize_filename(device_type)}.json"
+
+
+def fit_device_model(device_type: str | None = None) -> CostModel:
+    device_type = device_type or get_device_type()
+    model = CostModel(device_type).fit(load_device_records(device_type))
+    model.save()
+    return model
+
+
+def exceeds_frame_budget(prediction: dict, hz: float) -> bool:
+    """True if even the optimistic latency estimate misses a frame at `hz`."""
+    lo = prediction.get("latency_ms_lo")
+    return lo is not None and lo > 1000.0 / hz
+
+
+def defer_likely_failures(names: list[str], predictions: dict) -> tuple[list[str], list[str]]:
+    """Move models with failure_prob >= FAILURE_DEFER_PROB to the end; returns (order, deferred)."""
+    likely = [n for n in names if (predictions.get(n) or {}).get("failure_prob", 0.0) >= FAILURE_DEFER_PROB]
+    deferred = set(likely)
+    return [n for n in names if n not in deferred] + likely, likely
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Per-device latency / failure cost model")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    f = sub.add_parser("fit", help="Fit on out/nn/stat/run records for a device")
+    f.add_argument("--device", default=None, help="Device type (default: this host)")
+    p = sub.add_parser("predict", help="Predict cost of ONNX files")
+    p.add_argument("onnx", nargs="+", type=Path)
+    p.add_argument("--device", default=None)
+    args = ap.parse_args()
+
+    device_type = args.device or get_device_type()
+    if args.cmd == "fit":
+        m = fit_device_model(device_type)
+        print(f"FITTED {device_type}: {m.n_latency} latency / {m.n_failure} outcome samples, "
+              f"log-RMSE {m.latency_rmse_log:.3f}")
+        print(f"SAVED: {model_path(device_type)}")
+        return
+
+    m = CostModel.load(device_type)
+    if m is None:
+        raise SystemExit(f"No cost model for {device_type!r}; run 'fit' first")
+    for path in args.onnx:
+        pred = m.predict_onnx(path)
+        lat = pred["latency_ms"]
+        lat_s = f"{lat:.2f} ms" if lat is not None else "n/a"
+        print(f"{path.stem}: latency {lat_s}, failure p={pred['failure_prob']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+One disk budget for the _work caches.
+
+Caches, evicted lowest priority first and least recently used within a priority:
+    sanity_onnx  0  scratch exports of scripts/sanity_check_onnx_shapes.py
+    temp         1  HF checkpoint cache (re-downloadable), one entry per checkpoint file
+    data         2  evaluation datasets, one entry per top-level file / directory
+    onnx_temp    3  exported models awaiting benchmarking, one entry per model (.onnx + .onnx.data)
+
+Entries still needed by queued work are pinned and never evicted. Evicted
+ONNX exports go to the artifact archive when one is configured
+(artifact_store.py), else they are deleted. When the caches exceed the budget
+(or the disk falls below `min_free_gb`) and nothing evictable is left,
+`wait_for_space()` throttles the caller until space is freed elsewhere, and
+reports False after THROTTLE_MAX_WAIT_SEC so the caller can defer its work.
+
+Usage:
+    python -m ab.vr.disk_quota status --budget-gb 50
+    python -m ab.vr.disk_quota enforce --budget-gb 50 --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+WORK_DIR = ROOT_DIR / "_work"
+
+# cache name -> eviction priority (lower goes first)
+CACHES = {"sanity_onnx": 0, "temp": 1, "data": 2, "onnx_temp": 3}
+
+MIN_FREE_GB = 5.0
+THROTTLE_POLL_SEC = 30.0
+THROTTLE_MAX_WAIT_SEC = 600.0
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Entry:
+    cache: str
+    key: str
+    paths: list[Path] = field(default_factory=list)
+    size: int = 0
+    last_used: float = 0.0
+
+    @property
+    def priority(self) -> int:
+        return CACHES[self.cache]
+
+
+def _tree_size(path: Path) -> tuple[int, float]:
+    """(bytes, newest atime/mtime) of a file or directory tree, symlinks not followed."""
+    if not path.is_dir() or path.is_symlink():
+        st = path.lstat()
+        return st.st_size, max(st.st_atime, st.st_mtime)
+    size, last = 0, 0.0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                st = os.lstat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            size += st.st_size
+            last = max(last, st.st_atime, st.st_mtime)
+    return size, last
+
+
+def _model_key(name: str) -> str:
+    return name.split(".onnx")[0]
+
+
+class DiskQuota:
+    def __init__(
+        self,
+        budget_gb: float,
+        work_dir: Path = WORK_DIR,
+        min_free_gb: float = MIN_FREE_GB,
+        archive_quota_gb: float | None = None,
+    ):
+        self.budget_bytes = int(budget_gb * 1024 ** 3)
+        self.min_free_bytes = int(min_free_gb * 1024 ** 3)
+        self.work_dir = Path(work_dir)
+        self.archive_quota_gb = archive_quota_gb
+        self.pinned: dict[str, set] = {cache: set() for cache in CACHES}
+
+    # ── Pins ────────────────────────────────────────────────────────────────
+    def pin(self, cache: str, keys) -> None:
+        """
+        Mark entries as needed by queued work: entry keys, "<key>-" prefixes
+        of them (a dataset's archive and extracted directory), or "*" for the
+        whole cache. Replaces the cache's previous pins.
+        """
+        self.pinned[cache] = set(keys)
+
+    def pin_models(self, models, dataset: str, keep_exports: bool) -> None:
+        """
+        Pin what the queued `models` still need: their checkpoints and ONNX
+        exports, the evaluation dataset, and with `keep_exports` every ONNX
+        export (a later Stage 2 benchmarks them).
+        """
+        models = set(models)
+        self.pin("temp", {f"{m}.pth" for m in models})
+        self.pin("onnx_temp", {"*"} if keep_exports else models)
+        self.pin("data", {dataset, dataset.replace("-", "")})
+
+    def is_pinned(self, entry: Entry) -> bool:
+        keys = self.pinned[entry.cache]
+        return "*" in keys or entry.key in keys or any(entry.key.startswith(k + "-") for k in keys)
+
+    # ── Scan ────────────────────────────────────────────────────────────────
+    def scan(self) -> list[Entry]:
+        entries = []
+        for cache in CACHES:
+            root = self.work_dir / cache
+            if not root.exists():
+                continue
+            if cache == "temp":
+                entries += self._scan_hf_cache(root)
+                continue
+            grouped: dict[str, Entry] = {}
+            for child in root.iterdir():
+                key = _model_key(child.name) if cache == "onnx_temp" else child.name
+                entry = grouped.setdefault(key, Entry(cache, key))
+                try:
+                    size, last = _tree_size(child)
+                except OSError:
+                    continue
+                entry.paths.append(child)
+                entry.size += size
+                entry.last_used = max(entry.last_used, last)
+            entries += grouped.values()
+        return entries
+
+    def _scan_hf_cache(self, root: Path) -> list[Entry]:
+        """
+        One entry per snapshot file (keyed by its file name, e.g. "AirNet.pth"),
+        covering the snapshot link and its blob; unreferenced or partial blobs
+        are entries of their own.
+        """
+        entries, referenced = [], set()
+        for snapshot_file in root.glob("models--*/snapshots/*/*"):
+            paths = [snapshot_file]
+            target = snapshot_file.resolve() if snapshot_file.is_symlink() else snapshot_file
+            if target != snapshot_file:
+                paths.append(target)
+                referenced.add(target)
+            try:
+                st = target.stat()
+            except OSError:
+                continue
+            entries.append(Entry("temp", snapshot_file.name, paths, st.st_size,
+                                 max(st.st_atime, st.st_mtime)))
+        for blob in root.glob("models--*/blobs/*"):
+            if blob.resolve() in referenced:
+                continue
+            st = blob.stat()
+            entries.append(Entry("temp", f"blob:{blob.name}", [blob], st.st_size, st.st_mtime))
+        return entries
+
+    def usage(self, entries: list[Entry] | None = None) -> dict:
+        entries = self.scan() if entries is None else entries
+        by_cache = {cache: 0 for cache in CACHES}
+        for e in entries:
+            by_cache[e.cache] += e.size
+        return by_cache
+
+    def deficit(self, entries: list[Entry]) -> int:
+        """Bytes to free to get under the budget and above the free-space floor."""
+        over = sum(e.size for e in entries) - self.budget_bytes
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        low = self.min_free_bytes - shutil.disk_usage(self.work_dir).free
+        return max(over, low, 0)
+
+    # ── Evict ───────────────────────────────────────────────────────────────
+    def _remove(self, entry: Entry) -> None:
+        if entry.cache == "onnx_temp" and self.archive_quota_gb is not None:
+            from ab.vr.artifact_store import archive_or_delete
+
+            onnx = next((p for p in entry.paths if p.suffix == ".onnx"), None)
+            if onnx is not None:
+                archive_or_delete(onnx, self.archive_quota_gb)
+        for path in entry.paths:
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+    def enforce(self, dry_run: bool = False) -> tuple[list[Entry], int]:
+        """Evict unpinned entries by (priority, LRU) until within budget; returns (evicted, bytes still missing)."""
+        entries = self.scan()
+        need = self.deficit(entries)
+        evicted = []
+        for entry in sorted(entries, key=lambda e: (e.priority, e.last_used)):
+            if need <= 0:
+                break
+            if self.is_pinned(entry):
+                continue
+            if not dry_run:
+                try:
+                    self._remove(entry)
+                except OSError as e:
+                    logger.warning(f"   ⚠️  Could not evict {entry.cache}/{entry.key}: {e}")
+                    continue
+            evicted.append(entry)
+            need -= entry.size
+        if evicted and not dry_run:
+            freed = sum(e.size for e in evicted)
+            logger.info(f"   💾 Evicted {len(evicted)} cache entries ({freed / 1024 ** 3:.2f} GB)")
+        return evicted, max(need, 0)
+
+    def wait_for_space(self, max_wait_sec: float = THROTTLE_MAX_WAIT_SEC) -> bool:
+        """
+        Evict as needed; while pinned entries alone exceed the budget, poll until
+        space is freed by someone else. False if still short after `max_wait_sec`.
+        """
+        deadline = time.time() + max_wait_sec
+        while True:
+            _, missing = self.enforce()
+            if missing <= 0:
+                return True
+            if time.time() >= deadline:
+                return False
+            logger.info(f"   ⏸️  Disk quota short by {missing / 1024 ** 3:.2f} GB (all pinned); throttling...")
+            time.sleep(THROTTLE_POLL_SEC)
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Disk quota over the _work caches")
+    ap.add_argument("cmd", choices=["status", "enforce"])
+    ap.add_argument("--budget-gb", type=float, required=True)
+    ap.add_argument("--min-free-gb", type=float, default=MIN_FREE_GB)
+    ap.add_argument("--dry-run", action="store_true", help="enforce: only list what would be evicted")
+    args = ap.parse_args()
+
+    quota = DiskQuota(args.budget_gb, min_free_gb=args.min_free_gb)
+    if args.cmd == "status":
+        entries = quota.scan()
+        usage = quota.usage(entries)
+        for cache, size in usage.items():
+            count = sum(1 for e in entries if e.cache == cache)
+            print(f"{cache:<14}{count:>7} entries{size / 1024 ** 3:>10.2f} GB  (priority {CACHES[cache]})")
+        print(f"{'total':<14}{len(entries):>7} entries{sum(usage.values()) / 1024 ** 3:>10.2f} GB "
+              f"of {args.budget_gb:.1f} GB; {quota.deficit(entries) / 1024 ** 3:.2f} GB to free")
+        return
+    evicted, missing = quota.enforce(dry_run=args.dry_run)
+    for e in evicted:
+        print(f"{'WOULD EVICT' if args.dry_run else 'EVICTED'}: {e.cache}/{e.key} ({e.size / 1024 ** 2:.1f} MB)")
+    if missing:
+        print(f"STILL OVER: {missing / 1024 ** 3:.2f} GB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Structural fingerprint of an ONNX graph (topology, shapes, attributes; not weight values)."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+
+FINGERPRINT_VERSION = 1
+
+# Integer tensors (Reshape targets, Slice bounds, ...) change behaviour, so
+# their values are part of the structure; float tensors are weights.
+_STRUCTURAL_DTYPES = {6, 7, 9, 12, 13}  # INT32, INT64, BOOL, UINT32, UINT64
+
+
+def _tensor_sig(t) -> list:
+    from onnx import numpy_helper
+
+    sig = [int(t.data_type), list(t.dims)]
+    if int(t.data_type) in _STRUCTURAL_DTYPES and not t.external_data:
+        sig.append(numpy_helper.to_array(t).ravel().tolist())
+    return sig
+
+
+def _value_info_sig(vi) -> list:
+    tt = vi.type.tensor_type
+    dims = [
+        d.dim_value if d.HasField("dim_value") else (d.dim_param or "?")
+        for d in tt.shape.dim
+    ]
+    return [int(tt.elem_type), dims]
+
+
+def _attr_sig(a):
+    from onnx import AttributeProto
+
+    if a.type == AttributeProto.FLOAT:
+        return a.f
+    if a.type == AttributeProto.INT:
+        return a.i
+    if a.type == AttributeProto.STRING:
+        return a.s.decode("utf-8", "replace")
+    if a.type == AttributeProto.TENSOR:
+        return _tensor_sig(a.t)
+    if a.type == AttributeProto.GRAPH:
+        return _graph_sig(a.g)
+    if a.type == AttributeProto.FLOATS:
+        return list(a.floats)
+    if a.type == AttributeProto.INTS:
+        return list(a.ints)
+    if a.type == AttributeProto.STRINGS:
+        return [s.decode("utf-8", "replace") for s in a.strings]
+    if a.type == AttributeProto.GRAPHS:
+        return [_graph_sig(g) for g in a.graphs]
+    return None
+
+
+def _graph_sig(graph) -> list:
+    """
+    Canonical, name-independent description of a graph. Tensor names are
+    replaced by their order of first appearance so that two exports of the
+    same architecture hash identically even if torch numbered them differently.
+    """
+    ids: dict = {}
+    inits = {t.name: t for t in graph.initializer}
+
+    def ref(name):
+        if not name:
+            return None
+        if name not in ids:
+            ids[name] = len(ids)
+            if name in inits:
+                return [ids[name], _tensor_sig(inits[name])]
+        return ids[name]
+
+    sig = [
+        "in", [[ref(vi.name), _value_info_sig(vi)] for vi in graph.input if vi.name not in inits],
+    ]
+    for node in graph.node:
+        sig.append([
+            node.domain,
+            node.op_type,
+            [ref(n) for n in node.input],
+            [ref(n) for n in node.output],
+            sorted([a.name, _attr_sig(a)] for a in node.attribute),
+        ])
+    sig += ["out", [[ref(vi.name), _value_info_sig(vi)] for vi in graph.output]]
+    return sig
+
+
+def structural_fingerprint(onnx_path: Path) -> str:
+    """sha256 over the graph structure of an ONNX file; weights are never loaded."""
+    import onnx
+
+    model = onnx.load(str(onnx_path), load_external_data=False)
+    payload = {
+        "v": FINGERPRINT_VERSION,
+        "opsets": sorted([o.domain, int(o.version)] for o in model.opset_import),
+        "graph": _graph_sig(model.graph),
+    }
+    blob = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def load_index(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        return {}
+
+
+def save_index(path: Path, index: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    tmp.replace(path)
+
+
+def cached_fingerprint(onnx_path: Path, index: dict) -> str:
+    """Fingerprint `onnx_path`, reusing `index` while the file's size/mtime are unchanged."""
+    st = onnx_path.stat()
+    entry = index.get(onnx_path.stem)
+    if (
+        entry
+        and entry.get("size") == st.st_size
+        and entry.get("mtime") == st.st_mtime
+        and entry.get("version") == FINGERPRINT_VERSION
+    ):
+        return entry["fingerprint"]
+    fp = structural_fingerprint(onnx_path)
+    index[onnx_path.stem] = {
+        "fingerprint": fp,
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+        "version": FINGERPRINT_VERSION,
+    }
+    return fp
@@ -0,0 +1,213 @@
+"""Static cost profile of an exported ONNX graph: MACs/FLOPs, parameters, peak activation memory."""
+
+from __future__ import annotations
+
+from math import prod
+from pathlib import Path
+
+
+# TensorProto.DataType -> bytes per element
+_ELEM_BYTES = {1: 4, 2: 1, 3: 1, 4: 2, 5: 2, 6: 4, 7: 8, 9: 1, 10: 2, 11: 8, 12: 4, 13: 8, 16: 2}
+
+# One FLOP per output element
+_ELEMENTWISE_OPS = {
+    "Add", "Sub", "Mul", "Div", "Pow", "Sqrt", "Exp", "Log", "Neg", "Abs", "Reciprocal",
+    "Relu", "LeakyRelu", "PRelu", "Elu", "Selu", "Sigmoid", "HardSigmoid", "HardSwish",
+    "Tanh", "Clip", "Erf", "Max", "Min", "Mean", "Sum", "Softplus", "Softsign", "Where",
+}
+
+# Approximate FLOPs per output element
+_NORMALIZATION_FLOPS = {
+    "BatchNormalization": 2,
+    "InstanceNormalization": 5,
+    "LayerNormalization": 5,
+    "LRN": 5,
+    "Softmax": 5,
+    "LogSoftmax": 5,
+}
+
+
+def _shapes(graph) -> dict:
+    """name -> (dims, elem_type) for every tensor with a fully known static shape."""
+    out = {}
+    for vi in list(graph.input) + list(graph.value_info) + list(graph.output):
+        tt = vi.type.tensor_type
+        dims = [d.dim_value if d.HasField("dim_value") else None for d in tt.shape.dim]
+        if tt.HasField("shape") and all(d is not None for d in dims):
+            out[vi.name] = (dims, tt.elem_type)
+    for init in graph.initializer:
+        out[init.name] = (list(init.dims), init.data_type)
+    return out
+
+
+def _attr(node, name, default=None):
+    for a in node.attribute:
+        if a.name == name:
+            if a.ints:
+                return list(a.ints)
+            return a.i if a.type == 2 else a.f
+    return default
+
+
+def _node_macs(node, shapes) -> int:
+    """Multiply-accumulates for the compute-heavy ops (0 for everything else)."""
+    def dims(name):
+        return shapes.get(name, (None, None))[0]
+
+    op = node.op_type
+    out = dims(node.output[0]) if node.output else None
+    if op == "Conv":
+        w = dims(node.input[1])
+        if out and w:
+            # out: N, Cout, *spatial; w: Cout, Cin/group, *kernel
+            return prod(out) * prod(w[1:])
+    elif op == "ConvTranspose":
+        x, w = dims(node.input[0]), dims(node.input[1])
+        if x and w:
+            # w: Cin, Cout/group, *kernel -> every input element scatters into Cout/group * kernel
+            return prod(x) * prod(w[1:])
+    elif op == "Gemm":
+        a = dims(node.input[0])
+        if out and a:
+            k = a[0] if _attr(node, "transA", 0) else a[-1]
+            return prod(out) * k
+    elif op == "MatMul":
+        a = dims(node.input[0])
+        if out and a:
+            return prod(out) * a[-1]
+    return 0
+
+
+def _node_extra_flops(node, shapes) -> int:
+    """Non-MAC FLOPs (bias adds, activations, pooling, normalization)."""
+    def dims(name):
+        return shapes.get(name, (None, None))[0]
+
+    op = node.op_type
+    out = dims(node.output[0]) if node.output else None
+    if out is None:
+        return 0
+    n_out = prod(out)
+    if op in ("Conv", "ConvTranspose", "Gemm") and len(node.input) > 2 and node.input[2]:
+        return n_out
+    if op in _ELEMENTWISE_OPS:
+        return n_out
+    if op in _NORMALIZATION_FLOPS:
+        return _NORMALIZATION_FLOPS[op] * n_out
+    if op in ("MaxPool", "AveragePool", "LpPool"):
+        kernel = _attr(node, "kernel_shape", [1])
+        return n_out * prod(kernel)
+    if op in ("GlobalAveragePool", "GlobalMaxPool", "ReduceMean", "ReduceSum", "ReduceMax"):
+        x = dims(node.input[0])
+        return prod(x) if x else 0
+    return 0
+
+
+def _tensor_bytes(name, shapes) -> int:
+    dims, elem = shapes.get(name, (None, None))
+    if dims is None:
+        return 0
+    return prod(dims) * _ELEM_BYTES.get(elem, 4)
+
+
+def _peak_activation_bytes(graph, shapes) -> int:
+    """
+    Peak bytes of live activations when nodes run in graph order (ONNX
+    requires a topological order). A tensor is freed after its last consumer;
+    graph outputs stay live to the end. Weights are not activations.
+    """
+    inits = {t.name for t in graph.initializer}
+    outputs = {o.name for o in graph.output}
+    last_use = {}
+    for i, node in enumerate(graph.node):
+        for name in node.input:
+            if name and name not in inits:
+                last_use[name] = i
+
+    live = {vi.name: _tensor_bytes(vi.name, shapes) for vi in graph.input if vi.name not in inits}
+    current = sum(live.values())
+    peak = current
+    for i, node in enumerate(graph.node):
+        for name in node.output:
+            if name and name not in live:
+                live[name] = _tensor_bytes(name, shapes)
+                current += live[name]
+        peak = max(peak, current)
+        for name in list(live):
+            if name not in outputs and last_use.get(name, -1) <= i:
+                current -= live.pop(name)
+    return peak
+
+
+def profile_graph(onnx_path: Path, input_shape: list[int] | None = None) -> dict:
+    """
+    Static profile of an ONNX graph at a concrete input shape.
+
+    `input_shape` defaults to the graph's own input with symbolic dims (the
+    dynamic batch axis) set to 1, i.e. the shape the benchmarks feed. Weights
+    are never loaded (only initializer dims are needed).
+    """
+    import onnx
+
+    model = onnx.load(str(onnx_path), load_external_data=False)
+    graph = model.graph
+    inits = {t.name for t in graph.initializer}
+    first_input = next(vi for vi in graph.input if vi.name not in inits)
+    dims = first_input.type.tensor_type.shape.dim
+    if input_shape is None:
+        input_shape = [d.dim_value if d.HasField("dim_value") else 1 for d in dims]
+    for d, v in zip(dims, input_shape):
+        d.ClearField("dim_param")
+        d.dim_value = int(v)
+
+    inferred = onnx.shape_inference.infer_shapes(model)
+    graph = inferred.graph
+    shapes = _shapes(graph)
+
+    nodes = []
+    by_op: dict = {}
+    unresolved = 0
+    for node in graph.node:
+        macs = _node_macs(node, shapes)
+        flops = 2 * macs + _node_extra_flops(node, shapes)
+        out_dims = shapes.get(node.output[0], (None, None))[0] if node.output else None
+        if out_dims is None:
+            unresolved += 1
+        nodes.append({
+            "name": node.name,
+            "op_type": node.op_type,
+            "macs": macs,
+            "flops": flops,
+            "output_shape": out_dims,
+        })
+        agg = by_op.setdefault(node.op_type, {"count": 0, "macs": 0, "flops": 0})
+        agg["count"] += 1
+        agg["macs"] += macs
+        agg["flops"] += flops
+
+    params = sum(prod(t.dims) for t in graph.initializer if t.data_type in (1, 10, 11, 16))
+    param_bytes = sum(prod(t.dims) * _ELEM_BYTES.get(t.data_type, 4) for t in graph.initializer)
+
+    return {
+        "input_shape": list(input_shape),
+        "macs": sum(n["macs"] for n in nodes),
+        "flops": sum(n["flops"] for n in nodes),
+        "params": params,
+        "param_bytes": param_bytes,
+        "peak_activation_bytes": _peak_activation_bytes(graph, shapes),
+        "node_count": len(nodes),
+        "unresolved_shape_nodes": unresolved,
+        "by_op_type": by_op,
+        "nodes": nodes,
+    }
+
+
+def profile_summary(profile: dict) -> dict:
+    """The record-sized part of a profile (everything but the per-node list)."""
+    return {k: v for k, v in profile.items() if k != "nodes"}
+
+
+def achieved_gflops(flops: int, avg_ms: float) -> float:
+    if not flops or not avg_ms:
+        return 0.0
+    return round(flops / (avg_ms / 1000.0) / 1e9, 3)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Incremental result sync with the HuggingFace Hub.
+
+A background thread periodically commits new or changed files (by content
+hash, tracked in a local manifest) in batched commits with concurrent
+uploads, instead of one upload_folder of everything at the end of a run.
+`pull` downloads records other machines already published, so models
+measured elsewhere on the same device type are skipped here.
+
+A directory can stand in for the Hub (LocalHub), e.g. for testing:
+    python -m ab.vr.hub_sync push --local-hub /tmp/fake_hub
+    python -m ab.vr.hub_sync pull --local-hub /tmp/fake_hub
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ab.vr.unity_runner import CONFIG_PREFIX, OUTPUT_ROOT, ROOT_DIR, device_result_filename
+
+
+logger = logging.getLogger(__name__)
+
+HF_RESULTS_REPO = "NN-Dataset/onnx"
+MANIFEST_PATH = ROOT_DIR / "_work" / "hub_sync_manifest.json"
+
+DEFAULT_INTERVAL_SEC = 300.0
+DEFAULT_THREADS = 8
+MAX_FILES_PER_COMMIT = 500
+# Files modified more recently than this may still be being written
+SETTLE_SEC = 2.0
+
+SYNC_PATTERNS = ("*.json", "*.onnx", "*.onnx.data")
+RECORD_PATTERN = f"{CONFIG_PREFIX}_*/*.json"
+INDEX_FILE = "all_models.json"
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ── Hub backends ────────────────────────────────────────────────────────────
+class HfHub:
+    """A HuggingFace Hub repository."""
+
+    def __init__(self, repo_id: str = HF_RESULTS_REPO, repo_type: str = "model"):
+        from huggingface_hub import HfApi
+
+        self.api = HfApi()
+        self.repo_id = repo_id
+        self.repo_type = repo_type
+
+    def ensure_repo(self) -> None:
+        self.api.create_repo(self.repo_id, repo_type=self.repo_type, exist_ok=True)
+
+    def list_files(self) -> list[str]:
+        return self.api.list_repo_files(self.repo_id, repo_type=self.repo_type)
+
+    def download(self, path_in_repo: str, dest: Path) -> None:
+        from huggingface_hub import hf_hub_download
+
+        with tempfile.TemporaryDirectory() as tmp:
+            src = hf_hub_download(self.repo_id, path_in_repo, repo_type=self.repo_type, cache_dir=tmp)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(src, dest)
+
+    def commit(self, files: list[tuple[str, Path]], message: str, num_threads: int = DEFAULT_THREADS) -> None:
+        from huggingface_hub import CommitOperationAdd
+
+        ops = [CommitOperationAdd(path_in_repo=p, path_or_fileobj=str(local)) for p, local in files]
+        self.api.create_commit(
+            self.repo_id,
+            operations=ops,
+            commit_message=message,
+            repo_type=self.repo_type,
+            num_threads=num_threads,
+        )
+
+
+class LocalHub:
+    """Directory stand-in for a Hub repository (<root>/<repo_id>/...), with a commit log."""
+
+    LOG = ".commits.jsonl"
+
+    def __init__(self, root: Path, repo_id: str = HF_RESULTS_REPO):
+        self.root = Path(root) / repo_id
+        self.repo_id = repo_id
+
+    def ensure_repo(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def list_files(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(
+            p.relative_to(self.root).as_posix()
+            for p in self.root.rglob("*")
+            if p.is_file() and p.name != self.LOG and not p.name.endswith(".part")
+        )
+
+    def download(self, path_in_repo: str, dest: Path) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(self.root / path_in_repo, dest)
+
+    def commit(self, files: list[tuple[str, Path]], message: str, num_threads: int = DEFAULT_THREADS) -> None:
+        def put(item):
+            path_in_repo, local = item
+            target = self.root / path_in_repo
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(target.name + ".part")
+            shutil.copyfile(local, tmp)
+            return tmp, target
+
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            staged = list(pool.map(put, files))
+        # Publish only once every upload succeeded, like a Hub commit
+        for tmp, target in staged:
+            os.replace(tmp, target)
+        with open(self.root / self.LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": time.time(), "message": message, "files": [p for p, _ in files]}) + "\n")
+
+
+def make_hub(repo_id: str = HF_RESULTS_REPO, local_hub: Path | None = None):
+    return LocalHub(local_hub, repo_id) if local_hub else HfHub(repo_id)
+
+
+# ── Sync ────────────────────────────────────────────────────────────────────
+class HubSync:
+    """
+    Push new/changed files under `folders` (each mapped to the repo root, as
+    upload_folder did) and pull published records.
+
+    The manifest maps path_in_repo -> {sha256, size, mtime_ns} of the last
+    synced content, so unchanged files are neither re-hashed nor re-uploaded.
+    """
+
+    def __init__(
+        self,
+        hub,
+        folders: list[Path],
+        *,
+        manifest_path: Path = MANIFEST_PATH,
+        interval_sec: float = DEFAULT_INTERVAL_SEC,
+        num_threads: int = DEFAULT_THREADS,
+        patterns: tuple = SYNC_PATTERNS,
+    ):
+        self.hub = hub
+        self.folders = [Path(f) for f in folders]
+        self.manifest_path = Path(manifest_path)
+        self.interval_sec = interval_sec
+        self.num_threads = num_threads
+        self.patterns = patterns
+        self.manifest: dict = {}
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            except json.JSONDecodeError:
+                self.manifest = {}
+        self.pushed_files = 0
+        self.commits = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _save_manifest(self) -> None:
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        tmp.replace(self.manifest_path)
+
+    def _local_files(self):
+        for folder in self.folders:
+            if not folder.exists():
+                continue
+            for path in folder.rglob("*"):
+                rel = path.relative_to(folder).as_posix()
+                if any(part.startswith(".") for part in rel.split("/")):
+                    continue  # in-progress export dirs, caches
+                if path.is_file() and any(fnmatch.fnmatch(path.name, p) for p in self.patterns):
+                    yield rel, path
+
+    def changed(self) -> list[tuple[str, Path, dict]]:
+        """(path_in_repo, local path, manifest entry) for files whose content differs from the last sync."""
+        now = time.time()
+        out = []
+        for rel, path in self._local_files():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime < SETTLE_SEC:
+                continue
+            entry = self.manifest.get(rel)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                continue
+            digest = sha256_file(path)
+            new_entry = {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            if entry and entry["sha256"] == digest:
+                self.manifest[rel] = new_entry  # touched, not changed
+                continue
+            out.append((rel, path, new_entry))
+        return out
+
+    def push(self, message: str | None = None) -> int:
+        """Commit every changed file (in batches); returns the number of files pushed."""
+        with self._lock:
+            pending = self.changed()
+            if not pending:
+                self._save_manifest()
+                return 0
+            self.hub.ensure_repo()
+            pushed = 0
+            for i in range(0, len(pending), MAX_FILES_PER_COMMIT):
+                batch = pending[i:i + MAX_FILES_PER_COMMIT]
+                msg = message or f"Sync {len(batch)} file(s) from {socket.gethostname()}"
+                self.hub.commit([(rel, path) for rel, path, _ in batch], msg, self.num_threads)
+                for rel, _, entry in batch:
+                    self.manifest[rel] = entry
+                self._save_manifest()
+                pushed += len(batch)
+                self.commits += 1
+            self.pushed_files += pushed
+            return pushed
+
+    def pull(self, stat_dir: Path = OUTPUT_ROOT, all_devices: bool = False) -> int:
+        """
+        Download published records missing locally (this device's only,
+        unless `all_devices`) and merge remote all_models.json entries that
+        are not known locally. Local files are never overwritten.
+        """
+        stat_dir = Path(stat_dir)
+        own_file = device_result_filename()
+        wanted = []
+        for rel in self.hub.list_files():
+            if not fnmatch.fnmatch(rel, RECORD_PATTERN):
+                continue
+            if not all_devices and rel.rsplit("/", 1)[-1] != own_file:
+                continue
+            if not (stat_dir / rel).exists():
+                wanted.append(rel)
+
+        def fetch(rel):
+            dest = stat_dir / rel
+            self.hub.download(rel, dest)
+            st = dest.stat()
+            return rel, {"sha256": sha256_file(dest), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+        with ThreadPoolExecutor(max_workers=self.num_threads) as pool:
+            fetched = list(pool.map(fetch, wanted))
+        with self._lock:
+            self.manifest.update(dict(fetched))  # already published; never re-upload
+            self._save_manifest()
+
+        if INDEX_FILE in self.hub.list_files():
+            with tempfile.TemporaryDirectory() as tmp:
+                remote_path = Path(tmp) / INDEX_FILE
+                self.hub.download(INDEX_FILE, remote_path)
+                with open(remote_path, encoding="utf-8") as f:
+                    remote = json.load(f)
+            local_path = stat_dir / INDEX_FILE
+            local = json.load(open(local_path)) if local_path.exists() else {}
+            missing = {k: v for k, v in remote.items() if k not in local}
+            if missing:
+                local.update(missing)
+                local_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(local_path, "w") as f:
+                    json.dump(local, f, indent=2)
+        return len(fetched)
+
+    # -- background loop --
+    def start(self) -> "HubSync":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hub-sync", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            try:
+                n = self.push()
+                if n:
+                    logger.info(f"☁️  Synced {n} file(s) to {self.hub.repo_id}")
+            except Exception as e:
+                # Files may vanish under us (low-storage deletes); retried next interval
+                logger.warning(f"⚠️  Hub sync failed, will retry: {e}")
+
+    def stop(self, flush: bool = True) -> None:
+        """Stop the background loop and push whatever is left."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            n = self.push()
+            logger.info(f"☁️  Hub sync done: {self.pushed_files} file(s) in {self.commits} commit(s)"
+                        + (f" ({n} in final flush)" if n else ""))
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Incremental result sync with the Hub")
+    ap.add_argument("cmd", choices=["push", "pull", "status"])
+    ap.add_argument("--repo", default=HF_RESULTS_REPO)
+    ap.add_argument("--local-hub", type=Path, default=None, help="Directory standing in for the Hub")
+    ap.add_argument("--all-devices", action="store_true", help="pull: records of every device, not just this one")
+    args = ap.parse_args()
+
+    sync = HubSync(make_hub(args.repo, args.local_hub), [OUTPUT_ROOT, ROOT_DIR / "_work" / "onnx_temp"])
+    if args.cmd == "push":
+        print(f"PUSHED {sync.push()} file(s)")
+    elif args.cmd == "pull":
+        print(f"PULLED {sync.pull(all_devices=args.all_devices)} record(s)")
+    else:
+        for rel, _, _ in sync.changed():
+            print(f"  changed: {rel}")
+
+
+if __name__ == "__main__":
+    main()
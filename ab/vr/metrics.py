@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Live run metrics in Prometheus text format.
+
+Stage durations (every tracing span closed in this process), per-model
+outcomes and failure classes, `_work` disk usage, host utilization and a
+rolling models/hour throughput with ETA. Exposed on a localhost endpoint
+(`--metrics-port`) and/or a file rewritten every few seconds
+(`--metrics-file`, e.g. for node_exporter's textfile collector).
+
+Usage:
+    python main.py --metrics-port 9464
+    curl -s localhost:9464/metrics | grep nnvr_eta
+    python main.py --metrics-file /var/lib/node_exporter/nnvr.prom
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from ab.vr import tracing
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+WORK_DIR = ROOT_DIR / "_work"
+
+DEFAULT_INTERVAL_SEC = 15.0
+# Walking _work is not free; rescan at most this often
+DISK_SCAN_SEC = 60.0
+# Throughput is averaged over completions in this trailing window
+THROUGHPUT_WINDOW_SEC = 3600.0
+STAGE_BUCKETS = (0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+class Registry:
+    """Counters, gauges and fixed-bucket histograms keyed by (name, labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self._help: dict = {}
+        self._counters: dict = {}
+        self._gauges: dict = {}
+        self._histograms: dict = {}
+        self._planned: dict = {}
+        self._finished: dict = {}
+        self._completions: dict = {}
+        self._disk: tuple = (0.0, {})
+
+    def describe(self, name: str, kind: str, text: str) -> None:
+        self._help[name] = (kind, text)
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = float(value)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._histograms.setdefault(key, {"buckets": [0] * len(STAGE_BUCKETS), "sum": 0.0, "count": 0})
+            i = bisect.bisect_left(STAGE_BUCKETS, value)
+            if i < len(STAGE_BUCKETS):
+                h["buckets"][i] += 1
+            h["sum"] += value
+            h["count"] += 1
+
+    # -- run progress --
+    def plan(self, stage: str, total: int) -> None:
+        """Declare how many models `stage` will attempt in this run."""
+        with self._lock:
+            self._planned[stage] = int(total)
+            self._finished.setdefault(stage, 0)
+            self._completions.setdefault(stage, deque())
+
+    def finished(self, stage: str, outcome: str, failure_class: str | None = None) -> None:
+        """One model left `stage` with `outcome` (done | failed | skipped | deferred)."""
+        self.inc("nnvr_models_total", stage=stage, outcome=outcome)
+        if failure_class:
+            self.inc("nnvr_failures_total", stage=stage, failure_class=failure_class)
+        now = time.time()
+        with self._lock:
+            self._finished[stage] = self._finished.get(stage, 0) + 1
+            if outcome in ("done", "failed"):
+                self._completions.setdefault(stage, deque()).append(now)
+        self.set("nnvr_last_model_timestamp_seconds", now, stage=stage)
+
+    def _progress_gauges(self, now: float) -> None:
+        for stage, total in list(self._planned.items()):
+            done = self._finished.get(stage, 0)
+            window = self._completions.setdefault(stage, deque())
+            while window and window[0] < now - THROUGHPUT_WINDOW_SEC:
+                window.popleft()
+            span = min(now - self.started, THROUGHPUT_WINDOW_SEC)
+            rate = len(window) / span * 3600.0 if span > 0 else 0.0
+            remaining = max(total - done, 0)
+            self.set("nnvr_models_planned", total, stage=stage)
+            self.set("nnvr_models_remaining", remaining, stage=stage)
+            self.set("nnvr_throughput_models_per_hour", round(rate, 3), stage=stage)
+            # -1: no completions in the window, ETA unknown
+            self.set("nnvr_eta_seconds", round(remaining / rate * 3600.0, 1) if rate else -1, stage=stage)
+
+    def _host_gauges(self, now: float) -> None:
+        scanned, sizes = self._disk
+        if now - scanned >= DISK_SCAN_SEC:
+            sizes = work_dir_usage(WORK_DIR)
+            self._disk = (now, sizes)
+        for sub, size in sizes.items():
+            self.set("nnvr_work_dir_bytes", size, dir=sub)
+        try:
+            self.set("nnvr_disk_free_bytes", shutil.disk_usage(WORK_DIR if WORK_DIR.exists() else ROOT_DIR).free)
+        except OSError:
+            pass
+        try:
+            import psutil
+        except ImportError:
+            return
+        self.set("nnvr_cpu_percent", psutil.cpu_percent(interval=None))
+        self.set("nnvr_memory_used_percent", psutil.virtual_memory().percent)
+
+    def render(self) -> str:
+        now = time.time()
+        self._progress_gauges(now)
+        self._host_gauges(now)
+        self.set("nnvr_run_start_timestamp_seconds", self.started)
+        self.set("nnvr_up_seconds", round(now - self.started, 1))
+
+        with self._lock:
+            series: dict = {}
+            for (name, labels), v in sorted({**self._counters, **self._gauges}.items()):
+                series.setdefault(name, []).append(f"{name}{_labels(dict(labels))} {_fmt(v)}")
+            # Buckets stay in ascending `le` order within each label set
+            for (name, labels), h in sorted(self._histograms.items()):
+                lines = series.setdefault(name, [])
+                cumulative = 0
+                for bound, n in zip(STAGE_BUCKETS, h["buckets"]):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels({**dict(labels), 'le': f'{bound:g}'})} {cumulative}")
+                lines.append(f"{name}_bucket{_labels({**dict(labels), 'le': '+Inf'})} {h['count']}")
+                lines.append(f"{name}_sum{_labels(dict(labels))} {h['sum']:.3f}")
+                lines.append(f"{name}_count{_labels(dict(labels))} {h['count']}")
+
+        out = []
+        for name in sorted(series):
+            if name in self._help:
+                kind, text = self._help[name]
+                out += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            out += series[name]
+        return "\n".join(out) + "\n"
+
+
+def work_dir_usage(root: Path) -> dict:
+    """Bytes per top-level entry of `root` (files at the top level are summed under ".")."""
+    sizes: dict = {}
+    if not root.exists():
+        return sizes
+
+    def tree_size(path: str) -> int:
+        total = 0
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            total += tree_size(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return total
+
+    for entry in os.scandir(root):
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                sizes[entry.name] = tree_size(entry.path)
+            else:
+                sizes["."] = sizes.get(".", 0) + entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+    return sizes
+
+
+REGISTRY = Registry()
+for _name, _kind, _text in [
+    ("nnvr_stage_duration_seconds", "histogram", "Duration of each pipeline stage (tracing span)"),
+    ("nnvr_stage_errors_total", "counter", "Stages that ended with an exception"),
+    ("nnvr_models_total", "counter", "Models that left a stage, by outcome"),
+    ("nnvr_failures_total", "counter", "Failed models by retry_policy failure class"),
+    ("nnvr_models_planned", "gauge", "Models a stage intends to attempt in this run"),
+    ("nnvr_models_remaining", "gauge", "Planned models not yet finished"),
+    ("nnvr_throughput_models_per_hour", "gauge", "Finished models per hour over the trailing hour"),
+    ("nnvr_eta_seconds", "gauge", "Remaining models / throughput (-1 when unknown)"),
+    ("nnvr_last_model_timestamp_seconds", "gauge", "Unix time the last model left a stage"),
+    ("nnvr_work_dir_bytes", "gauge", "Disk usage of each _work subdirectory"),
+    ("nnvr_disk_free_bytes", "gauge", "Free bytes on the _work filesystem"),
+    ("nnvr_cpu_percent", "gauge", "Host CPU utilization"),
+    ("nnvr_memory_used_percent", "gauge", "Host memory utilization"),
+    ("nnvr_run_start_timestamp_seconds", "gauge", "Unix time this process started exporting metrics"),
+    ("nnvr_up_seconds", "gauge", "Seconds since the run started"),
+]:
+    REGISTRY.describe(_name, _kind, _text)
+
+
+def _observe_span(name: str, seconds: float, args: dict) -> None:
+    REGISTRY.observe("nnvr_stage_duration_seconds", seconds, stage=name)
+    if "error" in args:
+        REGISTRY.inc("nnvr_stage_errors_total", stage=name)
+
+
+# ── Exposition ──────────────────────────────────────────────────────────────
+class MetricsExporter:
+    """Serve REGISTRY on 127.0.0.1:`port` and/or rewrite it into `path` every `interval_sec`."""
+
+    def __init__(self, port: int | None = None, path: Path | None = None, interval_sec: float = DEFAULT_INTERVAL_SEC):
+        self.port = port
+        self.path = Path(path) if path else None
+        self.interval_sec = interval_sec
+        self._server = None
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> "MetricsExporter":
+        REGISTRY.started = time.time()
+        tracing.add_observer(_observe_span)
+        if self.port is not None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = REGISTRY.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+            self._server.daemon_threads = True
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True))
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._threads.append(threading.Thread(target=self._write_loop, name="metrics-file", daemon=True))
+        for t in self._threads:
+            t.start()
+        return self
+
+    def write(self) -> None:
+        # Atomic replace: a scraper never reads a half-written file
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(REGISTRY.render(), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _write_loop(self) -> None:
+        while True:
+            try:
+                self.write()
+            except OSError:
+                pass
+            if self._stop.wait(self.interval_sec):
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for t in self._threads:
+            t.join(timeout=5)
+        if self.path is not None:
+            try:
+                self.write()  # final values
+            except OSError:
+                pass
+        tracing.remove_observer(_observe_span)
+
+
+_exporter: MetricsExporter | None = None
+
+
+def start(port: int | None = None, path: Path | None = None, interval_sec: float = DEFAULT_INTERVAL_SEC):
+    """Start the process-wide exporter once; later calls (e.g. process_models under main.py) are no-ops."""
+    global _exporter
+    if _exporter is None and (port is not None or path is not None):
+        _exporter = MetricsExporter(port, path, interval_sec).start()
+        return _exporter
+    return None
+
+
+def stop() -> None:
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+        _exporter = None
+
+
+def plan(stage: str, total: int) -> None:
+    REGISTRY.plan(stage, total)
+
+
+def finished(stage: str, outcome: str, failure_class: str | None = None) -> None:
+    REGISTRY.finished(stage, outcome, failure_class)
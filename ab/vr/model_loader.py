@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-import pandas as pd
-# pyrefly: ignore [missing-import]
-from ab.nn.api import data
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 def load_models(
     limit: int | None = None,
@@ -14,4 +16,8 @@ def load_models(
     Return rows with nn_code, task, dataset, metric, prm, etc.
     `nn` filters by model name; `limit` maps to max_rows.
     """
-    return data(nn=nn, max_rows=limit) 
+    # nn-dataset pulls in torch; import it only when metadata is actually needed
+    # pyrefly: ignore [missing-import]
+    from ab.nn.api import data
+
+    return data(nn=nn, max_rows=limit)
@@ -4,15 +4,22 @@ from __future__ import annotations
 
 import multiprocessing as mp
 import os
+import shutil
 import sys
 from pathlib import Path
 import importlib
 
-import onnx
-
+from ab.vr import tracing
 from scripts.shape_utils import infer_in_out_shapes
 
 
+DEFAULT_OPSET = 12
+
+# Models whose weights exceed this are written as <name>.onnx + <name>.onnx.data
+# (protobuf caps a single serialized model at 2 GB).
+EXTERNAL_DATA_THRESHOLD_MB = 1024
+
+
 def _row_to_job_dict(row) -> dict:
     d = row.to_dict()
     prm = d.get("prm")
@@ -21,121 +28,475 @@ def _row_to_job_dict(row) -> dict:
     return d
 
 
-def _export_worker(row_dict, dest_str, queue):
-    # Fix Windows cp1252 crash when PyTorch prints Unicode (e.g. emojis)
-    os.environ["PYTHONIOENCODING"] = "utf-8"
-    if sys.stdout.encoding != "utf-8":
-        sys.stdout = open(sys.stdout.fileno(), mode="w", encoding="utf-8", errors="replace", closefd=False)
-        sys.stderr = open(sys.stderr.fileno(), mode="w", encoding="utf-8", errors="replace", closefd=False)
+def parse_variant_specs(spec: str | None) -> list[dict]:
+    """
+    Parse a compact variant list, e.g. "r64,r128:op11,b4" ->
+    [{"resolution": 64}, {"resolution": 128, "opset": 11}, {"batch_size": 4}].
+    Variants are comma-separated; parts of one variant are colon-separated.
+    """
+    variants = []
+    for token in (spec or "").split(","):
+        token = token.strip()
+        if not token:
+            continue
+        v: dict = {}
+        for part in token.split(":"):
+            if part.startswith("op"):
+                v["opset"] = int(part[2:])
+            elif part.startswith("r"):
+                v["resolution"] = int(part[1:])
+            elif part.startswith("b"):
+                v["batch_size"] = int(part[1:])
+            else:
+                raise ValueError(f"Unknown variant part {part!r} in {token!r}")
+        variants.append(v)
+    return variants
+
+
+def variant_filename(model_name: str, spec: dict) -> str:
+    """Stable file name for an export variant, e.g. AirNet_r64_op12_bdyn.onnx."""
+    name = model_name
+    if spec.get("resolution"):
+        name += f"_r{spec['resolution']}"
+    name += f"_op{spec.get('opset', DEFAULT_OPSET)}"
+    name += f"_b{spec['batch_size']}" if spec.get("batch_size") else "_bdyn"
+    return name + ".onnx"
+
+
+def _variant_in_shape(in_shape, spec: dict) -> tuple:
+    """Apply a variant's resolution / batch size to the base input shape."""
+    n, c, h, w = in_shape
+    res = spec.get("resolution")
+    if res:
+        h = w = int(res)
+    batch = spec.get("batch_size")
+    if batch:
+        n = int(batch)
+    return (n, c, h, w)
+
+
+def _load_net(row_dict, cache_dir: str):
+    """Import `ab.nn.nn.<model>`, instantiate Net and load HF weights. Returns (model, in_shape)."""
+    import torch
+
+    model_name = row_dict["nn"]
+    dataset = row_dict.get("dataset", "cifar-10")
+
+    # 1. Safely import the module the same way nn-lite does
     try:
-        import torch
-
-        model_name = row_dict["nn"]
-        dataset = row_dict.get("dataset", "cifar-10")
-        print(f"EXPORTING: {model_name} for {dataset}")
-
-        # 1. Safely import the module the same way nn-lite does
-        try:
+        with tracing.span("export.import_module", model=model_name):
             module = importlib.import_module(f"ab.nn.nn.{model_name}")
-        except ImportError as e:
-            raise ImportError(f"Failed to import ab.nn.nn.{model_name}: {e}")
+    except ImportError as e:
+        raise ImportError(f"Failed to import ab.nn.nn.{model_name}: {e}")
 
-        if not hasattr(module, "Net"):
-            raise RuntimeError(f"Module ab.nn.nn.{model_name} has no Net class")
+    if not hasattr(module, "Net"):
+        raise RuntimeError(f"Module ab.nn.nn.{model_name} has no Net class")
 
-        Net = module.Net
+    Net = module.Net
 
-        # 2. Dynamically assign shapes based on the dataset and transform
-        prm = row_dict.get("prm", {})
-        transform_str = prm.get("transform", "")
+    # 2. Dynamically assign shapes based on the dataset and transform
+    prm = row_dict.get("prm", {})
+    transform_str = prm.get("transform", "")
 
-        in_shape, out_shape = infer_in_out_shapes(dataset=dataset, transform_str=transform_str)
+    in_shape, out_shape = infer_in_out_shapes(dataset=dataset, transform_str=transform_str)
 
-        device = torch.device("cpu")
+    device = torch.device("cpu")
 
-        # 3. Instantiate the model
+    # 3. Instantiate the model
+    with tracing.span("export.instantiate", model=model_name):
         model = Net(in_shape, out_shape, prm, device)
-        
-        # 3.5 Load pre-trained weights from HuggingFace
-        try:
-            # pyrefly: ignore [missing-import]
-            from huggingface_hub import hf_hub_download
-            temp_dir = str(Path(dest_str).parent.parent / "temp")
-            pth = hf_hub_download("NN-Dataset/checkpoints-epoch-50", f"{model_name}.pth", cache_dir=temp_dir)
+
+    # 3.5 Load pre-trained weights from HuggingFace
+    try:
+        # pyrefly: ignore [missing-import]
+        from huggingface_hub import hf_hub_download
+        with tracing.span("export.checkpoint_download", model=model_name):
+            pth = hf_hub_download("NN-Dataset/checkpoints-epoch-50", f"{model_name}.pth", cache_dir=cache_dir)
+        with tracing.span("export.load_weights", model=model_name):
             ckpt = torch.load(pth, map_location="cpu", weights_only=False)
             model.load_state_dict(
                 ckpt["state_dict"] if isinstance(ckpt, dict) and "state_dict" in ckpt else ckpt,
                 strict=False
             )
-            print(f"Loaded weights for {model_name} from HuggingFace")
-        except Exception as e:
-            # print(f"Warning: Could not load weights for {model_name}: {e}")
-            raise RuntimeError(f"FAILED to load weights for {model_name}: {e}")
+        print(f"Loaded weights for {model_name} from HuggingFace")
+    except Exception as e:
+        # print(f"Warning: Could not load weights for {model_name}: {e}")
+        raise RuntimeError(f"FAILED to load weights for {model_name}: {e}")
+
+    model.eval()
+    return model, in_shape
+
 
-        model.eval()
+def _export_variant(model, in_shape, spec: dict):
+    import torch
 
-        dummy = torch.randn(in_shape)
+    shape = _variant_in_shape(in_shape, spec)
+    dummy = torch.randn(shape)
 
-        dest = Path(dest_str)
-        dest.parent.mkdir(parents=True, exist_ok=True)
+    dest = Path(spec["dest"])
+    dest.parent.mkdir(parents=True, exist_ok=True)
 
-        # 4. Export to ONNX
-        # Barracuda 3.x officially supports up to opset 12. Opset 14+ has new math operations
-        # that will cause the VR headset to silently crash.
+    # A variant with an explicit batch size is exported with a static batch axis
+    dynamic_axes = None
+    if not spec.get("batch_size"):
+        # Dynamic axes allow Unity Barracuda to handle different batch sizes if needed later
+        dynamic_axes = {'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
+
+    large = _param_bytes(model) >= EXTERNAL_DATA_THRESHOLD_MB * 1024 * 1024
+    export_path = dest
+    if large:
+        # torch may spill >2 GB graphs into one file per tensor; keep that out of onnx_temp
+        tmp_dir = dest.parent / f".{dest.stem}.export"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        export_path = tmp_dir / dest.name
+
+    # 4. Export to ONNX
+    # Barracuda 3.x officially supports up to opset 12. Opset 14+ has new math operations
+    # that will cause the VR headset to silently crash.
+    with torch.no_grad(), tracing.span("export.torch_onnx_export", file=dest.name):
         torch.onnx.export(
             model,
             dummy,
-            dest,
-            opset_version=12, 
+            export_path,
+            opset_version=int(spec.get("opset", DEFAULT_OPSET)),
             input_names=["input"],
             output_names=["output"],
-            # Dynamic axes allow Unity Barracuda to handle different batch sizes if needed later
-            dynamic_axes={'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}} 
+            dynamic_axes=dynamic_axes,
         )
 
-        # Downgrade ONNX IR version for Barracuda compatibility
-        model_onnx = onnx.load(dest)
-        model_onnx.ir_version = 7
-        onnx.save(model_onnx, dest)
+    # Downgrade ONNX IR version for Barracuda compatibility
+    if not large:
+        set_ir_version(dest, 7)
+        return
 
-        queue.put((True, None))
+    # Large model: rewrite as graph + a single <name>.onnx.data weights file
+    try:
+        consolidate_external_data(export_path, dest, ir_version=7)
+    finally:
+        shutil.rmtree(export_path.parent, ignore_errors=True)
+
+
+def _param_bytes(model) -> int:
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def set_ir_version(path, ir_version: int) -> None:
+    """
+    Rewrite ModelProto.ir_version without parsing the model.
+
+    ir_version is field 1 (varint) and protobuf serializes fields in number
+    order, so it sits in the first bytes of the file. If it can be patched in
+    place (same varint length) no tensor payload is ever read; otherwise fall
+    back to a graph-only load/save.
+    """
+    path = Path(path)
+    new = _encode_varint(ir_version)
+    with open(path, "r+b") as f:
+        head = f.read(11)
+        if head[:1] == b"\x08":
+            old_len = 0
+            for b in head[1:]:
+                old_len += 1
+                if b < 0x80:
+                    break
+            if old_len == len(new):
+                f.seek(1)
+                f.write(new)
+                return
+
+    import onnx
+
+    model_onnx = onnx.load(str(path), load_external_data=False)
+    model_onnx.ir_version = ir_version
+    onnx.save_model(model_onnx, str(path))
+
+
+# ── Streaming external-data rewrite ─────────────────────────────────────────
+# Field numbers in onnx.proto: ModelProto.ir_version / graph, GraphProto.initializer,
+# TensorProto.raw_data / external_data / data_location, StringStringEntryProto.key / value
+_MODEL_IR_VERSION, _MODEL_GRAPH = 1, 7
+_GRAPH_INITIALIZER = 5
+_TENSOR_RAW_DATA, _TENSOR_EXTERNAL_DATA, _TENSOR_DATA_LOCATION = 9, 13, 14
+_ENTRY_KEY, _ENTRY_VALUE = 1, 2
+_EXTERNAL = 1
+# Tensors smaller than this stay inline (as onnx.save_model's size_threshold)
+INLINE_TENSOR_BYTES = 1024
+_COPY_CHUNK = 16 * 1024 * 1024
+
+
+def consolidate_external_data(src, dest, ir_version: int | None = None) -> Path:
+    """
+    Rewrite an ONNX file as `dest` + one `<dest>.data` weights file.
+
+    Works on the protobuf wire format: only the graph structure is held in
+    memory, while every initializer payload (inline raw_data, or a per-tensor
+    external file next to `src`) is copied chunk by chunk into the data file
+    and its TensorProto rewritten to point there. Optionally sets ir_version.
+    Returns the data file path.
+    """
+    src, dest = Path(src), Path(dest)
+    data_file = dest.with_name(dest.name + ".data")
+    with open(src, "rb") as f, open(data_file, "wb") as data:
+        out = bytearray()
+        for field, wtype, tag_start, start, end, value in _iter_fields(f, 0, src.stat().st_size):
+            if field == _MODEL_IR_VERSION and wtype == 0 and ir_version is not None:
+                out += _varint_field(_MODEL_IR_VERSION, ir_version)
+            elif field == _MODEL_GRAPH and wtype == 2:
+                out += _ld_field(_MODEL_GRAPH, _externalize_graph(f, start, end, src.parent, data, data_file.name))
+            else:
+                out += _read_range(f, tag_start, end)
+    with open(dest, "wb") as f:
+        f.write(out)
+    return data_file
+
+
+def _externalize_graph(f, start: int, end: int, src_dir: Path, data, location: str) -> bytes:
+    out = bytearray()
+    for field, wtype, tag_start, vstart, vend, _ in _iter_fields(f, start, end):
+        if field == _GRAPH_INITIALIZER and wtype == 2:
+            out += _ld_field(_GRAPH_INITIALIZER, _externalize_tensor(f, vstart, vend, src_dir, data, location))
+        else:
+            out += _read_range(f, tag_start, vend)
+    return bytes(out)
+
+
+def _externalize_tensor(f, start: int, end: int, src_dir: Path, data, location: str) -> bytes:
+    kept = bytearray()
+    raw = None
+    external: dict = {}
+    is_external = False
+    for field, wtype, tag_start, vstart, vend, value in _iter_fields(f, start, end):
+        if field == _TENSOR_RAW_DATA and wtype == 2:
+            raw = (tag_start, vstart, vend)
+        elif field == _TENSOR_EXTERNAL_DATA and wtype == 2:
+            entry = {k: _read_range(f, s, e).decode("utf-8")
+                     for k, (s, e) in _string_fields(f, vstart, vend).items()}
+            external[entry.get(_ENTRY_KEY, "")] = entry.get(_ENTRY_VALUE, "")
+        elif field == _TENSOR_DATA_LOCATION and wtype == 0:
+            is_external = value == _EXTERNAL
+        else:
+            kept += _read_range(f, tag_start, vend)
+
+    offset = data.tell()
+    if raw is not None:
+        if raw[2] - raw[1] < INLINE_TENSOR_BYTES:
+            return bytes(kept + _read_range(f, raw[0], raw[2]))
+        _copy_range(f, raw[1], raw[2] - raw[1], data)
+    elif is_external:
+        with open(src_dir / external["location"], "rb") as ext:
+            ext_offset = int(external.get("offset", 0))
+            length = int(external["length"]) if "length" in external else os.fstat(ext.fileno()).st_size - ext_offset
+            _copy_range(ext, ext_offset, length, data)
+    else:
+        return bytes(kept)  # typed fields (float_data, ...): nothing to move
+
+    for key, val in (("location", location), ("offset", str(offset)), ("length", str(data.tell() - offset))):
+        kept += _ld_field(_TENSOR_EXTERNAL_DATA, _ld_field(_ENTRY_KEY, key.encode()) + _ld_field(_ENTRY_VALUE, val.encode()))
+    kept += _varint_field(_TENSOR_DATA_LOCATION, _EXTERNAL)
+    return bytes(kept)
+
+
+def _string_fields(f, start: int, end: int) -> dict:
+    return {field: (vstart, vend) for field, wtype, _, vstart, vend, _ in _iter_fields(f, start, end) if wtype == 2}
+
+
+def _iter_fields(f, start: int, end: int):
+    """
+    Yield (field, wire_type, tag_start, value_start, value_end, varint_value)
+    for the protobuf message in f[start:end]; the caller may move f in between.
+    """
+    pos = start
+    while pos < end:
+        f.seek(pos)
+        tag = _read_varint(f)
+        field, wtype = tag >> 3, tag & 7
+        value = None
+        vstart = f.tell()
+        if wtype == 0:
+            value = _read_varint(f)
+            vend = f.tell()
+        elif wtype == 1:
+            vend = vstart + 8
+        elif wtype == 5:
+            vend = vstart + 4
+        elif wtype == 2:
+            length = _read_varint(f)
+            vstart = f.tell()
+            vend = vstart + length
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wtype} at offset {pos}")
+        yield field, wtype, pos, vstart, vend, value
+        pos = vend
+
+
+def _read_varint(f) -> int:
+    result, shift = 0, 0
+    while True:
+        b = f.read(1)
+        if not b:
+            raise EOFError("Truncated protobuf varint")
+        result |= (b[0] & 0x7F) << shift
+        if b[0] < 0x80:
+            return result
+        shift += 7
+
+
+def _read_range(f, start: int, end: int) -> bytes:
+    f.seek(start)
+    return f.read(end - start)
+
+
+def _copy_range(f, start: int, length: int, out) -> None:
+    f.seek(start)
+    while length > 0:
+        chunk = f.read(min(_COPY_CHUNK, length))
+        if not chunk:
+            raise EOFError("Tensor data ends early")
+        out.write(chunk)
+        length -= len(chunk)
+
+
+def _varint_field(field: int, value: int) -> bytes:
+    return _encode_varint(field << 3) + _encode_varint(value)
+
+
+def _ld_field(field: int, payload: bytes) -> bytes:
+    return _encode_varint(field << 3 | 2) + _encode_varint(len(payload)) + payload
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _export_job(row_dict, variants, cache_dir):
+    """
+    Load the model once and export every variant spec in `variants`.
+    Returns (ok, error, per_variant_results); `ok` is False only if the
+    model itself could not be loaded.
+    """
+    # Fix Windows cp1252 crash when PyTorch prints Unicode (e.g. emojis)
+    os.environ["PYTHONIOENCODING"] = "utf-8"
+    if sys.stdout.encoding != "utf-8":
+        sys.stdout = open(sys.stdout.fileno(), mode="w", encoding="utf-8", errors="replace", closefd=False)
+        sys.stderr = open(sys.stderr.fileno(), mode="w", encoding="utf-8", errors="replace", closefd=False)
+    try:
+        model_name = row_dict["nn"]
+        dataset = row_dict.get("dataset", "cifar-10")
+        print(f"EXPORTING: {model_name} for {dataset} ({len(variants)} variant(s))")
 
+        model, in_shape = _load_net(row_dict, cache_dir)
     except Exception as e:
         try:
             print(f"FAILED: {row_dict['nn']} - {repr(e)}")
         except UnicodeEncodeError:
             pass
-        queue.put((False, repr(e)))
+        return False, repr(e), []
 
+    results = []
+    for spec in variants:
+        try:
+            _export_variant(model, in_shape, spec)
+            results.append({"dest": spec["dest"], "ok": True, "error": None})
+        except Exception as e:
+            try:
+                print(f"FAILED: {row_dict['nn']} -> {Path(spec['dest']).name} - {repr(e)}")
+            except UnicodeEncodeError:
+                pass
+            results.append({"dest": spec["dest"], "ok": False, "error": repr(e)})
 
-def export_onnx(row, out_path, *, timeout_sec=60):
-    out_path = Path(out_path)
+    return True, None, results
+
+
+def _export_worker(row_dict, variants, cache_dir, queue):
+    queue.put(_export_job(row_dict, variants, cache_dir))
+
+
+def export_onnx_variants(row, variants: list[dict], *, timeout_sec=60, cache_dir=None, worker=None) -> list[dict]:
+    """
+    Export several variants of one model from a single loaded, weight-initialized
+    instance inside one worker process.
+
+    Each variant spec is a dict:
+        dest        output .onnx path (required)
+        opset       ONNX opset (default DEFAULT_OPSET)
+        resolution  square input size (default: inferred from the transform)
+        batch_size  static batch size (default: None -> dynamic batch axis)
+
+    `timeout_sec` covers the whole job. `cache_dir` is the HF checkpoint
+    cache (default: `<dest>/../../temp`, i.e. `_work/temp`). With a
+    worker_pool.RecyclingWorker as `worker` the job runs in that long-lived
+    process instead of a fresh one. Returns one result per spec
+    ({**spec, "ok": bool, "error": str | None}); only a failure to load the
+    model raises.
+    """
     row_dict = _row_to_job_dict(row)
+    variants = [{**v, "dest": str(v["dest"])} for v in variants]
+    if not variants:
+        return []
+    if cache_dir is None:
+        cache_dir = Path(variants[0]["dest"]).parent.parent / "temp"
+
+    if worker is not None:
+        ok, err, worker_results = worker.call(
+            _export_job, row_dict, variants, str(cache_dir), timeout_sec=timeout_sec
+        )
+    else:
+        # Use 'spawn' context to ensure a clean slate for PyTorch and avoid CUDA/threading deadlocks
+        ctx = mp.get_context("spawn")
+        queue = ctx.Queue()
 
-    # Use 'spawn' context to ensure a clean slate for PyTorch and avoid CUDA/threading deadlocks
-    ctx = mp.get_context("spawn")
-    queue = ctx.Queue()
-    
-    proc = ctx.Process(target=_export_worker, args=(row_dict, str(out_path), queue))
-    proc.start()
-    proc.join(timeout=timeout_sec)
+        proc = ctx.Process(target=_export_worker, args=(row_dict, variants, str(cache_dir), queue))
+        proc.start()
+        proc.join(timeout=timeout_sec)
 
-    if proc.is_alive():
-        proc.terminate()
-        proc.join(timeout=5)
-        raise TimeoutError(f"ONNX export exceeded {timeout_sec}s limit; process killed.")
+        if proc.is_alive():
+            proc.terminate()
+            proc.join(timeout=5)
+            raise TimeoutError(f"ONNX export exceeded {timeout_sec}s limit; process killed.")
 
-    if queue.empty():
-        raise RuntimeError("Export worker exited without result (possible OOM or segfault)")
+        if queue.empty():
+            raise RuntimeError("Export worker exited without result (possible OOM or segfault)")
 
-    ok, err = queue.get()
+        ok, err, worker_results = queue.get()
 
     if not ok:
         raise RuntimeError(err)
 
-    if not out_path.exists():
-        raise FileNotFoundError(f"Missing ONNX at {out_path}")
+    import onnx
+
+    results = []
+    for spec, res in zip(variants, worker_results):
+        out = {**spec, "ok": res["ok"], "error": res["error"]}
+        dest = Path(spec["dest"])
+        if out["ok"]:
+            try:
+                if not dest.exists():
+                    raise FileNotFoundError(f"Missing ONNX at {dest}")
+                # Validate the generated ONNX file by path: never materializes the
+                # weights in this process and works for >2 GB external-data models
+                with tracing.span("export.onnx_checker", file=dest.name):
+                    onnx.checker.check_model(str(dest))
+            except Exception as e:
+                out["ok"], out["error"] = False, repr(e)
+        results.append(out)
+    return results
+
+
+def export_onnx(row, out_path, *, timeout_sec=60):
+    out_path = Path(out_path)
+    with tracing.span("export_onnx", model=out_path.stem):
+        result = export_onnx_variants(row, [{"dest": out_path}], timeout_sec=timeout_sec)[0]
 
-    # Validate the generated ONNX file
-    onnx.checker.check_model(onnx.load(out_path))
-    return out_path
\ No newline at end of file
+    if not result["ok"]:
+        raise RuntimeError(result["error"])
+    return out_path
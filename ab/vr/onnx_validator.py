@@ -1,14 +1,69 @@
-import torch
-import torchvision
-import torchvision.transforms as T
-import onnxruntime as ort
+import random
+import time
+from pathlib import Path
+from statistics import NormalDist
 
-def eval_onnx_accuracy(onnx_path, target_h, data_root):
+from ab.vr import tracing
+
+# Stop once the confidence interval on accuracy is at most this wide
+DEFAULT_CI_WIDTH = 0.05
+DEFAULT_CONFIDENCE = 0.95
+# Never stop before this many samples (the interval is unreliable below it)
+MIN_SAMPLES = 100
+CHECK_EVERY = 25
+
+
+def wilson_interval(correct: int, total: int, confidence: float = DEFAULT_CONFIDENCE) -> tuple:
+    """Wilson score interval for a binomial proportion."""
+    if total == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = correct / total
+    denom = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denom
+    half = z * ((p * (1 - p) / total + z * z / (4 * total * total)) ** 0.5) / denom
+    return max(center - half, 0.0), min(center + half, 1.0)
+
+
+def stratified_order(labels, seed: int = 0) -> list:
+    """Shuffled indices interleaved across classes, so every prefix is near class-balanced."""
+    rng = random.Random(seed)
+    by_class = {}
+    for i, y in enumerate(labels):
+        by_class.setdefault(int(y), []).append(i)
+    queues = []
+    for cls in sorted(by_class):
+        rng.shuffle(by_class[cls])
+        queues.append(by_class[cls])
+    order = []
+    for rank in range(max(len(q) for q in queues)):
+        order.extend(q[rank] for q in queues if rank < len(q))
+    return order
+
+
+def estimate_onnx_accuracy(
+    onnx_path,
+    target_h,
+    data_root,
+    *,
+    ci_width: float = DEFAULT_CI_WIDTH,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 0,
+) -> dict:
     """
-    Evaluates ONNX model accuracy on CIFAR-10 test set.
-    Validates up to 1000 samples for speed.
+    Sequential accuracy estimate on the CIFAR-10 test set.
+
+    Samples are streamed in a shuffled, class-stratified order and evaluation
+    stops as soon as the Wilson interval is at most `ci_width` wide (or the
+    test set is exhausted).
     """
-    session = ort.InferenceSession(str(onnx_path))
+    import torch
+    import torchvision
+    import torchvision.transforms as T
+    import onnxruntime as ort
+
+    with tracing.span("accuracy.session", model=Path(onnx_path).stem):
+        session = ort.InferenceSession(str(onnx_path))
     input_name = session.get_inputs()[0].name
 
     tfm = T.Compose([
@@ -18,24 +73,52 @@ def eval_onnx_accuracy(onnx_path, target_h, data_root):
                     (0.2023, 0.1994, 0.2010))
     ])
 
-    dataset = torchvision.datasets.CIFAR10(
-        root=str(data_root), train=False, download=True, transform=tfm
-    )
+    with tracing.span("accuracy.dataset"):
+        dataset = torchvision.datasets.CIFAR10(
+            root=str(data_root), train=False, download=True, transform=tfm
+        )
+    order = stratified_order(dataset.targets, seed)
 
     # Use batch_size=1 to avoid reshape errors on models with hardcoded batch sizes
-    loader = torch.utils.data.DataLoader(dataset, batch_size=1)
+    loader = torch.utils.data.DataLoader(torch.utils.data.Subset(dataset, order), batch_size=1)
 
     correct, total = 0, 0
+    lo, hi = 0.0, 1.0
+    stopped = "exhausted"
+    inference_start = time.time()
 
     for x, y in loader:
         inp = x.numpy()
         outputs = session.run(None, {input_name: inp})[0]
         preds = outputs.argmax(axis=1)
 
-        correct += (preds == y.numpy()).sum()
+        correct += int((preds == y.numpy()).sum())
         total += len(x)
 
-        if total >= 100:
-            break
+        if total >= MIN_SAMPLES and total % CHECK_EVERY == 0:
+            lo, hi = wilson_interval(correct, total, confidence)
+            if hi - lo <= ci_width:
+                stopped = "ci_width"
+                break
+
+    if stopped == "exhausted":
+        lo, hi = wilson_interval(correct, total, confidence)
+    tracing.complete("accuracy.inference", inference_start, time.time() - inference_start,
+                     model=Path(onnx_path).stem, samples=total, stop=stopped)
+
+    return {
+        "accuracy": correct / total if total else 0.0,
+        "accuracy_ci": [round(lo, 4), round(hi, 4)],
+        "accuracy_confidence": confidence,
+        "accuracy_samples": total,
+        "accuracy_stop": stopped,
+    }
 
-    return correct / total
+
+def eval_onnx_accuracy(onnx_path, target_h, data_root, **kwargs):
+    """
+    Evaluates ONNX model accuracy on CIFAR-10 test set.
+    See estimate_onnx_accuracy for the stopping rule.
+    """
+    with tracing.span("eval_onnx_accuracy", model=Path(onnx_path).stem):
+        return estimate_onnx_accuracy(onnx_path, target_h, data_root, **kwargs)["accuracy"]
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Per-operator runtime profiles and a corpus-wide hot-op report.
+
+Per-node times come from the ONNX Runtime profiler on the host and, when
+Unity ran with -nnvrLayerProfile, from Barracuda per-layer timings. Each
+profile is condensed to time per op type and per (op type, input shape) and
+stored under "op_profile" in the model's record; `report` aggregates those
+over the corpus, overall and per architecture family.
+
+Usage:
+    python -m ab.vr.op_profiler profile _work/onnx_temp/AirNet.onnx
+    python -m ab.vr.op_profiler report [--device "HP Omen 16 i7-13700HX"] [--top 15] [--json report.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+from ab.vr.ort_runner import make_input, resolve_input_shape
+from ab.vr.scheduler import model_family
+
+
+PROFILE_ITERATIONS = 10
+PROFILE_WARMUP = 3
+# Per-shape buckets kept per model (the rest are folded into the op totals only)
+MAX_SHAPES_PER_MODEL = 30
+
+
+def _shape_key(op_type: str, shape) -> str:
+    if not shape:
+        return op_type
+    return f"{op_type} {'x'.join(str(d) for d in shape)}"
+
+
+def summarize_nodes(nodes: list[dict]) -> dict:
+    """
+    Condense per-node times ({op_type, shape, ms}) into the record layout:
+    total_ms, by_op_type {op: {count, ms, share}}, by_shape {"Conv 1x64x32x32": {count, ms}}.
+    """
+    total = sum(n["ms"] for n in nodes)
+    by_op: dict = {}
+    by_shape: dict = {}
+    for n in nodes:
+        agg = by_op.setdefault(n["op_type"], {"count": 0, "ms": 0.0})
+        agg["count"] += 1
+        agg["ms"] += n["ms"]
+        if n.get("shape"):
+            s = by_shape.setdefault(_shape_key(n["op_type"], n["shape"]), {"count": 0, "ms": 0.0})
+            s["count"] += 1
+            s["ms"] += n["ms"]
+    for agg in by_op.values():
+        agg["share"] = round(agg["ms"] / total, 4) if total else 0.0
+        agg["ms"] = round(agg["ms"], 4)
+    top_shapes = sorted(by_shape.items(), key=lambda kv: -kv[1]["ms"])[:MAX_SHAPES_PER_MODEL]
+    return {
+        "total_ms": round(total, 4),
+        "by_op_type": dict(sorted(by_op.items(), key=lambda kv: -kv[1]["ms"])),
+        "by_shape": {k: {"count": v["count"], "ms": round(v["ms"], 4)} for k, v in top_shapes},
+    }
+
+
+# ── Collectors ──────────────────────────────────────────────────────────────
+def ort_node_times(
+    onnx_path: Path,
+    *,
+    iterations: int = PROFILE_ITERATIONS,
+    warmup: int = PROFILE_WARMUP,
+    providers: list[str] | None = None,
+) -> list[dict]:
+    """Average per-node kernel time (ms) from the ONNX Runtime profiler, warmup runs excluded."""
+    import onnxruntime as ort
+
+    with tempfile.TemporaryDirectory() as tmp:
+        opts = ort.SessionOptions()
+        opts.enable_profiling = True
+        opts.profile_file_prefix = str(Path(tmp) / "ort_profile")
+        session = ort.InferenceSession(
+            str(onnx_path), sess_options=opts, providers=providers or ["CPUExecutionProvider"]
+        )
+        inp = session.get_inputs()[0]
+        feed = {inp.name: make_input(resolve_input_shape(inp.shape, 1))}
+        for _ in range(warmup + iterations):
+            session.run(None, feed)
+        with open(session.end_profiling(), encoding="utf-8") as f:
+            events = json.load(f)
+
+    seen: dict = {}
+    nodes: dict = {}
+    for ev in events:
+        if ev.get("cat") != "Node" or not ev.get("name", "").endswith("_kernel_time"):
+            continue
+        name = ev["name"][: -len("_kernel_time")]
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] <= warmup:
+            continue
+        args = ev.get("args", {})
+        shapes = args.get("input_type_shape") or []
+        first = next(iter(shapes[0].values()), None) if shapes else None
+        node = nodes.setdefault(name, {"name": name, "op_type": args.get("op_name", "?"), "shape": first, "ms": 0.0})
+        node["ms"] += ev.get("dur", 0) / 1000.0 / iterations
+    return list(nodes.values())
+
+
+def ort_op_profile(onnx_path: Path, **kwargs) -> dict:
+    return {"backend": "ort_cpu", **summarize_nodes(ort_node_times(onnx_path, **kwargs))}
+
+
+def unity_op_profiles(unity_result: dict) -> dict:
+    """{"unity_cpu": ..., "unity_gpu": ...} from a BenchmarkCLI result with layer_profile."""
+    out = {}
+    for backend in ("cpu", "gpu"):
+        layers = [l for l in unity_result.get("layer_profile") or [] if l.get("backend") == backend]
+        if layers:
+            nodes = [{"op_type": l.get("type") or "?", "shape": None, "ms": l.get("avg_ms", 0.0)} for l in layers]
+            out[f"unity_{backend}"] = {"backend": f"unity_{backend}", **summarize_nodes(nodes)}
+    return out
+
+
+# ── Corpus report ───────────────────────────────────────────────────────────
+def hot_op_report(records: list[dict]) -> dict:
+    """
+    Aggregate the op_profile of every record, per backend:
+        by_op_type  models, total_ms, mean_share (average fraction of a model's time)
+        by_shape    models, total_ms
+        by_family   family -> op -> mean_share
+    """
+    report: dict = {}
+    for rec in records:
+        profiles = rec.get("op_profile") or {}
+        family = model_family(rec.get("model_name", "?"))
+        for backend, prof in profiles.items():
+            r = report.setdefault(backend, {"models": 0, "by_op_type": {}, "by_shape": {}, "by_family": {}})
+            r["models"] += 1
+            fam = r["by_family"].setdefault(family, {"models": 0, "ops": {}})
+            fam["models"] += 1
+            for op, agg in prof.get("by_op_type", {}).items():
+                o = r["by_op_type"].setdefault(op, {"models": 0, "total_ms": 0.0, "share_sum": 0.0})
+                o["models"] += 1
+                o["total_ms"] += agg["ms"]
+                o["share_sum"] += agg.get("share", 0.0)
+                fam["ops"][op] = fam["ops"].get(op, 0.0) + agg.get("share", 0.0)
+            for key, agg in prof.get("by_shape", {}).items():
+                s = r["by_shape"].setdefault(key, {"models": 0, "total_ms": 0.0})
+                s["models"] += 1
+                s["total_ms"] += agg["ms"]
+
+    for r in report.values():
+        n = r["models"]
+        for o in r["by_op_type"].values():
+            # Averaged over every profiled model (a model without the op contributes 0)
+            o["mean_share"] = round(o.pop("share_sum") / n, 4)
+            o["total_ms"] = round(o["total_ms"], 3)
+        r["by_op_type"] = dict(sorted(r["by_op_type"].items(), key=lambda kv: -kv[1]["mean_share"]))
+        r["by_shape"] = dict(sorted(
+            ((k, {**v, "total_ms": round(v["total_ms"], 3)}) for k, v in r["by_shape"].items()),
+            key=lambda kv: -kv[1]["total_ms"],
+        ))
+        for fam in r["by_family"].values():
+            fam["ops"] = dict(sorted(
+                ((op, round(share / fam["models"], 4)) for op, share in fam["ops"].items()),
+                key=lambda kv: -kv[1],
+            ))
+    return report
+
+
+def print_report(report: dict, top: int = 15) -> None:
+    for backend, r in report.items():
+        print(f"\n=== {backend}: {r['models']} model(s) ===")
+        print(f"{'op type':<28}{'models':>8}{'mean share':>12}{'total ms':>12}")
+        for op, o in list(r["by_op_type"].items())[:top]:
+            print(f"{op:<28}{o['models']:>8}{o['mean_share']:>12.1%}{o['total_ms']:>12.2f}")
+        if r["by_shape"]:
+            print(f"\n{'op type + input shape':<40}{'models':>8}{'total ms':>12}")
+            for key, s in list(r["by_shape"].items())[:top]:
+                print(f"{key:<40}{s['models']:>8}{s['total_ms']:>12.2f}")
+        print("\nTop ops per family:")
+        for family, fam in sorted(r["by_family"].items(), key=lambda kv: -kv[1]["models"])[:top]:
+            ops = ", ".join(f"{op} {share:.0%}" for op, share in list(fam["ops"].items())[:3])
+            print(f"  {family} ({fam['models']}): {ops}")
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Per-operator profiles and corpus hot-op report")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("profile", help="ONNX Runtime per-op profile of ONNX files")
+    p.add_argument("onnx", nargs="+", type=Path)
+    p.add_argument("--iterations", type=int, default=PROFILE_ITERATIONS)
+    r = sub.add_parser("report", help="Aggregate op_profile over the stored records of a device")
+    r.add_argument("--device", default=None, help="Device type (default: this host)")
+    r.add_argument("--top", type=int, default=15)
+    r.add_argument("--json", type=Path, default=None, help="Also write the full report here")
+    args = ap.parse_args()
+
+    if args.cmd == "profile":
+        for path in args.onnx:
+            prof = ort_op_profile(path, iterations=args.iterations)
+            print(f"\n{path.stem}: {prof['total_ms']:.3f} ms in kernels")
+            for op, agg in list(prof["by_op_type"].items())[:10]:
+                print(f"  {op:<24}{agg['count']:>5}  {agg['ms']:>9.3f} ms  {agg['share']:>6.1%}")
+        return
+
+    from ab.vr.cost_model import load_device_records
+    from ab.vr.unity_runner import get_device_type
+
+    report = hot_op_report(load_device_records(args.device or get_device_type()))
+    if not report:
+        raise SystemExit("No records with op_profile; benchmark with --op-profile first")
+    print_report(report, args.top)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSAVED: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Host ONNX Runtime benchmark backend (runs on the machine driving the pipeline)."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+
+ITERATIONS = 20
+WARMUP_ITERATIONS = 5
+
+
+def timing_stats(times_ms: list[float]) -> dict:
+    """Summarise per-iteration timings (ms) in the same layout Unity reports."""
+    if not times_ms:
+        return {"avg_ms": 0.0, "min_ms": 0.0, "max_ms": 0.0, "std_dev_ms": 0.0}
+    avg = sum(times_ms) / len(times_ms)
+    var = sum((t - avg) ** 2 for t in times_ms) / len(times_ms)
+    return {
+        "avg_ms": avg,
+        "min_ms": min(times_ms),
+        "max_ms": max(times_ms),
+        "std_dev_ms": var ** 0.5,
+    }
+
+
+def create_session(onnx_path, providers: list[str] | None = None, intra_op_threads: int | None = None):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+    return ort.InferenceSession(
+        str(onnx_path),
+        sess_options=options,
+        providers=providers or ["CPUExecutionProvider"],
+    )
+
+
+def resolve_input_shape(shape, batch_size: int = 1) -> list[int]:
+    """
+    Turn an ORT input shape (which may hold symbolic dims such as
+    'batch_size') into a concrete one. Only the batch axis may be symbolic.
+    """
+    out = []
+    for i, d in enumerate(shape):
+        if isinstance(d, int) and d > 0:
+            out.append(d)
+        elif i == 0:
+            out.append(batch_size)
+        else:
+            raise ValueError(f"Unsupported symbolic input dim {i}: {d!r}")
+    return out
+
+
+def make_input(shape: list[int]):
+    import numpy as np
+
+    return np.random.rand(*shape).astype(np.float32)
+
+
+def run_ort_benchmark(
+    onnx_path: Path,
+    *,
+    batch_size: int = 1,
+    iterations: int = ITERATIONS,
+    warmup: int = WARMUP_ITERATIONS,
+    providers: list[str] | None = None,
+) -> dict:
+    """
+    Benchmark an ONNX file with ONNX Runtime on the host.
+
+    If the graph has a dynamic batch axis it is fed `batch_size`; a graph with
+    a baked-in batch is run at its own batch size. The result mirrors the
+    Unity result layout (success/error/input_shape/output_shape) with the
+    timing block under "timing".
+    """
+    session = create_session(onnx_path, providers)
+    inp = session.get_inputs()[0]
+    shape = resolve_input_shape(inp.shape, batch_size)
+    feed = {inp.name: make_input(shape)}
+
+    for _ in range(warmup):
+        session.run(None, feed)
+
+    times = []
+    outputs = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        outputs = session.run(None, feed)
+        times.append((time.perf_counter() - start) * 1000.0)
+
+    return {
+        "success": True,
+        "error": "",
+        "backend": session.get_providers()[0],
+        "input_shape": shape,
+        "output_shape": list(outputs[0].shape) if outputs else [],
+        "iterations": iterations,
+        "timing": timing_stats(times),
+    }
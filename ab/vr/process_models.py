@@ -14,8 +14,6 @@ Usage:
     python process_models.py --android-runs 50      # 50 benchmark iterations
 """
 
-import sys
-import os
 import argparse
 import json
 import re
@@ -24,10 +22,19 @@ import time
 import gc
 import logging
 import traceback
+from contextlib import nullcontext
 from pathlib import Path
 
+from ab.vr import metrics, tracing
+from ab.vr.cold_start import parse_perf_test_cold_start, summarize_trials
+from ab.vr.hub_sync import DEFAULT_INTERVAL_SEC, HF_RESULTS_REPO, HubSync, make_hub
 from ab.vr.model_loader import load_models
-from ab.vr.onnx_exporter import export_onnx
+from ab.vr.onnx_exporter import export_onnx_variants, parse_variant_specs, variant_filename
+from ab.vr.retry_policy import RetryPolicy, classify_failure, policy_path
+from ab.vr.scheduler import POLICIES, CostEstimator, TimeBudget, order_models, parse_duration
+from ab.vr.timeouts import TimeoutPolicy
+from ab.vr.work_queue import DEFAULT_LEASE_SEC, WorkQueue
+from ab.vr.worker_pool import DEFAULT_RSS_LIMIT_MB, RecyclingWorker
 from scripts.shape_utils import infer_image_resolution
 import importlib
 import pkgutil
@@ -39,31 +46,37 @@ STAT_DIR = ROOT_DIR / "out" / "nn" / "stat" / "run" / "onnx" / "fp32"
 WORK_DIR = ROOT_DIR / "_work"
 STATE_FILE = WORK_DIR / "processing_state.json"
 ONNX_TEMP = WORK_DIR / "onnx_temp"
+VARIANTS_DIR = WORK_DIR / "variants"
 
 DEVICE_TMP = "/data/local/tmp"
 ORT_PERF = f"{DEVICE_TMP}/onnxruntime_perf_test"
 
 DEFAULT_RUNS = 20
-RESTART_EVERY = 50
 COOLDOWN = 2
 EXPORT_TIMEOUT = 120.0
+# Accuracy is evaluated until its confidence interval is this narrow (see onnx_validator)
+ACC_CI_WIDTH = 0.05
+ACC_CONFIDENCE = 0.95
 MAX_PARAM_MB = 500
 
-for _d in [STAT_DIR, WORK_DIR, ONNX_TEMP]:
-    _d.mkdir(parents=True, exist_ok=True)
-
 # ── Logging ──────────────────────────────────────────────────────────────────
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(WORK_DIR / "processing.log"),
-        logging.StreamHandler(),
-    ],
-)
 logger = logging.getLogger(__name__)
 
 
+def setup_run():
+    """Create the work directories and log to _work/processing.log (once, from main)."""
+    for d in [STAT_DIR, WORK_DIR, ONNX_TEMP]:
+        d.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler(WORK_DIR / "processing.log"),
+            logging.StreamHandler(),
+        ],
+    )
+
+
 # ── ADB helpers ──────────────────────────────────────────────────────────────
 def _wait_for_device():
     """Block until an ADB device comes back online."""
@@ -241,13 +254,15 @@ def run_bench(model_path: str, runs: int, use_nnapi: bool = False) -> dict:
     """
     ep = "-e nnapi" if use_nnapi else ""
     cmd = f"{ORT_PERF} -m {model_path} -r {runs} {ep}"
-    out = adb_shell(cmd)
+    with tracing.span("run_bench", model=Path(model_path).stem, runs=runs, nnapi=use_nnapi):
+        out = adb_shell(cmd)
 
     if not out or "error" in out.lower() or "fail" in out.lower():
         return {"avg": float("inf"), "min": 0, "max": 0, "std": 0,
                 "status": "failed", "error": (out or "empty output")[:300]}
 
-    res = {"avg": 0.0, "min": 0.0, "max": 0.0, "std": 0.0, "status": "ok"}
+    res = {"avg": 0.0, "min": 0.0, "max": 0.0, "std": 0.0, "status": "ok",
+           "cold_start": parse_perf_test_cold_start(out)}
     for pattern, key in [
         (r"(?:average|avg|mean)[^\d]*([\d.]+)", "avg"),
         (r"(?:min|minimum)[^\d]*([\d.]+)", "min"),
@@ -278,11 +293,37 @@ def get_input_size(transform_str: str) -> int:
     return infer_image_resolution(transform_str) or 32
 
 
-def save_state(state: dict):
+def _shared(queue):
+    """Lock for read-modify-write of files other queue workers also write."""
+    return queue.mutex() if queue is not None else nullcontext()
+
+
+def save_state(state: dict, queue=None):
+    if queue is not None:
+        # Several workers share the state file: merge with what is on disk
+        with _shared(queue):
+            disk = json.load(open(STATE_FILE)) if STATE_FILE.exists() else {}
+            processed = list(dict.fromkeys(disk.get("processed", []) + state["processed"]))
+            failed = [n for n in dict.fromkeys(disk.get("failed", []) + state["failed"]) if n not in processed]
+            merged = {**disk, **state, "processed": processed, "failed": failed}
+            for key in ("durations", "export_durations"):
+                merged[key] = {**disk.get(key, {}), **state.get(key, {})}
+            with open(STATE_FILE, "w") as f:
+                json.dump(merged, f, indent=2)
+        return
     with open(STATE_FILE, "w") as f:
         json.dump(state, f, indent=2)
 
 
+def _update_json_entry(path: Path, name: str, value, queue=None) -> None:
+    """Set one key of a shared JSON dict file (all_models.json, skipped_models.json)."""
+    with _shared(queue):
+        data = json.load(open(path)) if path.exists() else {}
+        data[name] = value
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
 def _discover_models_from_arch_hf(
     *,
     limit: int | None = None,
@@ -348,6 +389,104 @@ def _discover_models_from_arch_hf(
     return out
 
 
+def _mark_processed(state: dict, policy, name: str, queue=None) -> None:
+    if name not in state["processed"]:
+        state["processed"].append(name)
+    if name in state["failed"]:
+        state["failed"].remove(name)
+    with _shared(queue):
+        if queue is not None:
+            policy.reload()
+        policy.record_success(name)
+        policy.save()
+
+
+def _needs_accuracy_eval(entry: dict | None, ci_width: float) -> bool:
+    """No cached accuracy, or one measured less precisely than now requested."""
+    if not entry or "accuracy" not in entry:
+        return True
+    ci = entry.get("accuracy_ci")
+    if ci is None:
+        return True  # fixed 100-sample estimate from before sequential evaluation
+    return ci[1] - ci[0] > ci_width + 1e-9 and entry.get("accuracy_stop") != "exhausted"
+
+
+def _export_finished(outcome: str, failure_class: str | None = None, inline_benchmark: bool = False) -> None:
+    """Record an export outcome; with inline Unity benchmarks a model that is not exported also leaves the benchmark plan."""
+    metrics.finished("export", outcome, failure_class)
+    if inline_benchmark and outcome != "done":
+        metrics.finished("benchmark", "skipped" if outcome == "failed" else outcome)
+
+
+def _complete(queue, name: str, duration_sec: float) -> None:
+    if queue is not None and not queue.complete(name, duration_sec):
+        logger.warning(f"   ⚠️  Lease on {name} was lost; another worker owns it now")
+
+
+# ── Scheduling helpers ───────────────────────────────────────────────────────
+def _hf_checkpoint_sizes_mb() -> dict:
+    """model -> checkpoint size (MB) on HF; a proxy for parameter count."""
+    try:
+        from huggingface_hub import HfApi
+        sizes = {}
+        for f in HfApi().list_repo_tree("NN-Dataset/checkpoints-epoch-50", recursive=True):
+            if f.path.endswith(".pth") and getattr(f, "size", None):
+                sizes[Path(f.path).stem] = f.size / (1024 * 1024)
+        return sizes
+    except Exception as e:
+        logger.warning(f"⚠️  Could not list checkpoint sizes: {e}")
+        return {}
+
+
+# ── Resolution study ─────────────────────────────────────────────────────────
+def run_resolution_study(model_configs: dict, model_names: list, args, worker=None) -> None:
+    """Export + benchmark each model at several input sizes; store the curve in its record."""
+    from ab.vr.resolution_sweep import parse_resolutions, run_resolution_sweep
+    from ab.vr.unity_runner import load_model_record, update_model_record
+
+    resolutions = parse_resolutions(args.resolution_sweep)
+    logger.info(f"📐 Resolution sweep at {resolutions} for {len(model_names)} models")
+
+    for idx, name in enumerate(model_names, 1):
+        record = load_model_record(name) or {}
+        if "resolution_curve" in record and not args.force:
+            logger.info(f"   ⏭️  [{idx}/{len(model_names)}] {name}: curve already recorded")
+            continue
+
+        logger.info(f"  [{idx}/{len(model_names)}] {name}")
+        row = model_configs[name].copy()
+        row["nn"] = name
+        prm = row.get("prm", {})
+        if isinstance(prm, str):
+            import ast
+            prm = ast.literal_eval(prm)
+            row["prm"] = prm
+        native = get_input_size(prm.get("transform", ""))
+
+        try:
+            study = run_resolution_sweep(
+                row,
+                resolutions,
+                native_resolution=native,
+                out_dir=VARIANTS_DIR,
+                timeout_sec=args.export_timeout,
+                cache_dir=WORK_DIR / "temp",
+                unity=args.sweep_unity,
+                worker=worker,
+            )
+        except Exception as e:
+            logger.error(f"   ❌ Resolution sweep failed: {e}")
+            continue
+
+        update_model_record(name, {"resolution_curve": study})
+        ok = [p["resolution"] for p in study["curve"] if p["compatible"]]
+        if study["resizable"]:
+            logger.info(f"   ✅ Compatible resolutions: {ok}")
+        else:
+            logger.info(f"   📌 Fixed-resolution model (native {native})")
+        gc.collect()
+
+
 # ── Main pipeline ────────────────────────────────────────────────────────────
 def main():
     ap = argparse.ArgumentParser(description="ONNX model pipeline for VR inference benchmarking")
@@ -356,17 +495,103 @@ def main():
     ap.add_argument("--android-runs", type=int, default=DEFAULT_RUNS)
     ap.add_argument("--skip-device", action="store_true", help="Export ONNX only")
     ap.add_argument("--unity-benchmark", action="store_true", help="Run Unity benchmark after export and delete ONNX file to save space")
+    ap.add_argument("--skip-benchmarked", action="store_true",
+                    help="With --skip-device: do not export models that already have a valid record on this host "
+                         "(a benchmark stage follows; implied by --unity-benchmark)")
     ap.add_argument("--force", action="store_true", help="Reset state")
     ap.add_argument("--dataset", default="cifar-10")
     ap.add_argument("--export-timeout", type=float, default=EXPORT_TIMEOUT)
-    ap.add_argument("--push-hf", action="store_true", help="Push to HuggingFace Hub")
+    ap.add_argument("--push-hf", action="store_true",
+                    help="Sync new/changed ONNX files and records to the HuggingFace Hub in the background")
+    ap.add_argument("--pull-hf", action="store_true",
+                    help="Download records already published for this device before starting")
+    ap.add_argument("--local-hub", type=Path, default=None, metavar="DIR",
+                    help="Use a directory as a stand-in for the Hub (testing)")
+    ap.add_argument("--sync-interval", type=float, default=DEFAULT_INTERVAL_SEC,
+                    help="Seconds between background Hub sync commits")
+    ap.add_argument("--variants", default=None, metavar="SPECS",
+                    help="Extra export variants from the same loaded model, e.g. 'r64,r128:op11,b4' "
+                         "(written to _work/variants/<model>/)")
+    ap.add_argument("--resolution-sweep", nargs="?", const="", default=None, metavar="SIZES",
+                    help="Study mode: latency-vs-resolution curve per model (default sizes: 32,64,96,128,160,224)")
+    ap.add_argument("--sweep-unity", action="store_true",
+                    help="Also run Unity for every resolution in --resolution-sweep")
+    ap.add_argument("--dedup", choices=["off", "reuse", "defer"], default="off",
+                    help="Structural-twin policy for --unity-benchmark (see benchmark_models.run_benchmarks)")
+    ap.add_argument("--skip-over-budget", type=float, default=None, metavar="HZ",
+                    help="With --unity-benchmark: skip models predicted to miss this frame rate")
+    ap.add_argument("--op-profile", action="store_true",
+                    help="With --unity-benchmark: also record per-operator times (see op_profiler.py)")
+    ap.add_argument("--cold-start", type=int, default=0, metavar="TRIALS",
+                    help="Cold-start trials per backend: model load, session creation, first and warm inference "
+                         "(Android: each run already gives one; see cold_start.py)")
+    ap.add_argument("--archive-quota-gb", type=float, default=None, metavar="GB",
+                    help="With --unity-benchmark: archive each benchmarked ONNX (zstd, LRU quota) instead of deleting it")
+    ap.add_argument("--work-quota-gb", type=float, default=None, metavar="GB",
+                    help="Disk budget for the _work caches (temp, data, onnx_temp, sanity_onnx); "
+                         "evicts unneeded entries and throttles export when full (see disk_quota.py)")
+    ap.add_argument("--min-free-gb", type=float, default=None, metavar="GB",
+                    help="With --work-quota-gb: also keep this much disk free (default: 5)")
+    ap.add_argument("--fixed-timeouts", action="store_true",
+                    help="Always use --export-timeout instead of per-model adaptive timeouts")
+    ap.add_argument("--timeout-multiplier", type=float, default=None,
+                    help="Safety multiplier over the estimated duration (default: 3)")
+    ap.add_argument("--timeout-floor", type=float, default=None, help="Minimum adaptive timeout (s)")
+    ap.add_argument("--timeout-ceiling", type=float, default=None, help="Maximum adaptive timeout (s)")
+    ap.add_argument("--schedule", choices=POLICIES, default="alphabetical",
+                    help="Processing order by estimated cost")
+    ap.add_argument("--time-budget", default=None, metavar="DURATION",
+                    help="Wall-clock budget, e.g. 8h, 90m, 3600; models that no longer fit are deferred")
+    ap.add_argument("--batch-sweep", default=None, metavar="SIZES",
+                    help="Comma-separated batch sizes for the Unity throughput sweep (with --unity-benchmark)")
+    ap.add_argument("--cadence", default=None, metavar="HZ",
+                    help="Comma-separated frame rates for the cadence benchmark (with --unity-benchmark)")
+    ap.add_argument("--cadence-sec", type=float, default=10.0, help="Seconds per --cadence rate")
+    ap.add_argument("--acc-ci-width", type=float, default=ACC_CI_WIDTH,
+                    help="Evaluate accuracy until its confidence interval is at most this wide (0.05 = ±2.5 points)")
+    ap.add_argument("--acc-confidence", type=float, default=ACC_CONFIDENCE,
+                    help="Confidence level of the accuracy interval")
+    ap.add_argument("--worker-rss-mb", type=float, default=DEFAULT_RSS_LIMIT_MB,
+                    help="Recycle the export / accuracy workers once their RSS exceeds this (0 = never)")
+    ap.add_argument("--queue", type=Path, default=None, metavar="DB",
+                    help="Share the model list with other processes/hosts through this SQLite work queue")
+    ap.add_argument("--lease-sec", type=float, default=DEFAULT_LEASE_SEC,
+                    help="Work-queue lease length; a worker that stops heartbeating loses its model after this")
+    ap.add_argument("--trace", nargs="?", const="", default=None, metavar="EVENTS",
+                    help="Write a Chrome trace of every pipeline stage (default: _work/traces/<timestamp>.*)")
+    ap.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                    help="Serve Prometheus metrics (stage durations, failures, throughput, ETA) on localhost:PORT")
+    ap.add_argument("--metrics-file", type=Path, default=None,
+                    help="Rewrite the Prometheus metrics into this file every few seconds")
     args = ap.parse_args()
+    setup_run()
+    extra_variants = parse_variant_specs(args.variants)
+
+    # Tracing started by main.py is inherited through the environment and reported there
+    owns_trace = args.trace is not None and not tracing.enabled()
+    if owns_trace:
+        tracing.start(Path(args.trace) if args.trace else None)
+    # None when main.py already runs the exporter for the whole pipeline
+    metrics_exporter = metrics.start(args.metrics_port, args.metrics_file)
 
     # ── State & JSON tracking ────────────────────────────────────────────
-    if args.force and STATE_FILE.exists():
+    if args.force and args.resolution_sweep is None and STATE_FILE.exists():
         STATE_FILE.unlink()
     state = json.load(open(STATE_FILE)) if STATE_FILE.exists() else {"processed": [], "failed": []}
     
+    hub_sync = None
+    if args.push_hf or args.pull_hf:
+        hub_sync = HubSync(
+            make_hub(HF_RESULTS_REPO, args.local_hub),
+            [ONNX_TEMP, STAT_DIR],
+            interval_sec=args.sync_interval,
+        )
+    if args.pull_hf:
+        try:
+            logger.info(f"☁️  Pulled {hub_sync.pull(STAT_DIR)} published record(s)")
+        except Exception as e:
+            logger.warning(f"⚠️  Could not pull published records: {e}")
+
     # Track results globally
     all_models_json = STAT_DIR / "all_models.json"
     skipped_models_json = STAT_DIR / "skipped_models.json"
@@ -413,12 +638,107 @@ def main():
         model_names = list(model_configs.keys())
         logger.info(f"Found {len(model_names)} models to process")
 
-    remaining = [m for m in model_names if m not in state["processed"] and m not in state["failed"]]
+    if args.resolution_sweep is not None:
+        with RecyclingWorker("Export", args.worker_rss_mb) as worker:
+            run_resolution_study(model_configs, model_names, args, worker)
+        if owns_trace:
+            _report_trace()
+        if metrics_exporter is not None:
+            metrics.stop()
+        return
+
+    # Failed models come back only when the retry policy allows it (transient
+    # failure past its backoff); quarantined ones need an explicit release.
+    export_policy = RetryPolicy(policy_path("export"))
+    queue = WorkQueue(args.queue, lease_sec=args.lease_sec) if args.queue else None
+    done_elsewhere = set(queue.names("done")) if queue is not None else set()
+    remaining = [
+        m for m in model_names
+        if m not in state["processed"] and m not in done_elsewhere
+        and (m not in state["failed"] or export_policy.should_attempt(m)[0])
+    ]
+    if args.skip_device and (args.unity_benchmark or args.skip_benchmarked) and not args.force:
+        # Valid records for this host, including ones pulled from the Hub (--pull-hf):
+        # the Unity stage that follows would skip these models, so they are not exported
+        # unless this run still has other work for them
+        from ab.vr.unity_runner import load_model_record
+
+        def measured_here(m):
+            record = load_model_record(m) or {}
+            if record.get("valid") is not True:
+                return False
+            # --batch-sweep still needs the export for records without a throughput curve
+            if args.batch_sweep and "throughput_curve" not in record:
+                return False
+            if any(not (VARIANTS_DIR / m / variant_filename(m, v)).exists() for v in extra_variants):
+                return False
+            return not _needs_accuracy_eval(results.get(m), args.acc_ci_width)
+
+        measured = {m for m in remaining if measured_here(m)}
+        if measured:
+            logger.info(f"⏭️  {len(measured)} model(s) already benchmarked on this device; not exporting them")
+            remaining = [m for m in remaining if m not in measured]
     if not remaining:
         logger.info("✅ All models already processed!")
+        if owns_trace:
+            _report_trace()
+        if metrics_exporter is not None:
+            metrics.stop()
         return
 
+    # ── Scheduling ───────────────────────────────────────────────────────
+    durations = state.setdefault("durations", {})
+    export_durations = state.setdefault("export_durations", {})
+    checkpoint_sizes = None
+    budget = TimeBudget(parse_duration(args.time_budget))
+    estimator = None
+    if args.schedule != "alphabetical" or budget.enabled:
+        checkpoint_sizes = _hf_checkpoint_sizes_mb()
+        estimator = CostEstimator(durations, checkpoint_sizes)
+        costs = {m: estimator.estimate(m) for m in remaining}
+        accuracy = {m: float(model_configs[m].get("accuracy", 0) or 0) for m in remaining}
+        remaining = order_models(remaining, args.schedule, costs, accuracy)
+        logger.info(f"🗓️  Schedule: {args.schedule}"
+                    + (f", budget {budget.remaining() / 3600:.2f} h" if budget.enabled else ""))
+
     logger.info(f"📋 {len(remaining)} models to process")
+    metrics.plan("export", len(remaining))
+    # Inline Unity benchmarks run one model per run_benchmarks call; plan their stage once here
+    inline_benchmark = args.skip_device and getattr(args, "unity_benchmark", False)
+    if inline_benchmark:
+        metrics.plan("benchmark", len(remaining))
+
+    # ── Work queue ───────────────────────────────────────────────────────
+    # Models are claimed one lease at a time instead of iterated, so other
+    # processes/hosts on the same queue never work on the same model.
+    claimable = set(remaining)
+    if queue is not None:
+        added = queue.add(remaining)
+        logger.info(f"🔗 Work queue {args.queue} as {queue.worker_id}: {added} new, {queue.counts()}")
+        work_items = queue.claims(claimable)
+    else:
+        work_items = iter(remaining)
+
+    # ── Export timeouts ──────────────────────────────────────────────────
+    # --export-timeout is the fallback; with history, each model gets
+    # clamp(estimate × multiplier, floor, ceiling) (see timeouts.py)
+    if checkpoint_sizes is None and export_durations and not args.fixed_timeouts:
+        checkpoint_sizes = _hf_checkpoint_sizes_mb()
+    export_timeouts = TimeoutPolicy(
+        "export",
+        export_durations,
+        checkpoint_sizes,
+        adaptive=not args.fixed_timeouts,
+        default=args.export_timeout,
+        multiplier=args.timeout_multiplier,
+        floor=args.timeout_floor,
+        ceiling=args.timeout_ceiling,
+    )
+    # The same overrides for inline Unity benchmarks (--unity-benchmark), as main.py builds them
+    bench_timeout_overrides = (
+        {"adaptive": False} if args.fixed_timeouts else
+        {"multiplier": args.timeout_multiplier, "floor": args.timeout_floor, "ceiling": args.timeout_ceiling}
+    )
 
     # ── Device setup ─────────────────────────────────────────────────────
     device_name = "local"
@@ -447,21 +767,67 @@ def main():
                 "You MUST install it before running pipeline."
             )
 
+    # ── Disk quota ───────────────────────────────────────────────────────
+    quota = None
+    if args.work_quota_gb is not None:
+        from ab.vr.disk_quota import MIN_FREE_GB, DiskQuota
+        quota = DiskQuota(
+            args.work_quota_gb,
+            work_dir=WORK_DIR,
+            min_free_gb=MIN_FREE_GB if args.min_free_gb is None else args.min_free_gb,
+            archive_quota_gb=args.archive_quota_gb,
+        )
+
+    # ── Workers ──────────────────────────────────────────────────────────
+    # Export and accuracy evaluation run in long-lived workers that are only
+    # replaced when their RSS crosses --worker-rss-mb; this process keeps the
+    # discovered models and state for the whole run.
+    export_worker = RecyclingWorker("Export", args.worker_rss_mb)
+    eval_worker = RecyclingWorker("Eval", args.worker_rss_mb)
+
+    if args.push_hf:
+        logger.info(f"☁️  Syncing to {HF_RESULTS_REPO} every {args.sync_interval:.0f}s")
+        hub_sync.start()
+
     # ── Process loop ─────────────────────────────────────────────────────
-    session_count = 0
-    for idx, name in enumerate(remaining, 1):
-        time.sleep(COOLDOWN)
+    for idx, name in enumerate(work_items, 1):
+        with tracing.span("cooldown"):
+            time.sleep(COOLDOWN)
+
+        if budget.enabled:
+            if budget.expired():
+                logger.info("⏰ Time budget exhausted")
+                if queue is not None:
+                    queue.release(name)
+                break
+            estimate = estimator.estimate(name)
+            if not budget.fits(estimate):
+                logger.info(f"   ⏭️  Deferring {name} (est. {estimate:.0f}s > {budget.remaining():.0f}s left)")
+                if queue is not None:
+                    claimable.discard(name)
+                    queue.release(name)
+                _export_finished("deferred", inline_benchmark=inline_benchmark)
+                continue
 
-        if session_count >= RESTART_EVERY:
-            logger.info("🔄 Restarting process for memory cleanup...")
-            save_state(state)
-            time.sleep(5)
-            os.execv(sys.executable, [sys.executable] + sys.argv)
+        if quota is not None:
+            # Exports of this run wait for Stage 2 unless benchmarked inline
+            quota.pin_models(
+                [m for m in remaining if m not in state["processed"]],
+                args.dataset,
+                keep_exports=not getattr(args, "unity_benchmark", False),
+            )
+            if not quota.wait_for_space():
+                logger.warning("💾 Disk quota still exceeded by pinned entries; deferring the remaining models")
+                if queue is not None:
+                    queue.release(name)
+                _export_finished("deferred", inline_benchmark=inline_benchmark)
+                break
 
         logger.info(f"\n{'='*55}")
         logger.info(f"  [{idx}/{len(remaining)}] {name}")
         logger.info(f"{'='*55}")
 
+        model_start = time.time()
         try:
             row = model_configs[name]
             prm = row.get("prm", {})
@@ -477,54 +843,128 @@ def main():
 
             # ── 1. Export ONNX ───────────────────────────────────────────
             onnx_file = ONNX_TEMP / f"{name}.onnx"
+            specs = []
             if not onnx_file.exists():
-                logger.info(f"   Exporting ONNX ({target_h}x{target_h})...")
+                specs.append({"dest": onnx_file})
+            for v in extra_variants:
+                dest = VARIANTS_DIR / name / variant_filename(name, v)
+                if not dest.exists():
+                    specs.append({**v, "dest": dest})
+
+            if specs:
+                logger.info(f"   Exporting ONNX ({target_h}x{target_h}, {len(specs)} artifact(s))...")
                 row_copy = row.copy()
                 row_copy["nn"] = name
-                export_onnx(row_copy, onnx_file, timeout_sec=args.export_timeout)
-                logger.info(f"   ✅ Exported: {onnx_file.name}")
+                # One model load for all artifacts; scale the budget with their count
+                timeout_sec = export_timeouts.timeout_for(name, scale=len(specs))
+                export_start = time.time()
+                try:
+                    with tracing.span("export", model=name, artifacts=len(specs)):
+                        exported = export_onnx_variants(
+                            row_copy, specs, timeout_sec=timeout_sec, cache_dir=WORK_DIR / "temp",
+                            worker=export_worker,
+                        )
+                except TimeoutError:
+                    timeout_sec = export_timeouts.retry_timeout(timeout_sec)
+                    logger.warning(f"   ⏱️  Export timed out; retrying once with {timeout_sec:.0f}s")
+                    export_start = time.time()
+                    with tracing.span("export", model=name, artifacts=len(specs), retry=True):
+                        exported = export_onnx_variants(
+                            row_copy, specs, timeout_sec=timeout_sec, cache_dir=WORK_DIR / "temp",
+                            worker=export_worker,
+                        )
+                export_durations[name] = round((time.time() - export_start) / len(specs), 2)
+                for res in exported:
+                    if not res["ok"]:
+                        if Path(res["dest"]) == onnx_file:
+                            raise RuntimeError(res["error"])
+                        logger.warning(f"   ⚠️  Variant {Path(res['dest']).name} failed: {res['error']}")
+                    else:
+                        logger.info(f"   ✅ Exported: {Path(res['dest']).name}")
             else:
                 logger.info(f"   ⏭️  ONNX already exists")
 
             # ── 1.5 Evaluate ONNX Accuracy ─────────────────────────────────
-            acc = 0.0
-            if name not in results or "accuracy" not in results[name]:
+            cached = results.get(name) or {}
+            acc = cached.get("accuracy", 0.0)
+            acc_fields = (
+                {k: v for k, v in cached.items() if k.startswith("accuracy_")} if "accuracy" in cached else {}
+            )
+            if _needs_accuracy_eval(results.get(name), args.acc_ci_width):
                 try:
-                    from ab.vr.onnx_validator import eval_onnx_accuracy
-                    logger.info(f"   Evaluating ONNX accuracy...")
+                    logger.info(f"   Evaluating ONNX accuracy (±{args.acc_ci_width / 2:.3f} "
+                                f"at {args.acc_confidence:.0%})...")
                     data_root = WORK_DIR / "data"
                     data_root.mkdir(parents=True, exist_ok=True)
-                    acc = eval_onnx_accuracy(onnx_file, target_h, data_root)
-                    logger.info(f"   🎯 Accuracy: {acc:.4f}")
+                    with tracing.span("accuracy", model=name):
+                        estimate = eval_worker.call(
+                            "ab.vr.onnx_validator:estimate_onnx_accuracy", onnx_file, target_h, data_root,
+                            ci_width=args.acc_ci_width, confidence=args.acc_confidence,
+                        )
+                    acc = estimate.pop("accuracy")
+                    acc_fields = estimate
+                    lo, hi = estimate["accuracy_ci"]
+                    logger.info(f"   🎯 Accuracy: {acc:.4f} [{lo:.4f}, {hi:.4f}] "
+                                f"from {estimate['accuracy_samples']} samples")
                 except Exception as e:
-                    logger.warning(f"   ⚠️  Could not evaluate accuracy: {e}")
+                    # A cached estimate stays as it was; without one the model gets 0.0 and no interval
+                    logger.warning(f"   ⚠️  Could not evaluate accuracy: {e}"
+                                   + (f"; keeping cached {acc:.4f}" if "accuracy" in cached else ""))
             else:
                 acc = results[name]["accuracy"]
                 logger.info(f"   🎯 Cached Accuracy: {acc:.4f}")
 
             results[name] = {
                 "accuracy": acc,
+                **acc_fields,
                 "transform": transform
             }
-            with open(all_models_json, "w") as f:
-                json.dump(results, f, indent=2)
+            if extra_variants:
+                results[name]["variants"] = sorted(
+                    p.name for p in (VARIANTS_DIR / name).glob("*.onnx")
+                )
+            _update_json_entry(all_models_json, name, results[name], queue)
 
             if args.skip_device:
                 if getattr(args, "unity_benchmark", False):
                     try:
+                        from ab.vr.artifact_store import archive_or_delete
                         from ab.vr.benchmark_models import run_benchmarks
                         logger.info(f"   🎮 Running Unity Benchmark for {name}...")
-                        run_benchmarks(models=[name])
-                        # Delete the file
+                        batch_sizes = None
+                        if args.batch_sweep:
+                            from ab.vr.batch_sweep import parse_batch_sizes
+                            batch_sizes = parse_batch_sizes(args.batch_sweep)
+                        cadence_rates = None
+                        if args.cadence:
+                            from ab.vr.cadence import parse_rates
+                            cadence_rates = parse_rates(args.cadence)
+                        with tracing.span("unity_benchmark", model=name):
+                            run_benchmarks(
+                                models=[name],
+                                batch_sizes=batch_sizes,
+                                dedup=args.dedup,
+                                frame_budget_hz=args.skip_over_budget,
+                                op_profile=args.op_profile,
+                                cold_start_trials=args.cold_start,
+                                cadence_rates=cadence_rates,
+                                cadence_sec=args.cadence_sec,
+                                timeout_overrides=bench_timeout_overrides,
+                                plan_metrics=False,
+                            )
+                        # Archive (or delete) the file
                         if onnx_file.exists():
-                            logger.info(f"   🗑️ Deleting {onnx_file.name} to save space...")
-                            onnx_file.unlink()
+                            outcome = archive_or_delete(onnx_file, args.archive_quota_gb)
+                            logger.info(f"   🗑️ {outcome.capitalize()} {onnx_file.name} to save space")
+                        onnx_file.with_suffix(".onnx.data").unlink(missing_ok=True)
                     except Exception as e:
                         logger.error(f"   ❌ Unity Benchmark failed: {e}")
                 
-                state["processed"].append(name)
-                save_state(state)
-                session_count += 1
+                _mark_processed(state, export_policy, name, queue)
+                durations[name] = round(time.time() - model_start, 2)
+                save_state(state, queue)
+                _complete(queue, name, durations[name])
+                metrics.finished("export", "done")
                 gc.collect()
                 continue
 
@@ -532,10 +972,11 @@ def main():
             dev_path = f"{DEVICE_TMP}/{name}.onnx"
             logger.info(f"   📤 Pushing to device...")
             for attempt in range(3):
-                r = subprocess.run(
-                    ["adb", "push", str(onnx_file), dev_path],
-                    capture_output=True, text=True,
-                )
+                with tracing.span("adb_push", model=name, attempt=attempt + 1):
+                    r = subprocess.run(
+                        ["adb", "push", str(onnx_file), dev_path],
+                        capture_output=True, text=True,
+                    )
                 if r.returncode == 0:
                     break
                 logger.warning(f"   ⚠️  Push attempt {attempt+1} failed, retrying...")
@@ -550,6 +991,20 @@ def main():
             logger.info(f"   🎯 Benchmarking NNAPI ({args.android_runs} runs)...")
             nnapi = run_bench(dev_path, args.android_runs, use_nnapi=True)
 
+            # Extra single-run processes for cold-start trials (each run above is one)
+            cold_start = {}
+            if args.cold_start > 1:
+                logger.info(f"   🧊 Cold-start trials ({args.cold_start} per backend)...")
+            for key, res, nnapi_ep in (("android_cpu", cpu, False), ("android_nnapi", nnapi, True)):
+                if res["status"] != "ok":
+                    continue
+                trials = [res["cold_start"]]
+                for _ in range(args.cold_start - 1):
+                    trials.append(run_bench(dev_path, 1, use_nnapi=nnapi_ep).get("cold_start") or {})
+                summary = summarize_trials([t for t in trials if t])
+                if summary is not None:
+                    cold_start[key] = summary
+
             # Clean up device
             adb_shell(f"rm {dev_path}")
 
@@ -565,6 +1020,13 @@ def main():
             mem = get_android_memory()
             analytics = get_device_analytics()
 
+            graph_profile = None
+            try:
+                from ab.vr.graph_profiler import profile_graph, profile_summary
+                graph_profile = profile_summary(profile_graph(onnx_file))
+            except Exception as e:
+                logger.warning(f"   ⚠️  Could not profile graph: {e}")
+
             report = {
                 "model_name": name,
                 "device_type": device_name.replace("_", " "),
@@ -586,7 +1048,9 @@ def main():
                 "in_dim_0": 1, "in_dim_1": 3,
                 "in_dim_2": target_h, "in_dim_3": target_h,
                 "accuracy": acc,
+                "graph_profile": graph_profile,
                 "device_analytics": analytics,
+                "cold_start": cold_start or None,
             }
             if nnapi["status"] == "failed":
                 report["nnapi_error"] = nnapi.get("error", "")
@@ -601,9 +1065,11 @@ def main():
             logger.info(f"   ✅ Done — best: {winner} = {report['duration']} µs")
             logger.info(f"   📁 {report_path}")
 
-            state["processed"].append(name)
-            save_state(state)
-            session_count += 1
+            _mark_processed(state, export_policy, name, queue)
+            durations[name] = round(time.time() - model_start, 2)
+            save_state(state, queue)
+            _complete(queue, name, durations[name])
+            metrics.finished("export", "done")
             gc.collect()
 
         except Exception as e:
@@ -614,33 +1080,38 @@ def main():
                     _onnx = ONNX_TEMP / f"{name}.onnx"
                     if _onnx.exists():
                         _onnx.unlink()
+                    _onnx.with_suffix(".onnx.data").unlink(missing_ok=True)
                 except:
                     pass
-            state["failed"].append(name)
-            save_state(state)
+            if name not in state["failed"]:
+                state["failed"].append(name)
+            save_state(state, queue)
+            failure_type = classify_failure(str(e))
+            with _shared(queue):
+                if queue is not None:
+                    export_policy.reload()
+                decision = export_policy.record_failure(name, failure_type, str(e))
+                export_policy.save()
+            logger.info(f"   ↪ {failure_type} → {decision}")
+            _export_finished("failed", failure_type, inline_benchmark)
+            if queue is not None:
+                queue.fail(name, str(e))
             skipped[name] = str(e)
-            with open(skipped_models_json, "w") as f:
-                json.dump(skipped, f, indent=2)
+            _update_json_entry(skipped_models_json, name, skipped[name], queue)
+
+        finally:
+            tracing.complete("model", model_start, time.time() - model_start, model=name)
+
+    if queue is not None:
+        work_items.close()  # stop heartbeating a model left claimed by a break
+    for w in (export_worker, eval_worker):
+        w.close()
+        logger.info(f"   {w.name} worker: peak RSS {w.peak_rss_mb:.0f} MB, recycled {w.recycles}x")
 
     # ── Upload to HuggingFace ────────────────────────────────────────────
     if args.push_hf:
         try:
-            from huggingface_hub import create_repo, upload_folder
-            logger.info("☁️ Uploading to HuggingFace Hub...")
-            hf_repo = "NN-Dataset/onnx"
-            create_repo(hf_repo, repo_type="model", exist_ok=True)
-            upload_folder(
-                folder_path=str(ONNX_TEMP),
-                repo_id=hf_repo,
-                repo_type="model",
-            )
-            # Also upload the JSONs
-            upload_folder(
-                folder_path=str(STAT_DIR),
-                repo_id=hf_repo,
-                repo_type="model",
-            )
-            logger.info("✅ Upload complete")
+            hub_sync.stop()
         except Exception as e:
             logger.error(f"❌ HF Upload failed: {e}")
 
@@ -651,8 +1122,26 @@ def main():
     logger.info(f"{'='*55}")
     if state["failed"]:
         logger.info(f"  Failed: {', '.join(state['failed'])}")
-        logger.info("  Re-run to retry failed models.")
+        quarantined = export_policy.quarantined()
+        if quarantined:
+            logger.info(f"  Quarantined: {', '.join(quarantined)}")
+            logger.info("  Release with: python -m ab.vr.retry_policy release --stage export <models|--all>")
+        logger.info("  Re-run to retry transient failures (after their backoff).")
     logger.info(f"  Reports: {STAT_DIR.resolve()}")
+    if owns_trace:
+        _report_trace()
+    if metrics_exporter is not None:
+        metrics.stop()
+
+
+def _report_trace():
+    trace_path, summary = tracing.finish()
+    if trace_path is None:
+        return
+    logger.info("  Stage summary:")
+    for line in summary:
+        logger.info(f"    {line}")
+    logger.info(f"  📈 Trace: {trace_path} (open in https://ui.perfetto.dev)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+"""Input-resolution latency scaling study (latency-vs-resolution curve per model)."""
+
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+from ab.vr.onnx_exporter import export_onnx_variants, variant_filename
+from ab.vr.ort_runner import run_ort_benchmark
+
+
+DEFAULT_RESOLUTIONS = (32, 64, 96, 128, 160, 224)
+
+
+def parse_resolutions(spec: str | None) -> list[int]:
+    """'32,64,128' -> [32, 64, 128]; empty/None -> DEFAULT_RESOLUTIONS."""
+    if not spec:
+        return list(DEFAULT_RESOLUTIONS)
+    sizes = sorted({int(s) for s in spec.split(",") if s.strip()})
+    if any(r <= 0 for r in sizes):
+        raise ValueError(f"Resolutions must be positive: {spec!r}")
+    return sizes
+
+
+def _graph_input_resolution(onnx_path: Path) -> int | None:
+    """Spatial size baked into the exported graph input (None if symbolic)."""
+    import onnx
+
+    model = onnx.load(str(onnx_path), load_external_data=False)
+    dims = model.graph.input[0].type.tensor_type.shape.dim
+    if len(dims) < 4 or not dims[-1].HasField("dim_value"):
+        return None
+    return int(dims[-1].dim_value)
+
+
+def run_resolution_sweep(
+    row,
+    resolutions,
+    *,
+    native_resolution: int,
+    out_dir: Path,
+    timeout_sec: float,
+    cache_dir: Path | None = None,
+    unity: bool = False,
+    keep_artifacts: bool = False,
+    worker=None,
+) -> dict:
+    """
+    Export `row` at every resolution (one model load, see export_onnx_variants)
+    and benchmark each artifact with ONNX Runtime (and Unity if `unity`).
+
+    A resolution is incompatible if export fails, ONNX Runtime cannot run it,
+    or its output shape differs from the native one (e.g. a Linear layer sized
+    for the native feature map). A model is "resizable" only if at least one
+    non-native resolution is compatible.
+    """
+    name = row["nn"]
+    resolutions = sorted(set(int(r) for r in resolutions) | {int(native_resolution)})
+    model_dir = Path(out_dir) / name
+    specs = [
+        {"resolution": r, "dest": model_dir / variant_filename(name, {"resolution": r})}
+        for r in resolutions
+    ]
+
+    try:
+        exported = export_onnx_variants(
+            row, specs, timeout_sec=timeout_sec * len(specs), cache_dir=cache_dir, worker=worker
+        )
+
+        points = []
+        native_out = None
+        for res in exported:
+            point = {"resolution": res["resolution"], "compatible": False}
+            if not res["ok"]:
+                point["error"] = f"export: {res['error']}"[:300]
+                points.append(point)
+                continue
+            try:
+                got = _graph_input_resolution(res["dest"])
+                if got is not None and got != res["resolution"]:
+                    raise RuntimeError(f"graph input is fixed at {got}")
+                ort_res = run_ort_benchmark(Path(res["dest"]))
+                point["output_shape"] = ort_res["output_shape"]
+                point["ort_cpu_ms"] = ort_res["timing"]["avg_ms"]
+                point["compatible"] = True
+            except Exception as e:
+                point["error"] = f"ort: {e}"[:300]
+            if point["compatible"] and unity:
+                from ab.vr.unity_runner import run_unity_benchmark
+
+                try:
+                    u = run_unity_benchmark(Path(res["dest"]))
+                    if u.get("success"):
+                        point["unity_cpu_ms"] = (u.get("cpu") or {}).get("avg_ms", 0)
+                        point["unity_gpu_ms"] = (u.get("gpu") or {}).get("avg_ms", 0)
+                    else:
+                        point["unity_error"] = (u.get("error") or "")[:300]
+                except Exception as e:
+                    point["unity_error"] = str(e)[:300]
+            if res["resolution"] == native_resolution and point["compatible"]:
+                native_out = point["output_shape"]
+            points.append(point)
+    finally:
+        if not keep_artifacts:
+            shutil.rmtree(model_dir, ignore_errors=True)
+
+    # A model whose logits change shape with resolution is not resolution-agnostic
+    if native_out is not None:
+        for p in points:
+            if p["compatible"] and p["output_shape"] != native_out:
+                p["compatible"] = False
+                p["error"] = f"output shape {p['output_shape']} != native {native_out}"
+
+    return {
+        "native_resolution": int(native_resolution),
+        "resizable": any(
+            p["compatible"] for p in points if p["resolution"] != native_resolution
+        ),
+        "curve": points,
+    }
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Failure-class-aware retry / backoff / quarantine policy.
+
+Transient failures (timeouts, lost device, missing results) are retried a
+bounded number of times with exponential backoff; deterministic ones
+(unsupported operators, import errors) are quarantined immediately; native
+crashes are quarantined once they repeat. Quarantined models are skipped
+until released explicitly.
+
+Usage:
+    python -m ab.vr.retry_policy list
+    python -m ab.vr.retry_policy release AirNet-626c3eb9 ResNet
+    python -m ab.vr.retry_policy release --all --stage export
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from ab.vr.unity_runner import ROOT_DIR, get_device_type, sanitize_filename
+
+
+WORK_DIR = ROOT_DIR / "_work"
+
+TRANSIENT_FAILURES = {"timeout", "device_lost", "missing_results", "download_error"}
+DETERMINISTIC_FAILURES = {"unsupported_operator", "import_error"}
+# Quarantined once seen this many times
+REPEAT_LIMITS = {"unity_native_crash": 2, "worker_crash": 2}
+
+MAX_TRANSIENT_RETRIES = 3
+MAX_UNKNOWN_RETRIES = 1
+BACKOFF_BASE_SEC = 300.0
+BACKOFF_MAX_SEC = 6 * 3600.0
+
+
+def classify_failure(error: str) -> str:
+
+    error = error.lower()
+
+    if "3221225477" in error:
+        return "unity_native_crash"
+
+    if "timeout" in error or "timed out" in error or ("exceeded" in error and "limit" in error):
+        return "timeout"
+
+    if "device not found" in error or "device lost" in error or "device offline" in error:
+        return "device_lost"
+
+    if "no unity results json found" in error:
+        return "missing_results"
+
+    if "unsupported" in error:
+        return "unsupported_operator"
+
+    if "failed to import" in error or "has no net class" in error:
+        return "import_error"
+
+    if "failed to load weights" in error:
+        return "download_error"
+
+    if "exited without result" in error:
+        return "worker_crash"
+
+    return "unknown"
+
+
+def policy_path(stage: str, device_type: str | None = None) -> Path:
+    """State file per stage; the benchmark stage is tracked per device."""
+    if stage == "export":
+        return WORK_DIR / "retry_state_export.json"
+    device_type = device_type or get_device_type()
+    return WORK_DIR / f"retry_state_benchmark_{sanitize_filename(device_type)}.json"
+
+
+class RetryPolicy:
+    """Persistent per-model retry bookkeeping for one pipeline stage."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: dict = {}
+        self.reload()
+
+    def reload(self) -> None:
+        """Re-read the state file (another process may have written it)."""
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except json.JSONDecodeError:
+                self.entries = {}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+        tmp.replace(self.path)
+
+    def should_attempt(self, name: str, now: float | None = None) -> tuple[bool, str]:
+        """(attempt?, reason). Models without history are always attempted."""
+        entry = self.entries.get(name)
+        if not entry:
+            return True, "new"
+        if entry.get("quarantined"):
+            return False, f"quarantined ({entry.get('quarantine_reason', '')})"
+        now = time.time() if now is None else now
+        wait = entry.get("next_attempt_at", 0) - now
+        if wait > 0:
+            return False, f"backoff ({wait / 60:.0f} min left)"
+        return True, "retry"
+
+    def record_failure(self, name: str, failure_type: str, error: str = "") -> str:
+        """Register a failure; returns the decision: 'retry' or 'quarantine'."""
+        entry = self.entries.setdefault(name, {"attempts": 0, "failures": {}})
+        entry["attempts"] += 1
+        entry["failures"][failure_type] = entry["failures"].get(failure_type, 0) + 1
+        entry["last_failure"] = failure_type
+        entry["last_error"] = (error or "")[:500]
+        entry["last_attempt_at"] = time.time()
+
+        reason = None
+        if failure_type in DETERMINISTIC_FAILURES:
+            reason = failure_type
+        elif failure_type in REPEAT_LIMITS:
+            if entry["failures"][failure_type] >= REPEAT_LIMITS[failure_type]:
+                reason = f"{failure_type} x{entry['failures'][failure_type]}"
+        else:
+            limit = MAX_TRANSIENT_RETRIES if failure_type in TRANSIENT_FAILURES else MAX_UNKNOWN_RETRIES
+            if entry["attempts"] > limit:
+                reason = f"retries exhausted ({failure_type})"
+
+        if reason:
+            entry["quarantined"] = True
+            entry["quarantine_reason"] = reason
+            entry.pop("next_attempt_at", None)
+            return "quarantine"
+
+        # Crashes below their repeat limit are retried on the next run without delay
+        backoff = 0.0
+        if failure_type not in REPEAT_LIMITS:
+            backoff = min(BACKOFF_BASE_SEC * 2 ** (entry["attempts"] - 1), BACKOFF_MAX_SEC)
+        entry["next_attempt_at"] = time.time() + backoff
+        return "retry"
+
+    def record_success(self, name: str) -> None:
+        self.entries.pop(name, None)
+
+    def quarantined(self) -> list[str]:
+        return sorted(n for n, e in self.entries.items() if e.get("quarantined"))
+
+    def release(self, names: list[str] | None = None) -> list[str]:
+        """Clear quarantine + history for `names` (all quarantined models if None)."""
+        targets = self.quarantined() if names is None else [n for n in names if n in self.entries]
+        for n in targets:
+            self.entries.pop(n, None)
+        return targets
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Inspect / release quarantined models")
+    ap.add_argument("cmd", choices=["list", "release"])
+    ap.add_argument("models", nargs="*", help="Models to release")
+    ap.add_argument("--all", action="store_true", help="Release every quarantined model")
+    ap.add_argument("--stage", choices=["export", "benchmark"], default="benchmark")
+    ap.add_argument("--device", default=None, help="Device type for the benchmark stage (default: this host)")
+    args = ap.parse_args()
+
+    policy = RetryPolicy(policy_path(args.stage, args.device))
+
+    if args.cmd == "list":
+        for name in policy.quarantined():
+            e = policy.entries[name]
+            print(f"{name}: {e.get('quarantine_reason')} after {e.get('attempts')} attempt(s)")
+        for name, e in sorted(policy.entries.items()):
+            if not e.get("quarantined"):
+                print(f"{name}: {e.get('last_failure')} x{e.get('attempts')}, retry pending")
+        return
+
+    if not args.models and not args.all:
+        raise SystemExit("Pass model names or --all")
+    released = policy.release(None if args.all else args.models)
+    policy.save()
+    print(f"RELEASED {len(released)}: {', '.join(released)}")
+
+
+if __name__ == "__main__":
+    main()
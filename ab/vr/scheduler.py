@@ -0,0 +1,134 @@
+"""Cost-aware ordering of pipeline work and wall-clock budget tracking."""
+
+from __future__ import annotations
+
+import re
+import time
+from statistics import median
+
+
+POLICIES = ("alphabetical", "shortest-first", "accuracy-weighted", "round-robin")
+
+# Used when there is no history at all to calibrate against
+DEFAULT_COST_SEC = 60.0
+
+
+def model_family(name: str) -> str:
+    """Architecture family of a model name, e.g. 'AirNet-626c3eb9-...' -> 'AirNet'."""
+    return name.split("-")[0]
+
+
+def parse_duration(value: str | float | None) -> float | None:
+    """'8h' / '90m' / '45s' / '3600' -> seconds."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    total, pos = 0.0, 0
+    for m in re.finditer(r"(\d+(?:\.\d+)?)\s*([hms]?)", value.strip().lower()):
+        if m.start() != pos:
+            break
+        total += float(m.group(1)) * {"h": 3600, "m": 60, "s": 1, "": 1}[m.group(2)]
+        pos = m.end()
+    if pos != len(value.strip()):
+        raise ValueError(f"Invalid duration: {value!r}")
+    return total
+
+
+class CostEstimator:
+    """
+    Estimate seconds of work per model.
+
+    Uses the model's own historical duration when present; otherwise a
+    least-squares line `sec = a + b * size_mb` fitted over models that have
+    both a history and a size (ONNX size or checkpoint size); otherwise the
+    median historical duration (or DEFAULT_COST_SEC).
+    """
+
+    def __init__(self, history: dict | None = None, sizes_mb: dict | None = None):
+        self.history = {k: float(v) for k, v in (history or {}).items() if v}
+        self.sizes_mb = {k: float(v) for k, v in (sizes_mb or {}).items() if v is not None}
+        self.fallback = median(self.history.values()) if self.history else DEFAULT_COST_SEC
+        self.a, self.b = self.fallback, 0.0
+
+        pairs = [(self.sizes_mb[k], v) for k, v in self.history.items() if k in self.sizes_mb]
+        if len(pairs) >= 3:
+            xs, ys = zip(*pairs)
+            mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+            var = sum((x - mx) ** 2 for x in xs)
+            if var > 0:
+                b = sum((x - mx) * (y - my) for x, y in pairs) / var
+                if b > 0:
+                    self.a, self.b = my - b * mx, b
+
+    def estimate(self, name: str) -> float:
+        if name in self.history:
+            return self.history[name]
+        if name in self.sizes_mb and self.b > 0:
+            return max(self.a + self.b * self.sizes_mb[name], 1.0)
+        return self.fallback
+
+
+def order_models(
+    names: list[str],
+    policy: str,
+    costs: dict,
+    accuracy: dict | None = None,
+) -> list[str]:
+    """
+    Order `names` for processing.
+
+        alphabetical       current behaviour
+        shortest-first     cheapest estimated cost first (maximizes count per hour)
+        accuracy-weighted  highest accuracy per estimated second first
+        round-robin        interleave architecture families, cheapest first within each
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+
+    if policy == "alphabetical":
+        return sorted(names)
+
+    if policy == "shortest-first":
+        return sorted(names, key=lambda n: (costs.get(n, DEFAULT_COST_SEC), n))
+
+    if policy == "accuracy-weighted":
+        accuracy = accuracy or {}
+        return sorted(
+            names,
+            key=lambda n: (-(accuracy.get(n, 0.0) or 0.0) / max(costs.get(n, DEFAULT_COST_SEC), 1e-3), n),
+        )
+
+    families: dict = {}
+    for n in sorted(names, key=lambda n: (costs.get(n, DEFAULT_COST_SEC), n)):
+        families.setdefault(model_family(n), []).append(n)
+    queues = sorted(families.values(), key=lambda q: (costs.get(q[0], DEFAULT_COST_SEC), q[0]))
+    ordered = []
+    while queues:
+        for q in queues:
+            ordered.append(q.pop(0))
+        queues = [q for q in queues if q]
+    return ordered
+
+
+class TimeBudget:
+    """Wall-clock deadline; `fits()` tells whether an estimated job can still finish."""
+
+    def __init__(self, seconds: float | None):
+        self.seconds = seconds
+        self.start = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.seconds is not None
+
+    def remaining(self) -> float:
+        if self.seconds is None:
+            return float("inf")
+        return self.seconds - (time.monotonic() - self.start)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def fits(self, estimated_sec: float) -> bool:
+        return estimated_sec <= self.remaining()
@@ -0,0 +1,155 @@
+"""
+Stage artifacts into a workspace (Unity Assets/Models) without copying when possible.
+
+Methods are tried in order: hardlink (same filesystem), reflink (copy-on-write
+clone: Btrfs/XFS via FICLONE, APFS via clonefile), symlink, then a plain copy.
+Every staged file is verified before use: a hardlink / symlink must resolve to
+the source inode, a reflink or copy must match the source size and hash.
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import platform
+import shutil
+import time
+from pathlib import Path
+
+
+# Symlinks are not in the default order: Unity's importer does not reliably
+# follow them, and on Windows they need Developer Mode or admin rights.
+DEFAULT_METHODS = ("hardlink", "reflink", "copy")
+ALL_METHODS = ("hardlink", "reflink", "symlink", "copy")
+
+READY_TIMEOUT_SEC = 30.0
+POLL_SEC = 0.05
+CHUNK = 1 << 20
+
+# Linux ioctl: clone all extents of one file into another (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+
+class StagingError(RuntimeError):
+    pass
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _reflink(src: Path, dest: Path) -> None:
+    system = platform.system()
+    if system == "Linux":
+        import fcntl
+
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except OSError:
+                d.close()
+                dest.unlink(missing_ok=True)
+                raise
+        shutil.copystat(src, dest)
+        return
+    if system == "Darwin":
+        import ctypes
+
+        libc = ctypes.CDLL("libc.dylib", use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dest), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return
+    raise OSError(errno.ENOTSUP, f"reflink not supported on {system}")
+
+
+def _copy(src: Path, dest: Path) -> str:
+    """Copy while hashing the source (one read of it); returns the source digest."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        while chunk := s.read(CHUNK):
+            h.update(chunk)
+            d.write(chunk)
+        d.flush()
+        os.fsync(d.fileno())
+    shutil.copystat(src, dest)
+    return h.hexdigest()
+
+
+def _verify(src: Path, dest: Path, method: str, src_digest: str | None) -> None:
+    size = src.stat().st_size
+    if dest.stat().st_size != size:
+        raise StagingError(f"{dest.name}: staged {dest.stat().st_size} bytes, expected {size} ({method})")
+    if method in ("hardlink", "symlink"):
+        if not os.path.samefile(src, dest):
+            raise StagingError(f"{dest.name}: {method} does not resolve to {src}")
+        return
+    if (src_digest or file_digest(src)) != file_digest(dest):
+        raise StagingError(f"{dest.name}: content hash differs from {src} ({method})")
+
+
+def stage_file(src: Path, dest: Path, methods=DEFAULT_METHODS) -> str:
+    """
+    Make `dest` present `src`'s content using the first method that works and
+    verifies. Returns the method used; raises StagingError if none did.
+    """
+    src, dest = Path(src).resolve(), Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    errors = []
+    for method in methods:
+        dest.unlink(missing_ok=True)
+        src_digest = None
+        try:
+            if method == "hardlink":
+                os.link(src, dest)
+            elif method == "reflink":
+                _reflink(src, dest)
+            elif method == "symlink":
+                dest.symlink_to(src)
+            elif method == "copy":
+                src_digest = _copy(src, dest)
+            else:
+                raise ValueError(f"Unknown staging method {method!r}; choose from {ALL_METHODS}")
+            _verify(src, dest, method, src_digest)
+            return method
+        except (OSError, StagingError) as e:
+            errors.append(f"{method}: {e}")
+    dest.unlink(missing_ok=True)
+    raise StagingError(f"Could not stage {src.name}: " + "; ".join(errors))
+
+
+def clear_dir(directory: Path, timeout_sec: float = READY_TIMEOUT_SEC) -> None:
+    """Delete the files in `directory` and wait until they are really gone (AV / indexers may hold them)."""
+    deadline = time.time() + timeout_sec
+    while True:
+        remaining = [f for f in Path(directory).glob("*") if f.is_file() or f.is_symlink()]
+        for f in remaining:
+            try:
+                f.unlink()
+            except OSError:
+                pass
+        if not any(f.exists() or f.is_symlink() for f in remaining):
+            return
+        if time.time() >= deadline:
+            raise StagingError(f"Files still present in {directory}: {[f.name for f in remaining if f.exists()]}")
+        time.sleep(POLL_SEC)
+
+
+def wait_until_ready(path: Path, size: int, timeout_sec: float = READY_TIMEOUT_SEC) -> None:
+    """Block until `path` has `size` bytes and can be opened for reading."""
+    deadline = time.time() + timeout_sec
+    while True:
+        try:
+            if Path(path).stat().st_size == size:
+                with open(path, "rb"):
+                    return
+        except OSError:
+            pass
+        if time.time() >= deadline:
+            raise StagingError(f"{path} not ready after {timeout_sec:.0f}s")
+        time.sleep(POLL_SEC)
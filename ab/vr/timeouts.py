@@ -0,0 +1,51 @@
+"""Per-model timeouts learned from historical durations and model size."""
+
+from __future__ import annotations
+
+from ab.vr.scheduler import CostEstimator
+
+
+# Per-stage defaults. `default` is used when there is no history at all.
+TIMEOUT_DEFAULTS = {
+    "export": {"default": 120.0, "multiplier": 3.0, "floor": 30.0, "ceiling": 1200.0},
+    "benchmark": {"default": 300.0, "multiplier": 3.0, "floor": 60.0, "ceiling": 1800.0},
+}
+
+# A timed-out job is retried once with this much more time (may exceed the ceiling)
+RETRY_FACTOR = 2.5
+
+
+class TimeoutPolicy:
+    """
+    timeout = clamp(estimate * multiplier, floor, ceiling), where the estimate
+    is the model's own historical duration, else a size-based fit over other
+    models on the same device (scheduler.CostEstimator). Without any history,
+    or with adaptive=False, the stage default is used unchanged.
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        history: dict | None = None,
+        sizes: dict | None = None,
+        adaptive: bool = True,
+        **overrides,
+    ):
+        cfg = {**TIMEOUT_DEFAULTS[stage], **{k: v for k, v in overrides.items() if v is not None}}
+        self.stage = stage
+        self.default = float(cfg["default"])
+        self.multiplier = float(cfg["multiplier"])
+        self.floor = float(cfg["floor"])
+        self.ceiling = float(cfg["ceiling"])
+        self.history = {k: v for k, v in (history or {}).items() if v} if adaptive else {}
+        self.estimator = CostEstimator(self.history, sizes) if self.history else None
+
+    def timeout_for(self, name: str, scale: float = 1.0) -> float:
+        """Timeout (s) for `name`; `scale` multiplies the estimate for heavier jobs (e.g. sweeps)."""
+        if self.estimator is None:
+            return self.default * scale
+        estimate = self.estimator.estimate(name) * scale
+        return round(min(max(estimate * self.multiplier, self.floor), self.ceiling * scale), 1)
+
+    def retry_timeout(self, previous: float) -> float:
+        return round(previous * RETRY_FACTOR, 1)
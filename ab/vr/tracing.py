@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Pipeline stage tracing in Chrome trace format (Perfetto / chrome://tracing).
+
+Tracing is switched on for a whole process tree through the NNVR_TRACE
+environment variable, which names an events file. Every process (including
+spawned export / eval workers) appends one complete ("X") event per line to
+it, so spans survive a crashed or killed worker. `finish()` packages the
+events into a trace JSON next to it and prints a per-stage summary.
+
+Usage:
+    python main.py --trace                                   # _work/traces/<timestamp>.trace.json
+    python -m ab.vr.tracing summary _work/traces/20250101-120000.events.jsonl
+    python -m ab.vr.tracing convert _work/traces/20250101-120000.events.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+TRACE_DIR = ROOT_DIR / "_work" / "traces"
+TRACE_ENV = "NNVR_TRACE"
+
+_lock = threading.Lock()
+_named_pids: set = set()
+# In-process listeners called with (name, seconds, args) for every closed span
+_observers: list = []
+
+
+def events_path() -> Path | None:
+    value = os.environ.get(TRACE_ENV)
+    return Path(value) if value else None
+
+
+def enabled() -> bool:
+    return events_path() is not None
+
+
+def add_observer(fn) -> None:
+    if fn not in _observers:
+        _observers.append(fn)
+
+
+def remove_observer(fn) -> None:
+    if fn in _observers:
+        _observers.remove(fn)
+
+
+def _notify(name: str, dur_us: int, args: dict) -> None:
+    for fn in list(_observers):
+        try:
+            fn(name, dur_us / 1e6, args)
+        except Exception:
+            pass
+
+
+def start(path: Path | None = None) -> Path:
+    """Enable tracing for this process and every child started after this call."""
+    if path is None:
+        path = TRACE_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.events.jsonl"
+    path = Path(path).resolve()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("")
+    os.environ[TRACE_ENV] = str(path)
+    return path
+
+
+def _now_us() -> int:
+    # Wall clock, so spans from different processes line up
+    return time.time_ns() // 1000
+
+
+def _write(event: dict) -> None:
+    path = events_path()
+    if path is None:
+        return
+    pid = os.getpid()
+    lines = []
+    if pid not in _named_pids:
+        _named_pids.add(pid)
+        lines.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                      "args": {"name": f"{mp.current_process().name} ({pid})"}})
+    lines.append({**event, "pid": pid, "tid": event.get("tid", threading.get_native_id())})
+    data = "".join(json.dumps(e, default=str) + "\n" for e in lines)
+    try:
+        # One small O_APPEND write per event: processes do not interleave lines
+        with _lock, open(path, "a", encoding="utf-8") as f:
+            f.write(data)
+    except OSError:
+        pass
+
+
+@contextmanager
+def span(name: str, cat: str = "pipeline", **args):
+    """Time the block as one trace event; an exception is recorded in its args and re-raised."""
+    if not enabled() and not _observers:
+        yield args
+        return
+    ts = _now_us()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = repr(e)[:200]
+        raise
+    finally:
+        dur = _now_us() - ts
+        _notify(name, dur, args)
+        _write({"name": name, "cat": cat, "ph": "X", "ts": ts, "dur": dur, "args": args})
+
+
+def complete(name: str, start_sec: float, duration_sec: float, cat: str = "pipeline", **args) -> None:
+    """Record an already measured span (e.g. phases reported by Unity) starting at wall time `start_sec`."""
+    _notify(name, int(duration_sec * 1e6), args)
+    if enabled():
+        _write({"name": name, "cat": cat, "ph": "X", "ts": int(start_sec * 1e6),
+                "dur": int(duration_sec * 1e6), "args": args})
+
+
+# ── Output ──────────────────────────────────────────────────────────────────
+def load_events(path: Path) -> list[dict]:
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # last line of a killed process
+    return events
+
+
+def write_chrome_trace(events: list[dict], out_path: Path) -> Path:
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return out_path
+
+
+def stage_summary(events: list[dict]) -> list[dict]:
+    """Per span name: count, total / mean / max seconds and errors, by descending total."""
+    spans = [e for e in events if e.get("ph") == "X"]
+    if not spans:
+        return []
+    wall = (max(e["ts"] + e["dur"] for e in spans) - min(e["ts"] for e in spans)) / 1e6
+    stages: dict = {}
+    for e in spans:
+        s = stages.setdefault(e["name"], {"stage": e["name"], "count": 0, "total_sec": 0.0,
+                                          "max_sec": 0.0, "errors": 0})
+        dur = e["dur"] / 1e6
+        s["count"] += 1
+        s["total_sec"] += dur
+        s["max_sec"] = max(s["max_sec"], dur)
+        s["errors"] += 1 if "error" in e.get("args", {}) else 0
+    rows = sorted(stages.values(), key=lambda s: -s["total_sec"])
+    for s in rows:
+        s["mean_sec"] = s["total_sec"] / s["count"]
+        s["wall_share"] = s["total_sec"] / wall if wall else 0.0
+    return rows
+
+
+def format_summary(rows: list[dict]) -> list[str]:
+    lines = [f"{'stage':<28}{'count':>7}{'total s':>11}{'mean s':>10}{'max s':>10}{'% wall':>8}{'errors':>8}"]
+    for s in rows:
+        lines.append(
+            f"{s['stage']:<28}{s['count']:>7}{s['total_sec']:>11.1f}{s['mean_sec']:>10.2f}"
+            f"{s['max_sec']:>10.2f}{s['wall_share']:>8.1%}{s['errors']:>8}"
+        )
+    return lines
+
+
+def finish(events_file: Path | None = None) -> tuple[Path | None, list[str]]:
+    """Write <events>.trace.json and return (trace path, summary lines); no-op when not tracing."""
+    events_file = Path(events_file) if events_file else events_path()
+    if events_file is None or not events_file.exists():
+        return None, []
+    events = load_events(events_file)
+    out = events_file.with_name(events_file.name.replace(".events.jsonl", "") + ".trace.json")
+    write_chrome_trace(events, out)
+    return out, format_summary(stage_summary(events))
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Summarize / convert a pipeline trace")
+    ap.add_argument("cmd", choices=["summary", "convert"])
+    ap.add_argument("events", type=Path)
+    args = ap.parse_args()
+
+    if not args.events.exists():
+        raise SystemExit(f"No events file at {args.events}")
+    if args.cmd == "convert":
+        out, _ = finish(args.events)
+        print(f"SAVED: {out} (open in https://ui.perfetto.dev or chrome://tracing)")
+        return
+    print("\n".join(format_summary(stage_summary(load_events(args.events)))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 import json
 import platform
 import re
-import shutil
 import socket
 import subprocess
 import time
 import traceback
+from functools import lru_cache
 from pathlib import Path
 
+from ab.vr import staging, tracing
+
 
 # --------------------------------------------------
 # BENCHMARK OUTPUT LAYOUT (matches nn-dataset stat/run)
@@ -17,6 +19,10 @@ ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 OUTPUT_ROOT = ROOT_DIR / "out" / "nn" / "stat" / "run" / "onnx" / "fp32"
 CONFIG_PREFIX = "img-classification_cifar-10_acc"
 
+# Fields produced by separate studies (not by the main benchmark). They are
+# carried over when a model's record is rewritten by a fresh benchmark run.
+STUDY_FIELDS = ("resolution_curve", "op_profile", "contention")
+
 
 def sanitize_filename(s: str) -> str:
     return "".join(c if (c.isalnum() or c in ("-", "_")) else "_" for c in s)
@@ -31,8 +37,12 @@ def get_unity_editor_log_path() -> Path:
         return Path.home() / ".config" / "unity3d" / "Editor.log"
 
 
+@lru_cache(maxsize=None)
 def get_device_type() -> str:
-    """Human-readable device label (prefers product + CPU over hostname)."""
+    """
+    Human-readable device label (prefers product + CPU over hostname).
+    Cached: on Windows it costs a PowerShell round trip.
+    """
     if platform.system() != "Windows":
         return socket.gethostname()
     try:
@@ -81,6 +91,10 @@ def save_model_record(record: dict, model_name: str | None = None) -> Path:
     device_type = record.get("device_type") or get_device_type()
     record["device_type"] = device_type
     path = model_result_path(model_name, device_type)
+    previous = load_model_record(model_name, device_type) or {}
+    for key in STUDY_FIELDS:
+        if key in previous and key not in record:
+            record[key] = previous[key]
     path.parent.mkdir(parents=True, exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         json.dump(record, f, indent=2)
@@ -99,6 +113,17 @@ def load_model_record(model_name: str, device_type: str | None = None) -> dict |
         return None
 
 
+def update_model_record(model_name: str, fields: dict, device_type: str | None = None) -> Path:
+    """Merge `fields` into the model's record for this device (creating it if needed)."""
+    device_type = device_type or get_device_type()
+    record = load_model_record(model_name, device_type) or {
+        "model_name": model_name,
+        "device_type": device_type,
+    }
+    record.update(fields)
+    return save_model_record(record, model_name)
+
+
 def is_model_benchmarked(model_name: str, device_type: str | None = None) -> bool:
     record = load_model_record(model_name, device_type)
     return bool(record and record.get("valid") is True)
@@ -111,16 +136,65 @@ else:
 
 UNITY_PROJECT = (ROOT_DIR / "NNVRBenchmark").resolve()
 
+# Created on first use by run_unity_benchmark, not at import
 UNITY_MODELS_DIR = (UNITY_PROJECT / "Assets" / "Models").resolve()
-UNITY_MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 UNITY_RESULTS_DIR = (UNITY_PROJECT / "Assets" / "Results").resolve()
-UNITY_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def run_unity_benchmark(onnx_path: Path):
+UNITY_TIMEOUT_SEC = 300
+
+
+# BenchmarkCLI "phases" keys in execution order -> trace span names
+UNITY_PHASES = (
+    ("startup_ms", "unity.startup"),
+    ("asset_import_ms", "unity.asset_import"),
+    ("model_load_ms", "unity.model_load"),
+    ("cold_start_ms", "unity.cold_start"),
+    ("cpu_ms", "unity.inference_cpu"),
+    ("gpu_ms", "unity.inference_gpu"),
+    ("batch_sweep_ms", "unity.batch_sweep"),
+    ("layer_profile_ms", "unity.layer_profile"),
+    ("cadence_ms", "unity.cadence"),
+)
+
+
+def trace_unity_phases(phases: dict | None, process_start: float, process_end: float) -> None:
+    """Lay the Editor-reported phases end to end from process start; the remainder is shutdown."""
+    if not phases:
+        return
+    cursor = process_start
+    for key, name in UNITY_PHASES:
+        sec = (phases.get(key) or 0) / 1000.0
+        if sec > 0:
+            tracing.complete(name, cursor, sec, cat="unity")
+            cursor += sec
+    if process_end > cursor:
+        tracing.complete("unity.shutdown", cursor, process_end - cursor, cat="unity")
+
+
+def run_unity_benchmark(
+    onnx_path: Path,
+    batch_sizes: list[int] | None = None,
+    timeout_sec: float = UNITY_TIMEOUT_SEC,
+    layer_profile_iterations: int = 0,
+    cold_start_trials: int = 0,
+    cadence_rates: list[float] | None = None,
+    cadence_sec: float = 10.0,
+    staging_methods=staging.DEFAULT_METHODS,
+):
     """
-    Copy ONNX into Unity project and run benchmark.
+    Stage ONNX into Unity project and run benchmark.
+
+    If `batch_sizes` is given, BenchmarkCLI additionally runs a throughput
+    sweep at each batch size and reports it under "batch_sweep". With
+    `layer_profile_iterations` it also times every layer on both backends
+    ("layer_profile"). With `cold_start_trials` it first measures model load,
+    worker creation, first and warm inference per backend ("cold_start").
+    With `cadence_rates` it runs each backend on a fixed frame clock for
+    `cadence_sec` per rate and reports raw frame latencies ("cadence").
+    `staging_methods` is the order of ways to place the
+    model in Assets/Models (see staging.py); the first that verifies wins.
     """
     try:
         onnx_path = Path(onnx_path)
@@ -129,48 +203,37 @@ def run_unity_benchmark(onnx_path: Path):
         if not onnx_path.exists():
             raise FileNotFoundError(onnx_path)
 
-        # --------------------------------------------------
-        # CLEAR OLD MODELS
-        # --------------------------------------------------
-        for f in UNITY_MODELS_DIR.glob("*"):
-            try:
-                if not f.is_file():
-                    continue
-                f.unlink()
+        UNITY_MODELS_DIR.mkdir(parents=True, exist_ok=True)
+        UNITY_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
-            except Exception as e:
-                print(f"WARNING: Could not delete {f}")
-                print(str(e))
-            
-        time.sleep(0.5)
+        stage_start = time.time()
 
         # --------------------------------------------------
-        # COPY NEW MODEL
+        # CLEAR OLD MODELS (waits until the files are really gone)
         # --------------------------------------------------
-
-        target_onnx = UNITY_MODELS_DIR / "model.onnx"
-
-        shutil.copy2(
-            onnx_path,
-            target_onnx
-        )
+        staging.clear_dir(UNITY_MODELS_DIR)
 
         # --------------------------------------------------
-        # COPY EXTERNAL WEIGHTS FILE IF PRESENT
+        # STAGE NEW MODEL (+ EXTERNAL WEIGHTS FILE IF PRESENT)
         # --------------------------------------------------
 
+        # The graph references its weights by file name, so keep it
+        files = [(onnx_path, UNITY_MODELS_DIR / "model.onnx")]
         data_file = onnx_path.with_suffix(".onnx.data")
-
         if data_file.exists():
+            files.append((data_file, UNITY_MODELS_DIR / data_file.name))
+
+        methods = []
+        for src, dest in files:
+            methods.append(staging.stage_file(src, dest, staging_methods))
+            staging.wait_until_ready(dest, src.stat().st_size)
+        print(f"STAGED: {onnx_path.name} via {', '.join(methods)}")
+
+        tracing.complete(
+            "unity.stage_model", stage_start, time.time() - stage_start,
+            model=onnx_path.stem, method=",".join(methods),
+        )
 
-            target_data = UNITY_MODELS_DIR / "model.onnx.data"
-            shutil.copy2(
-                data_file,
-                target_data
-            )
-        
-        time.sleep(1.5)
-    
         # --------------------------------------------------
         # CLEAR OLD JSON RESULTS
         # --------------------------------------------------
@@ -196,6 +259,21 @@ def run_unity_benchmark(onnx_path: Path):
             "-quit"
         ]
 
+        if batch_sizes:
+            cmd += ["-nnvrBatchSizes", ",".join(str(b) for b in batch_sizes)]
+
+        if layer_profile_iterations:
+            cmd += ["-nnvrLayerProfile", str(int(layer_profile_iterations))]
+
+        if cold_start_trials:
+            cmd += ["-nnvrColdStart", str(int(cold_start_trials))]
+
+        if cadence_rates:
+            cmd += [
+                "-nnvrCadence", ",".join(f"{r:g}" for r in cadence_rates),
+                "-nnvrCadenceSeconds", f"{cadence_sec:g}",
+            ]
+
         if platform.system() != "Windows":
             cmd = [
                 "xvfb-run",
@@ -206,12 +284,17 @@ def run_unity_benchmark(onnx_path: Path):
         print("RUNNING UNITY BENCHMARK...")
         print(" ".join(cmd))
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
+        process_start = time.time()
+
+        with tracing.span("unity.process", model=onnx_path.stem, timeout_sec=timeout_sec):
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=timeout_sec
+            )
+
+        process_end = time.time()
 
         print("UNITY STDOUT:")
         print(result.stdout)
@@ -247,6 +330,8 @@ def run_unity_benchmark(onnx_path: Path):
         with open(latest, "r") as f:
             benchmark = json.load(f)
 
+        trace_unity_phases(benchmark.get("phases"), process_start, process_end)
+
         if not benchmark.get("success"):
             log_path = get_unity_editor_log_path()
             if log_path.exists():
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Lease-based work queue so several processes / hosts can share one model list.
+
+Workers claim a model with a time-limited lease and keep it alive with
+heartbeats while they work. A lease that is not renewed (crashed or hung
+worker) expires and the model becomes claimable again. Only the current
+lease holder can complete or fail a model, so each model is completed
+exactly once.
+
+The queue is one SQLite file. Put it on a shared filesystem with working
+file locks (local disk, SMB) for several hosts; NFS locking is not reliable
+enough for SQLite.
+
+Usage:
+    python main.py --skip-device --queue _work/queue.sqlite       # on every host / process
+    python -m ab.vr.work_queue status _work/queue.sqlite
+    python -m ab.vr.work_queue requeue _work/queue.sqlite          # failed -> pending
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+DEFAULT_LEASE_SEC = 120.0
+# Heartbeats per lease period; a lease survives missing all but one of them
+HEARTBEATS_PER_LEASE = 4
+BUSY_TIMEOUT_SEC = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    name          TEXT PRIMARY KEY,
+    priority      INTEGER NOT NULL DEFAULT 0,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    owner         TEXT,
+    lease_expires REAL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    duration_sec  REAL,
+    error         TEXT,
+    updated_at    REAL
+)
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """SQLite-backed task table: pending -> leased -> done | failed."""
+
+    def __init__(self, path: Path, worker_id: str | None = None, lease_sec: float = DEFAULT_LEASE_SEC):
+        self.path = Path(path)
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_sec = float(lease_sec)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation: safe across threads and forks
+        conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_SEC, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self, mode: str = "IMMEDIATE"):
+        conn = self._connect()
+        try:
+            conn.execute(f"BEGIN {mode}")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @contextmanager
+    def mutex(self):
+        """Queue-wide exclusive lock for read-modify-write of shared files (state, aggregates)."""
+        with self._transaction("EXCLUSIVE"):
+            yield
+
+    # -- producers --
+    def add(self, names: list[str], retry_failed: bool = True) -> int:
+        """
+        Enqueue `names` in order (their position is the claim priority).
+        Known names keep their status; failed ones go back to pending if
+        `retry_failed`. Returns the number of newly added names.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (name, priority, updated_at) VALUES (?, ?, ?)",
+                [(n, i, now) for i, n in enumerate(names)],
+            )
+            if retry_failed:
+                conn.executemany(
+                    "UPDATE tasks SET status = 'pending', owner = NULL, updated_at = ? "
+                    "WHERE name = ? AND status = 'failed'",
+                    [(now, n) for n in names],
+                )
+            return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] - before
+
+    # -- workers --
+    def claim(self, allowed: set | None = None) -> str | None:
+        """Lease the next pending (or expired) task, optionally restricted to `allowed` names."""
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT name FROM tasks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority, name",
+                (now,),
+            ).fetchall()
+            for row in rows:
+                if allowed is not None and row["name"] not in allowed:
+                    continue
+                conn.execute(
+                    "UPDATE tasks SET status = 'leased', owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE name = ?",
+                    (self.worker_id, now + self.lease_sec, now, row["name"]),
+                )
+                return row["name"]
+        return None
+
+    def heartbeat(self, name: str) -> bool:
+        """Extend our lease on `name`; False if it is no longer ours."""
+        now = time.time()
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? "
+                "WHERE name = ? AND status = 'leased' AND owner = ?",
+                (now + self.lease_sec, now, name, self.worker_id),
+            )
+            return cur.rowcount == 1
+
+    def owns(self, name: str) -> bool:
+        with self._transaction("DEFERRED") as conn:
+            row = conn.execute(
+                "SELECT 1 FROM tasks WHERE name = ? AND status = 'leased' AND owner = ?",
+                (name, self.worker_id),
+            ).fetchone()
+            return row is not None
+
+    def _finish(self, name: str, status: str, duration_sec=None, error=None) -> bool:
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = ?, owner = NULL, lease_expires = NULL, "
+                "duration_sec = COALESCE(?, duration_sec), error = ?, updated_at = ? "
+                "WHERE name = ? AND status = 'leased' AND owner = ?",
+                (status, duration_sec, error, time.time(), name, self.worker_id),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, name: str, duration_sec: float | None = None) -> bool:
+        """Mark done; False if our lease was lost (someone else owns or finished it)."""
+        return self._finish(name, "done", duration_sec)
+
+    def fail(self, name: str, error: str = "") -> bool:
+        return self._finish(name, "failed", error=(error or "")[:500])
+
+    def release(self, name: str) -> bool:
+        """Give a claimed task back without an outcome (e.g. deferred by the time budget)."""
+        return self._finish(name, "pending")
+
+    @contextmanager
+    def leased(self, name: str):
+        """Heartbeat `name` in a background thread for the duration of the block."""
+        keeper = _LeaseKeeper(self, name)
+        keeper.start()
+        try:
+            yield keeper
+        finally:
+            keeper.stop()
+
+    def claims(self, allowed: set | None = None):
+        """Yield claimed task names until the queue is drained; each stays heartbeated until the next."""
+        while True:
+            name = self.claim(allowed)
+            if name is None:
+                return
+            with self.leased(name):
+                yield name
+
+    # -- inspection --
+    def counts(self) -> dict:
+        with self._transaction("DEFERRED") as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+            return {r["status"]: r["n"] for r in rows}
+
+    def names(self, status: str) -> list[str]:
+        with self._transaction("DEFERRED") as conn:
+            rows = conn.execute("SELECT name FROM tasks WHERE status = ? ORDER BY priority, name", (status,))
+            return [r["name"] for r in rows.fetchall()]
+
+    def durations(self) -> dict:
+        with self._transaction("DEFERRED") as conn:
+            rows = conn.execute("SELECT name, duration_sec FROM tasks WHERE duration_sec IS NOT NULL")
+            return {r["name"]: r["duration_sec"] for r in rows.fetchall()}
+
+    def leases(self) -> list[dict]:
+        with self._transaction("DEFERRED") as conn:
+            rows = conn.execute("SELECT * FROM tasks WHERE status = 'leased' ORDER BY name")
+            return [dict(r) for r in rows.fetchall()]
+
+    def requeue_failed(self) -> int:
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = 'pending', error = NULL, updated_at = ? WHERE status = 'failed'",
+                (time.time(),),
+            )
+            return cur.rowcount
+
+
+class _LeaseKeeper:
+    def __init__(self, queue: WorkQueue, name: str):
+        self.queue = queue
+        self.name = name
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{name}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=BUSY_TIMEOUT_SEC)
+
+    def _run(self) -> None:
+        interval = self.queue.lease_sec / HEARTBEATS_PER_LEASE
+        while not self._stop.wait(interval):
+            try:
+                if not self.queue.heartbeat(self.name):
+                    self.lost = True
+                    return
+            except sqlite3.Error:
+                continue  # transient lock contention; the lease has slack for it
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Inspect a shared work queue")
+    ap.add_argument("cmd", choices=["status", "requeue"])
+    ap.add_argument("db", type=Path)
+    args = ap.parse_args()
+
+    if not args.db.exists():
+        raise SystemExit(f"No queue at {args.db}")
+    queue = WorkQueue(args.db)
+
+    if args.cmd == "requeue":
+        print(f"REQUEUED {queue.requeue_failed()} failed task(s)")
+        return
+
+    counts = queue.counts()
+    print("  ".join(f"{s}: {counts.get(s, 0)}" for s in ("pending", "leased", "done", "failed")))
+    now = time.time()
+    for r in queue.leases():
+        left = r["lease_expires"] - now
+        state = f"expires in {left:.0f}s" if left > 0 else f"EXPIRED {-left:.0f}s ago"
+        print(f"  {r['name']}: {r['owner']} ({state}, attempt {r['attempts']})")
+
+
+if __name__ == "__main__":
+    main()
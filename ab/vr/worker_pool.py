@@ -0,0 +1,145 @@
+"""Long-lived spawn workers that are recycled when their resident memory crosses a watermark."""
+
+from __future__ import annotations
+
+import gc
+import importlib
+import logging
+import multiprocessing as mp
+import pickle
+import queue as queue_mod
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# A worker whose RSS is above this after a job is replaced before the next one
+DEFAULT_RSS_LIMIT_MB = 4096.0
+
+POLL_SEC = 0.5
+
+
+def _resolve(fn):
+    """A callable, or a 'package.module:function' reference resolved in the worker."""
+    if isinstance(fn, str):
+        module, _, attr = fn.partition(":")
+        return getattr(importlib.import_module(module), attr)
+    return fn
+
+
+def _worker_loop(tasks, results):
+    while True:
+        job = tasks.get()
+        if job is None:
+            return
+        fn, args, kwargs = job
+        try:
+            results.put((True, _resolve(fn)(*args, **kwargs)))
+        except Exception as e:
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = RuntimeError(repr(e))
+            results.put((False, e))
+        gc.collect()
+
+
+def process_rss_mb(pid: int) -> float:
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+class RecyclingWorker:
+    """
+    One persistent 'spawn' process that runs jobs sequentially.
+
+    Torch, ONNX Runtime and the datasets are imported once per worker instead
+    of once per job. After every job the worker's RSS is measured; above
+    `rss_limit_mb` (0 = never) it is shut down and a fresh one is started
+    lazily for the next job. A job that times out or crashes the process
+    takes the worker with it; the caller sees TimeoutError / RuntimeError.
+    """
+
+    def __init__(self, name: str, rss_limit_mb: float = DEFAULT_RSS_LIMIT_MB):
+        self.name = name
+        self.rss_limit_mb = rss_limit_mb
+        self.proc = None
+        self.jobs = 0
+        self.recycles = 0
+        self.peak_rss_mb = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.is_alive()
+
+    def _start(self) -> None:
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        # daemon: never outlive the orchestrator
+        self.proc = ctx.Process(target=_worker_loop, args=(self._tasks, self._results), daemon=True)
+        self.proc.start()
+        self.jobs = 0
+
+    def rss_mb(self) -> float:
+        return process_rss_mb(self.proc.pid) if self.alive else 0.0
+
+    def call(self, fn, *args, timeout_sec: float | None = None, **kwargs):
+        """Run `fn(*args, **kwargs)` in the worker and return its result (or re-raise its exception)."""
+        if not self.alive:
+            self._start()
+        self._tasks.put((fn, args, kwargs))
+
+        deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+        while True:
+            try:
+                ok, value = self._results.get(timeout=POLL_SEC)
+                break
+            except queue_mod.Empty:
+                pass
+            if not self.proc.is_alive():
+                try:
+                    ok, value = self._results.get(timeout=POLL_SEC)
+                    break
+                except queue_mod.Empty:
+                    self.close()
+                    raise RuntimeError(f"{self.name} worker exited without result (possible OOM or segfault)")
+            if deadline is not None and time.monotonic() > deadline:
+                self.close(kill=True)
+                raise TimeoutError(f"{self.name} job exceeded {timeout_sec}s limit; worker killed.")
+
+        self.jobs += 1
+        rss = self.rss_mb()
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        if self.rss_limit_mb and rss > self.rss_limit_mb:
+            logger.info(f"♻️  Recycling {self.name} worker: RSS {rss:.0f} MB > {self.rss_limit_mb:.0f} MB "
+                        f"after {self.jobs} job(s)")
+            self.close()
+            self.recycles += 1
+
+        if not ok:
+            raise value
+        return value
+
+    def close(self, kill: bool = False) -> None:
+        if self.proc is None:
+            return
+        if self.proc.is_alive() and not kill:
+            self._tasks.put(None)
+            self.proc.join(timeout=10)
+        if self.proc.is_alive():
+            self.proc.terminate()
+            self.proc.join(timeout=5)
+        for q in (self._tasks, self._results):
+            q.close()
+            q.cancel_join_thread()
+        self.proc = None
@@ -69,17 +69,255 @@ def main():
         action="store_true",
         help="Interleave ONNX export and benchmarking, deleting each ONNX file after it's benchmarked.",
     )
+    ap.add_argument(
+        "--archive-quota-gb",
+        type=float,
+        default=None,
+        metavar="GB",
+        help="With --low-storage: zstd-archive each benchmarked ONNX under this quota (LRU eviction) instead of "
+             "deleting it; Stage 2 restores archived models on demand (see artifact_store.py)",
+    )
+
+    ap.add_argument(
+        "--work-quota-gb",
+        type=float,
+        default=None,
+        metavar="GB",
+        help="Disk budget for the _work caches: evict checkpoints / datasets / exports no queued model needs, "
+             "and pause export instead of failing when the disk is full (see disk_quota.py)",
+    )
+    ap.add_argument("--min-free-gb", type=float, default=None, metavar="GB",
+                    help="With --work-quota-gb: also keep this much disk free (default: 5)")
 
     # ── Export options ───────────────────────────────────────────────────────
     ap.add_argument("--limit", type=int, default=None, help="Max models to export")
     ap.add_argument("--dataset", default="cifar-10")
     ap.add_argument("--export-timeout", type=float, default=120.0)
     ap.add_argument("--android-runs", type=int, default=20)
+    ap.add_argument(
+        "--acc-ci-width",
+        type=float,
+        default=None,
+        help="Evaluate accuracy until its confidence interval is at most this wide (default: 0.05)",
+    )
+    ap.add_argument(
+        "--acc-confidence",
+        type=float,
+        default=None,
+        help="Confidence level of the accuracy interval (default: 0.95)",
+    )
+    ap.add_argument(
+        "--worker-rss-mb",
+        type=float,
+        default=None,
+        help="Recycle the export / accuracy workers once their RSS exceeds this many MB (default: 4096, 0 = never)",
+    )
     ap.add_argument("--force", action="store_true", help="Reset export state, reprocess all")
-    ap.add_argument("--push-hf", action="store_true", help="Upload results to HuggingFace Hub")
+    ap.add_argument("--push-hf", action="store_true",
+                    help="Sync new/changed results to HuggingFace Hub in the background while running")
+    ap.add_argument("--pull-hf", action="store_true",
+                    help="Download results other machines published for this device; those models are skipped")
+    ap.add_argument("--local-hub", default=None, metavar="DIR", help="Directory standing in for the Hub (testing)")
+    ap.add_argument("--sync-interval", type=float, default=None,
+                    help="Seconds between background Hub sync commits with --push-hf (default: 300)")
+    ap.add_argument(
+        "--variants",
+        default=None,
+        metavar="SPECS",
+        help="Extra export variants per model from one model load, e.g. 'r64,r128:op11,b4'",
+    )
+
+    ap.add_argument(
+        "--queue",
+        default=None,
+        metavar="DB",
+        help="SQLite work queue shared by several processes/hosts; each model is exported exactly once",
+    )
+    ap.add_argument("--lease-sec", type=float, default=None, help="Work-queue lease length (default: 120)")
+
+    # ── Benchmark options ────────────────────────────────────────────────────
+    ap.add_argument(
+        "--batch-sweep",
+        nargs="?",
+        const="1,2,4,8,16",
+        default=None,
+        metavar="SIZES",
+        help="Also measure latency + images/sec at these batch sizes (default: 1,2,4,8,16)",
+    )
+    ap.add_argument(
+        "--cadence",
+        nargs="?",
+        const="72,90,120",
+        default=None,
+        metavar="HZ",
+        help="Also run one inference per frame at these rates: deadline misses, jitter, p99 (default: 72,90,120)",
+    )
+    ap.add_argument("--cadence-sec", type=float, default=10.0, help="Seconds per --cadence rate (default: 10)")
+
+    ap.add_argument(
+        "--dedup",
+        choices=["off", "reuse", "defer"],
+        default="off",
+        help="Structural twins (same graph, different weights): reuse their timings, "
+             "or benchmark them last (default: off)",
+    )
+    ap.add_argument("--op-profile", action="store_true",
+                    help="Also record per-operator times (ONNX Runtime + Unity per-layer); "
+                         "report with: python -m ab.vr.op_profiler report")
+    ap.add_argument("--cold-start", type=int, default=0, metavar="TRIALS",
+                    help="Also measure model load, session creation, first and warm inference per backend over "
+                         "TRIALS cold starts (see cold_start.py)")
+    ap.add_argument("--fixed-timeouts", action="store_true",
+                    help="Disable per-model adaptive timeouts (use --export-timeout / 300 s)")
+    ap.add_argument("--timeout-multiplier", type=float, default=None,
+                    help="Adaptive timeout = estimated duration x this (default: 3)")
+    ap.add_argument("--timeout-floor", type=float, default=None, help="Minimum adaptive timeout (s)")
+    ap.add_argument("--timeout-ceiling", type=float, default=None, help="Maximum adaptive timeout (s)")
+    ap.add_argument(
+        "--schedule",
+        choices=["alphabetical", "shortest-first", "accuracy-weighted", "round-robin"],
+        default="alphabetical",
+        help="Order models by estimated cost (default: alphabetical)",
+    )
+    ap.add_argument(
+        "--time-budget",
+        default=None,
+        metavar="DURATION",
+        help="Wall-clock budget for the whole run, e.g. 8h, 90m, 3600",
+    )
+    ap.add_argument(
+        "--skip-over-budget",
+        type=float,
+        default=None,
+        metavar="HZ",
+        help="Skip models the fitted cost model predicts cannot run at this frame rate "
+             "(fit with: python -m ab.vr.cost_model fit)",
+    )
+    ap.add_argument(
+        "--resolution-sweep",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="SIZES",
+        help="Study mode: export + benchmark each model at several input sizes "
+             "(default: 32,64,96,128,160,224) and record a latency-vs-resolution curve",
+    )
+    ap.add_argument("--sweep-unity", action="store_true", help="Include Unity in --resolution-sweep")
+    ap.add_argument(
+        "--trace",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="EVENTS",
+        help="Record every pipeline stage as a Chrome trace (Perfetto) and print a per-stage summary "
+             "(default: _work/traces/<timestamp>.*)",
+    )
+    ap.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                    help="Serve live Prometheus metrics (throughput, ETA, failures, stage durations) on localhost:PORT")
+    ap.add_argument("--metrics-file", default=None, metavar="PATH",
+                    help="Rewrite the Prometheus metrics into this file every few seconds (textfile collector)")
 
     args = ap.parse_args()
 
+    from ab.vr import tracing
+    if args.trace is not None:
+        from pathlib import Path
+        print(f"TRACING TO {tracing.start(Path(args.trace) if args.trace else None)}")
+
+    from ab.vr import metrics
+    if metrics.start(args.metrics_port, args.metrics_file):
+        print("METRICS: " + ", ".join(
+            ([f"http://127.0.0.1:{args.metrics_port}/metrics"] if args.metrics_port else [])
+            + ([args.metrics_file] if args.metrics_file else [])
+        ))
+
+    def finish_run():
+        metrics.stop()
+        trace_path, summary = tracing.finish()
+        if trace_path is not None:
+            print("\n".join(["", "STAGE SUMMARY:", *summary]))
+            print(f"TRACE: {trace_path} (open in https://ui.perfetto.dev or chrome://tracing)")
+
+    batch_sizes = None
+    if args.batch_sweep:
+        from ab.vr.batch_sweep import parse_batch_sizes
+        batch_sizes = parse_batch_sizes(args.batch_sweep)
+
+    cadence_rates = None
+    if args.cadence:
+        from ab.vr.cadence import parse_rates
+        cadence_rates = parse_rates(args.cadence)
+
+    deadline = None
+    if args.time_budget:
+        import time
+        from ab.vr.scheduler import parse_duration
+        deadline = time.time() + parse_duration(args.time_budget)
+
+    def remaining_budget():
+        if deadline is None:
+            return None
+        import time
+        return max(deadline - time.time(), 0.0)
+
+    # Options shared by every Stage 2 (run_benchmarks) call
+    bench_kwargs = {
+        "batch_sizes": batch_sizes,
+        "dedup": args.dedup,
+        "frame_budget_hz": args.skip_over_budget,
+        "schedule": args.schedule,
+        "op_profile": args.op_profile,
+        "archive_quota_gb": args.archive_quota_gb,
+        "cold_start_trials": args.cold_start,
+        "cadence_rates": cadence_rates,
+        "cadence_sec": args.cadence_sec,
+        "timeout_overrides": {
+            "multiplier": args.timeout_multiplier,
+            "floor": args.timeout_floor,
+            "ceiling": args.timeout_ceiling,
+        },
+    }
+    if args.fixed_timeouts:
+        bench_kwargs["timeout_overrides"] = {"adaptive": False}
+
+    # ── Resolution study (standalone mode) ──────────────────────────────────
+    if args.resolution_sweep is not None:
+        study_argv = [sys.argv[0]]
+        if args.models:
+            study_argv.append(args.models)
+        study_argv += ["--skip-device", "--resolution-sweep", args.resolution_sweep]
+        if args.sweep_unity:
+            study_argv.append("--sweep-unity")
+        if args.force:
+            study_argv.append("--force")
+        if args.limit:
+            study_argv += ["--limit", str(args.limit)]
+        if args.dataset != "cifar-10":
+            study_argv += ["--dataset", args.dataset]
+        if args.export_timeout != 120.0:
+            study_argv += ["--export-timeout", str(args.export_timeout)]
+
+        original_argv = sys.argv
+        sys.argv = study_argv
+        from ab.vr.process_models import main as export_main
+        export_main()
+        sys.argv = original_argv
+        finish_run()
+        return
+
+    def hub_sync():
+        # Fresh instance per use: Stage 1 updates the shared sync manifest on disk
+        from ab.vr.hub_sync import HF_RESULTS_REPO, HubSync, make_hub
+        from ab.vr.unity_runner import OUTPUT_ROOT, ROOT_DIR
+
+        interval = {"interval_sec": args.sync_interval} if args.sync_interval is not None else {}
+        return HubSync(
+            make_hub(HF_RESULTS_REPO, args.local_hub), [ROOT_DIR / "_work" / "onnx_temp", OUTPUT_ROOT], **interval
+        )
+
+    if args.pull_hf:
+        print(f"Pulled {hub_sync().pull()} published record(s)")
+
     # ── Pre-Cleanup / Benchmark Leftovers (Low Storage Mode) ─────────────────
     if getattr(args, "low_storage", False) and not args.skip_device and not args.benchmark_only:
         from pathlib import Path
@@ -88,10 +326,11 @@ def main():
             print("Found leftover ONNX files. Benchmarking and cleaning them up before resuming export...")
             from ab.vr.benchmark_models import run_benchmarks
             models_list = [m.strip() for m in args.models.split(",")] if args.models else None
-            run_benchmarks(models=models_list)
+            run_benchmarks(models=models_list, time_budget_sec=remaining_budget(), **bench_kwargs)
+            from ab.vr.artifact_store import archive_or_delete
             for f in onnx_temp.glob("*.onnx"):
                 try:
-                    f.unlink()
+                    archive_or_delete(f, args.archive_quota_gb)
                 except Exception:
                     pass
 
@@ -105,15 +344,55 @@ def main():
         # Always pass --skip-device to process_models: Stage 1 is ONNX export only.
         # Unity benchmarking is handled exclusively by Stage 2 (benchmark_models.py).
         export_argv.append("--skip-device")
+        if not args.skip_device:
+            # Stage 2 follows; models already measured on this host need no export
+            export_argv.append("--skip-benchmarked")
         
         # Interleave Unity benchmark to save disk space
         if getattr(args, "low_storage", False) and not args.skip_device:
             export_argv.append("--unity-benchmark")
-            
+            if args.batch_sweep:
+                export_argv += ["--batch-sweep", args.batch_sweep]
+            if args.dedup != "off":
+                export_argv += ["--dedup", args.dedup]
+            if args.skip_over_budget:
+                export_argv += ["--skip-over-budget", str(args.skip_over_budget)]
+            if args.op_profile:
+                export_argv.append("--op-profile")
+            if args.cold_start:
+                export_argv += ["--cold-start", str(args.cold_start)]
+            if args.cadence:
+                export_argv += ["--cadence", args.cadence, "--cadence-sec", str(args.cadence_sec)]
+            if args.archive_quota_gb is not None:
+                export_argv += ["--archive-quota-gb", str(args.archive_quota_gb)]
+
+        if args.work_quota_gb is not None:
+            export_argv += ["--work-quota-gb", str(args.work_quota_gb)]
+        if args.min_free_gb is not None:
+            export_argv += ["--min-free-gb", str(args.min_free_gb)]
         if args.force:
             export_argv.append("--force")
         if args.push_hf:
             export_argv.append("--push-hf")
+        if args.local_hub:
+            export_argv += ["--local-hub", args.local_hub]
+        if args.sync_interval is not None:
+            export_argv += ["--sync-interval", str(args.sync_interval)]
+        if args.variants:
+            export_argv += ["--variants", args.variants]
+        if args.schedule != "alphabetical":
+            export_argv += ["--schedule", args.schedule]
+        if args.fixed_timeouts:
+            export_argv.append("--fixed-timeouts")
+        for flag, value in [
+            ("--timeout-multiplier", args.timeout_multiplier),
+            ("--timeout-floor", args.timeout_floor),
+            ("--timeout-ceiling", args.timeout_ceiling),
+        ]:
+            if value is not None:
+                export_argv += [flag, str(value)]
+        if deadline is not None:
+            export_argv += ["--time-budget", str(remaining_budget())]
         if args.limit:
             export_argv += ["--limit", str(args.limit)]
         if args.dataset != "cifar-10":
@@ -122,13 +401,24 @@ def main():
             export_argv += ["--export-timeout", str(args.export_timeout)]
         if args.android_runs != 20:
             export_argv += ["--android-runs", str(args.android_runs)]
+        if args.acc_ci_width is not None:
+            export_argv += ["--acc-ci-width", str(args.acc_ci_width)]
+        if args.acc_confidence is not None:
+            export_argv += ["--acc-confidence", str(args.acc_confidence)]
+        if args.worker_rss_mb is not None:
+            export_argv += ["--worker-rss-mb", str(args.worker_rss_mb)]
+        if args.queue:
+            export_argv += ["--queue", args.queue]
+        if args.lease_sec is not None:
+            export_argv += ["--lease-sec", str(args.lease_sec)]
 
         # Temporarily replace sys.argv so process_models.main() parses correctly
         original_argv = sys.argv
         sys.argv = export_argv
 
         from ab.vr.process_models import main as export_main
-        export_main()
+        with tracing.span("stage.export"):
+            export_main()
 
         sys.argv = original_argv
 
@@ -136,19 +426,28 @@ def main():
     if not args.skip_device:
         from ab.vr.benchmark_models import run_benchmarks
         models_list = [m.strip() for m in args.models.split(",")] if args.models else None
-        run_benchmarks(models=models_list)
+        sync = hub_sync().start() if args.push_hf else None
+        try:
+            with tracing.span("stage.benchmark"):
+                run_benchmarks(models=models_list, time_budget_sec=remaining_budget(), **bench_kwargs)
+        finally:
+            if sync is not None:
+                sync.stop()
         
         # Cleanup
         if getattr(args, "low_storage", False):
             from pathlib import Path
             onnx_temp = Path("_work/onnx_temp")
             if onnx_temp.exists():
+                from ab.vr.artifact_store import archive_or_delete
                 for f in onnx_temp.glob("*.onnx"):
                     try:
-                        f.unlink()
+                        archive_or_delete(f, args.archive_quota_gb)
                     except Exception:
                         pass
 
+    finish_run()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Guard CLI startup time and import-time side effects.
+
+Each pipeline module is imported in a fresh interpreter, which must:
+- stay within the import-time budget (median over --runs, interpreter start subtracted);
+- not import heavy dependencies (torch, onnxruntime, pandas, ...), which belong inside the functions that use them;
+- not create directories, open log files or start processes.
+
+`main.py --help` has its own wall-clock budget. Exits 1 on any violation.
+
+Usage:
+    python scripts/check_startup.py
+    python scripts/check_startup.py --runs 10 --budget-ms 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from statistics import median
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MODULES = [
+    "ab.vr.process_models",
+    "ab.vr.benchmark_models",
+    "ab.vr.unity_runner",
+    "ab.vr.onnx_validator",
+    "ab.vr.onnx_exporter",
+    "ab.vr.model_loader",
+    "ab.vr.hub_sync",
+    "ab.vr.cost_model",
+    "ab.vr.op_profiler",
+    "ab.vr.resolution_sweep",
+    "ab.vr.metrics",
+    "ab.vr.tracing",
+    "ab.vr.staging",
+    "ab.vr.artifact_store",
+    "ab.vr.disk_quota",
+    "ab.vr.cold_start",
+    "ab.vr.cadence",
+    "ab.vr.contention",
+    "ab.vr.ab_compare",
+]
+HEAVY = ["torch", "torchvision", "onnxruntime", "onnx", "pandas", "numpy", "psutil", "huggingface_hub", "ab.nn", "zstandard"]
+
+MODULE_BUDGET_MS = 500.0
+HELP_BUDGET_MS = 1000.0
+
+# Records side effects instead of performing them, then imports the module
+_PROBE = """
+import json, logging, os, pathlib, subprocess, sys
+effects = []
+pathlib.Path.mkdir = lambda self, *a, **k: effects.append(f"mkdir {self}")
+os.mkdir = lambda p, *a, **k: effects.append(f"mkdir {p}")
+os.makedirs = lambda p, *a, **k: effects.append(f"mkdir {p}")
+logging.FileHandler.__init__ = lambda self, name, *a, **k: effects.append(f"log file {name}")
+def _popen(self, args, *a, **k):
+    effects.append(f"process {args if isinstance(args, str) else ' '.join(map(str, args))}")
+    raise OSError("blocked by check_startup")
+subprocess.Popen.__init__ = _popen
+import MODULE
+heavy = sorted(h for h in HEAVY if h in sys.modules)
+print(json.dumps({"heavy": heavy, "effects": effects}))
+"""
+
+
+def _wall_ms(cmd: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, capture_output=True)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def import_ms(module: str, runs: int, baseline_ms: float) -> float:
+    return median(_wall_ms([sys.executable, "-c", f"import {module}"]) for _ in range(runs)) - baseline_ms
+
+
+def probe(module: str) -> dict:
+    r = subprocess.run(
+        [sys.executable, "-c", _PROBE.replace("MODULE", module).replace("HEAVY", repr(HEAVY))],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if r.returncode != 0:
+        return {"heavy": [], "effects": [], "error": (r.stderr.strip().splitlines() or ["?"])[-1]}
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check import time and import-time side effects")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=MODULE_BUDGET_MS, help="Per-module import budget")
+    ap.add_argument("--help-budget-ms", type=float, default=HELP_BUDGET_MS, help="`main.py --help` wall budget")
+    args = ap.parse_args()
+
+    baseline = median(_wall_ms([sys.executable, "-c", "pass"]) for _ in range(args.runs))
+    failures = []
+    print(f"{'module':<28}{'import ms':>10}  notes")
+    for module in MODULES:
+        ms = import_ms(module, args.runs, baseline)
+        result = probe(module)
+        notes = []
+        if ms > args.budget_ms:
+            notes.append(f"over {args.budget_ms:.0f} ms budget")
+        if result.get("error"):
+            notes.append(f"import failed: {result['error']}")
+        if result["heavy"]:
+            notes.append("imports " + ", ".join(result["heavy"]))
+        notes += result["effects"]
+        print(f"{module:<28}{ms:>10.0f}  {'; '.join(notes) or 'ok'}")
+        if notes:
+            failures.append(module)
+
+    help_ms = median(_wall_ms([sys.executable, "main.py", "--help"]) for _ in range(args.runs))
+    ok = help_ms <= args.help_budget_ms
+    print(f"{'main.py --help':<28}{help_ms:>10.0f}  {'ok' if ok else f'over {args.help_budget_ms:.0f} ms budget'}")
+    if not ok:
+        failures.append("main.py --help")
+
+    if failures:
+        print(f"\nFAILED: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()